@@ -0,0 +1,46 @@
+"""
+Measures the Ambulatory Glucose Profile endpoint over a 90-day CGM history with readings every 5 minutes.
+
+    python -m benchmarks.bench_agp --days 90
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import HISTORY_START, benchmark_database, create_history, measure, median_ms, no_response_cache, setup_django
+
+
+def run(days):
+    from rest_framework.test import APIRequestFactory
+    from glucose.models import GlucoseLevelMetadata
+    from glucose.views import get_level_agp
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    rows = days * 288
+    create_history(metadata, 0, rows, interval=timedelta(minutes=5))
+    end = HISTORY_START + timedelta(days=days)
+    factory = APIRequestFactory()
+
+    def request(window):
+        params = {'user_id': 'bench_user', 'from': (end - timedelta(days=window)).isoformat(), 'to': end.isoformat()}
+        return lambda: get_level_agp(factory.get('/api/v1/levels/agp', params))
+
+    print(f'{rows} readings')
+    print(f'{"window":>10}{"readings":>10}{"queries":>9}{"median ms":>11}')
+    for window in (14, days):
+        with measure() as stats:
+            response = request(window)()
+        print(f'{window:>7} d {response.data["count"]:>9}{stats["queries"]:>9}{median_ms(request(window), repeats=10):>11.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=90, help='Length of the history in days.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database(), no_response_cache():
+        run(args.days)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Compares dashboard polls of a user's latest page and metrics served from the response cache or answered
+with 304 Not Modified with uncached requests.
+
+    python -m benchmarks.bench_cache --rows 100000
+"""
+import argparse
+from datetime import datetime, timezone
+
+from benchmarks.common import benchmark_database, create_history, median_ms, setup_django
+
+
+def run(rows):
+    from rest_framework.test import APIRequestFactory
+    from glucose.cache import bump_user_versions, counters
+    from glucose.models import GlucoseLevelMetadata
+    from glucose.views import get_level_stats, get_levels_by_user_id
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    create_history(metadata, 0, rows)
+    factory = APIRequestFactory()
+
+    def request(view, path, params, invalidate=False, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+
+        def call():
+            if invalidate:
+                bump_user_versions(['bench_user'])
+            return view(factory.get(path, params, **headers))
+        return call
+
+    print(f'{rows} readings')
+    print(f'{"request":>16}{"miss ms":>10}{"hit ms":>10}{"304 ms":>10}')
+    for label, view, path, params in (
+        ('latest page', get_levels_by_user_id, '/api/v1/levels/', {'user_id': 'bench_user', 'sort_by': '-device_timestamp', 'pagination': 'cursor', 'limit': 96}),
+        ('stats', get_level_stats, '/api/v1/levels/stats', {'user_id': 'bench_user'}),
+    ):
+        miss = median_ms(request(view, path, params, invalidate=True), repeats=10)
+        hit = median_ms(request(view, path, params), repeats=10)
+        etag = request(view, path, params)()['ETag']
+        unchanged = median_ms(request(view, path, params, etag=etag), repeats=10)
+        print(f'{label:>16}{miss:>10.2f}{hit:>10.2f}{unchanged:>10.2f}')
+    print(counters.snapshot())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Number of readings in the history.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures the import_glucose_csv command on generated LibreView exports with different numbers of workers.
+
+    python -m benchmarks.bench_csv_import --files 16 --rows 5000 --workers 1 4
+"""
+import argparse
+import csv
+import io
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from benchmarks.common import HISTORY_START, benchmark_database, setup_django
+
+HEADER = ["Gerät", "Seriennummer", "Gerätezeitstempel", "Aufzeichnungstyp", "Glukosewert-Verlauf mg/dL", "Glukose-Scan mg/dL"]
+
+
+def write_exports(directory, files, rows):
+    for number in range(files):
+        with open(os.path.join(directory, f'bench_user_{number}.csv'), 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Glukose-Daten', 'Erstellt am', '06-07-2024 12:34 UTC', 'Erstellt von', 'benchmark'])
+            writer.writerow(HEADER)
+            for i in range(rows):
+                timestamp = HISTORY_START + i * timedelta(minutes=15)
+                writer.writerow(['FreeStyle LibreLink', 'BENCH-0001', timestamp.strftime('%d-%m-%Y %H:%M'), '0', str(100 + (i * 7) % 80), ''])
+
+
+def run(files, rows, worker_counts):
+    from django.core.management import call_command
+    from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_exports(directory, files, rows)
+        print(f'{files} exports of {rows} rows')
+        print(f'{"workers":>8}{"seconds":>10}{"rows/s":>10}')
+        for workers in worker_counts:
+            GlucoseLevelMetadata.objects.all().delete()
+            start = time.perf_counter()
+            call_command('import_glucose_csv', directory, workers=workers, stdout=io.StringIO())
+            seconds = time.perf_counter() - start
+            assert GlucoseLevel.objects.count() == files * rows
+            print(f'{workers:>8}{seconds:>10.2f}{files * rows / seconds:>10.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=16, help='Number of exports.')
+    parser.add_argument('--rows', type=int, default=5000, help='Number of rows per export.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()], help='Worker counts to measure.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.files, args.rows, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Measures the write throughput of concurrent create_levels requests for each database profile.
+
+Every profile runs in its own process, since the database settings are read once per process:
+- sqlite-stock: Django's SQLite backend with a connection per request, the former settings.
+- sqlite: the default profile, see glucose.backends.sqlite3.
+- postgresql: the PostgreSQL profile, configured with the POSTGRES_* variables and requiring psycopg.
+
+Threads post uploads for their own users through Django's test client and close their connections
+after every request like the request handler does, honoring CONN_MAX_AGE.
+
+    python -m benchmarks.bench_db_writes --profiles sqlite-stock sqlite postgresql --threads 8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from benchmarks.common import benchmark_database, make_levels, setup_django
+
+# Device timestamp of the first reading and time between two readings of a writer.
+BENCH_START = datetime(2024, 7, 1)
+INTERVAL = timedelta(minutes=5)
+
+PROFILES = {
+    'sqlite-stock': 'sqlite',
+    'sqlite': 'sqlite',
+    'postgresql': 'postgresql',
+}
+
+
+def run(threads, uploads, rows):
+    from django.db import close_old_connections
+    from django.test import Client
+
+    def post_all(thread):
+        latencies, errors = [], 0
+        for upload in range(uploads):
+            payload = json.dumps(make_levels(rows, user_id=f'writer_{thread}', start=BENCH_START + upload * rows * INTERVAL, interval=INTERVAL))
+            start = time.perf_counter()
+            response = Client().post('/api/v1/levels/create', payload, content_type='application/json')
+            close_old_connections()
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(post_all, range(threads)))
+    seconds = time.perf_counter() - start
+
+    latencies = sorted(latency for thread_latencies, _ in results for latency in thread_latencies)
+    errors = sum(thread_errors for _, thread_errors in results)
+    return {
+        'rows_per_second': (len(latencies) - errors) * rows / seconds,
+        'p99_ms': latencies[min(int(0.99 * len(latencies)), len(latencies) - 1)] * 1000,
+        'errors': errors,
+    }
+
+
+def run_profile(profile, threads, uploads, rows):
+    """
+    Runs the benchmark for one profile in the current process and prints the result as JSON.
+    """
+    os.environ['GLUCOSE_DATABASE'] = PROFILES[profile]
+    setup_django()
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    if profile == 'sqlite-stock':
+        database.update(ENGINE='django.db.backends.sqlite3', CONN_MAX_AGE=0, OPTIONS={})
+    with tempfile.TemporaryDirectory() as directory:
+        # Concurrent connections need a database file; PostgreSQL creates its own test database.
+        name = os.path.join(directory, 'bench_db_writes.sqlite3') if PROFILES[profile] == 'sqlite' else None
+        with benchmark_database(name):
+            print(json.dumps(run(threads, uploads, rows)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=['sqlite-stock', 'sqlite'], help='Database profiles to compare.')
+    parser.add_argument('--threads', type=int, default=8, help='Number of concurrent writers.')
+    parser.add_argument('--uploads', type=int, default=20, help='Number of uploads per writer.')
+    parser.add_argument('--rows', type=int, default=100, help='Number of levels per upload.')
+    parser.add_argument('--run', choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_profile(args.run, args.threads, args.uploads, args.rows)
+        return
+
+    print(f'{args.threads} writers, {args.uploads} uploads of {args.rows} levels each')
+    print(f'{"profile":<14}{"rows/s":>10}{"p99 ms":>10}{"errors":>8}')
+    for profile in args.profiles:
+        command = [sys.executable, '-m', 'benchmarks.bench_db_writes', '--run', profile,
+                   '--threads', str(args.threads), '--uploads', str(args.uploads), '--rows', str(args.rows)]
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode:
+            print(f'{profile:<14}failed: {process.stderr.strip().splitlines()[-1]}')
+            continue
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        print(f'{profile:<14}{result["rows_per_second"]:>10.0f}{result["p99_ms"]:>10.1f}{result["errors"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares a month of readings fetched in full with the same month downsampled for a chart.
+
+    python -m benchmarks.bench_downsampling --days 30 --points 300
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import HISTORY_START, benchmark_database, create_history, median_ms, no_response_cache, setup_django
+
+
+def run(days, points):
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIRequestFactory
+    from glucose.models import GlucoseLevelMetadata
+    from glucose.views import get_levels_by_user_id
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    rows = days * 288
+    create_history(metadata, 0, rows, interval=timedelta(minutes=5))
+    factory = APIRequestFactory()
+    window = {'user_id': 'bench_user', 'from': HISTORY_START.isoformat(), 'to': (HISTORY_START + timedelta(days=days)).isoformat()}
+
+    def request(params):
+        def call():
+            response = get_levels_by_user_id(factory.get('/api/v1/levels/', {**window, **params}))
+            return JSONRenderer().render(response.data)
+        return call
+
+    print(f'{rows} readings over {days} days')
+    print(f'{"request":>24}{"bytes":>12}{"median ms":>11}')
+    for label, params in (('full (one page)', {'limit': rows, 'pagination': 'cursor'}), (f'points={points}', {'points': points})):
+        size = len(request(params)())
+        print(f'{label:>24}{size:>12}{median_ms(request(params), repeats=5):>11.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=30, help='Length of the history in days.')
+    parser.add_argument('--points', type=int, default=300, help='Number of points of the downsampled series.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database(), no_response_cache():
+        run(args.days, args.points)
+
+
+if __name__ == '__main__':
+    main()
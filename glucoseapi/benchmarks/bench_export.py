@@ -0,0 +1,63 @@
+"""
+Compares pulling a user's full history as paginated JSON with the Arrow IPC and Parquet exports.
+
+Reports wall time, transferred bytes and peak traced Python memory for each path.
+
+    python -m benchmarks.bench_export --rows 100000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.common import benchmark_database, create_history, setup_django
+
+
+def run(rows, page_size):
+    from rest_framework.test import APIClient
+    from glucose.models import GlucoseLevelMetadata
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    create_history(metadata, 0, rows)
+    client = APIClient()
+
+    def paginated_json():
+        size = 0
+        response = client.get('/api/v1/levels/', {'user_id': 'bench_user', 'limit': page_size, 'pagination': 'cursor'})
+        while True:
+            size += len(response.content)
+            next_link = response.data['next']
+            if not next_link:
+                return size
+            response = client.get(next_link)
+
+    def export(file_format):
+        def download():
+            response = client.get('/api/v1/levels/export', {'user_id': 'bench_user', 'file_format': file_format})
+            return sum(len(part) for part in response.streaming_content)
+        return download
+
+    print(f'{"path":<16}{"seconds":>10}{"MiB":>10}{"peak MiB":>10}')
+    for name, download in (('paginated json', paginated_json), ('arrow', export('arrow')), ('parquet', export('parquet'))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = download()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'{name:<16}{seconds:>10.2f}{size / 2 ** 20:>10.1f}{peak / 2 ** 20:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='Size of the user history.')
+    parser.add_argument('--page-size', type=int, default=1000, help='Page size of the paginated JSON pull.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.rows, args.page_size)
+
+
+if __name__ == '__main__':
+    main()
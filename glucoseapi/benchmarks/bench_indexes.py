@@ -0,0 +1,71 @@
+"""
+Measures read latency of a single user's readings as their history grows.
+
+For every size the user's history is extended to that many rows and three lookups are timed:
+the natural key lookup done by the upsert, the latest page in device time order, and the
+metadata lookup by user_id. Pass --without-indexes to drop the indexes added for these
+queries and see the full-scan baseline.
+
+    python -m benchmarks.bench_indexes --sizes 10000 100000 1000000 10000000
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import HISTORY_START, benchmark_database, create_history, median_ms, setup_django
+
+def drop_indexes():
+    from django.db import connection
+    from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+
+    with connection.schema_editor() as schema_editor:
+        for constraint in GlucoseLevel._meta.constraints:
+            schema_editor.remove_constraint(GlucoseLevel, constraint)
+        for index in GlucoseLevel._meta.indexes:
+            schema_editor.remove_index(GlucoseLevel, index)
+        old_field = GlucoseLevelMetadata._meta.get_field('user_id')
+        new_field = old_field.clone()
+        new_field.db_index = False
+        new_field.set_attributes_from_name('user_id')
+        schema_editor.alter_field(GlucoseLevelMetadata, old_field, new_field)
+
+
+def run(sizes, without_indexes):
+    from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+
+    if without_indexes:
+        drop_indexes()
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    GlucoseLevelMetadata.objects.bulk_create(
+        GlucoseLevelMetadata(user_id=f'other_user_{i}', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+        for i in range(1000)
+    )
+
+    print(f'{"rows":>10}{"natural key ms":>16}{"latest page ms":>16}{"user_id ms":>12}')
+    rows = 0
+    for size in sorted(sizes):
+        create_history(metadata, rows, size)
+        rows = size
+        key_timestamp = HISTORY_START + (size // 2) * timedelta(minutes=15)
+
+        natural_key = median_ms(lambda: list(GlucoseLevel.objects.filter(
+            metadata=metadata, device='FreeStyle LibreLink', serial_number='BENCH-0001', device_timestamp=key_timestamp,
+        ).values_list('id')))
+        latest_page = median_ms(lambda: list(GlucoseLevel.objects.filter(metadata=metadata).order_by('-device_timestamp')[:100]))
+        user_lookup = median_ms(lambda: list(GlucoseLevelMetadata.objects.filter(user_id='bench_user')))
+        print(f'{size:>10}{natural_key:>16.3f}{latest_page:>16.3f}{user_lookup:>12.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='History sizes to measure.')
+    parser.add_argument('--without-indexes', action='store_true', help='Drop the lookup indexes before measuring.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.sizes, args.without_indexes)
+
+
+if __name__ == '__main__':
+    main()
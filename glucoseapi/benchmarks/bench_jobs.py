@@ -0,0 +1,49 @@
+"""
+Compares the response time of uploads ingested inline with uploads queued with mode=background, and
+measures how fast a worker drains the queued jobs.
+
+    python -m benchmarks.bench_jobs --rows 100 1000 10000
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import benchmark_database, make_levels, setup_django
+
+
+def run(row_counts):
+    from rest_framework.test import APIRequestFactory
+    from glucose.jobs import run_worker
+    from glucose.views import create_levels
+
+    factory = APIRequestFactory()
+
+    def post(path, payload):
+        start = time.perf_counter()
+        response = create_levels(factory.post(path, payload, content_type='application/json'))
+        return (time.perf_counter() - start) * 1000, response.status_code
+
+    print(f'{"rows":>8}{"inline ms":>12}{"queued ms":>12}{"drain rows/s":>14}')
+    for rows in row_counts:
+        inline, _ = post('/api/v1/levels/create', json.dumps(make_levels(rows, user_id=f'inline_{rows}')))
+        queued, code = post('/api/v1/levels/create?mode=background', json.dumps(make_levels(rows, user_id=f'queued_{rows}')))
+        assert code == 202, code
+
+        start = time.perf_counter()
+        run_worker(once=True)
+        drain = rows / (time.perf_counter() - start)
+        print(f'{rows:>8}{inline:>12.1f}{queued:>12.1f}{drain:>14.0f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10000], help='Upload sizes to measure.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
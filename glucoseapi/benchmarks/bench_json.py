@@ -0,0 +1,65 @@
+"""
+Compares DRF's JSON renderer and parser with the orjson-based glucose.renderers.JSONRenderer and
+glucose.parsers.JSONParser.
+
+Rendering is measured on a page of serialized glucose levels, parsing on an upload of synthetic CGM
+rows. Both implementations must produce the same output.
+
+    python -m benchmarks.bench_json --rows 1000 10000
+"""
+import argparse
+import io
+import json
+from datetime import datetime, timezone
+from itertools import islice
+
+from benchmarks.common import benchmark_database, create_history, median_ms, setup_django
+
+
+def make_page(rows):
+    """
+    Returns a page of rows serialized by GlucoseLevelRowSerializer; CGM trend rows, mostly null fields.
+    """
+    from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+    from glucose.serializers import GlucoseLevelRowSerializer
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id=f'bench_{rows}', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    create_history(metadata, 0, rows)
+    serializer = GlucoseLevelRowSerializer()
+    return serializer.serialize(serializer.select(GlucoseLevel.objects.filter(metadata=metadata).order_by('device_timestamp')))
+
+
+def run(row_counts):
+    from rest_framework.parsers import JSONParser as DRFJSONParser
+    from rest_framework.renderers import JSONRenderer as DRFJSONRenderer
+    from glucose.parsers import JSONParser
+    from glucose.renderers import JSONRenderer
+    from glucose.synthetic import generate_history
+
+    print(f'{"operation":<10}{"rows":>8}{"drf ms":>10}{"orjson ms":>12}{"speedup":>9}')
+    for rows in row_counts:
+        page = make_page(rows)
+        drf, fast = DRFJSONRenderer(), JSONRenderer()
+        assert drf.render(page) == fast.render(page)
+        before, after = median_ms(lambda: drf.render(page)), median_ms(lambda: fast.render(page))
+        print(f'{"render":<10}{rows:>8}{before:>10.2f}{after:>12.2f}{before / after:>8.1f}x')
+
+        body = json.dumps(list(islice(generate_history('bench_user', rows // 96 + 1), rows))).encode()
+        drf, fast = DRFJSONParser(), JSONParser()
+        assert drf.parse(io.BytesIO(body)) == fast.parse(io.BytesIO(body))
+        before, after = median_ms(lambda: drf.parse(io.BytesIO(body))), median_ms(lambda: fast.parse(io.BytesIO(body)))
+        print(f'{"parse":<10}{rows:>8}{before:>10.2f}{after:>12.2f}{before / after:>8.1f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='Page and upload sizes to measure.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
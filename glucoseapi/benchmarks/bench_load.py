@@ -0,0 +1,140 @@
+"""
+Compares the throughput and latency of the synchronous endpoints served by threads, as under a WSGI
+server, with the async endpoints served by an event loop, as under an ASGI server, under concurrent
+mixed read and upload traffic.
+
+Requests run in-process through Django's test clients, so the numbers measure the request handling
+of Django and the database, not an HTTP server. All middleware is async capable, so the async
+endpoints run on the event loop without being adapted to threads. The response cache is disabled
+so both setups do the same work. Failed requests are counted as errors, e.g. uploads that find
+SQLite locked by another writer.
+
+    python -m benchmarks.bench_load --rows 50000 --requests 2000 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import benchmark_database, create_history, make_levels, no_response_cache, setup_django
+
+# Share of requests that upload levels instead of reading them.
+UPLOAD_SHARE = 0.1
+
+# Number of levels per upload.
+UPLOAD_SIZE = 50
+
+
+def plan_requests(count, pages, seed=0):
+    """
+    Draws the mixed sequence of requests both setups replay.
+
+    Returns:
+        list: ('read', params) and ('upload', body) tuples.
+    """
+    rng = random.Random(seed)
+    requests = []
+    for i in range(count):
+        if rng.random() < UPLOAD_SHARE:
+            start = datetime(2024, 7, 1) + timedelta(minutes=rng.randrange(0, 60 * 24 * 30, 5))
+            requests.append(('upload', json.dumps(make_levels(UPLOAD_SIZE, user_id=f'upload_{i % 4}', start=start, interval=timedelta(minutes=5)))))
+        else:
+            requests.append(('read', {'user_id': 'bench_user', 'sort_by': 'device_timestamp', 'limit': 100, 'page': rng.randint(1, pages)}))
+    return requests
+
+
+def summarize(label, seconds, latencies, errors):
+    latencies = sorted(latencies)
+
+    def percentile(share):
+        return latencies[min(int(share * len(latencies)), len(latencies) - 1)] * 1000
+
+    print(f'{label:>6}{len(latencies) / seconds:>10.0f}{percentile(0.5):>10.1f}{percentile(0.99):>10.1f}{errors:>8}')
+
+
+def run_wsgi(requests, concurrency):
+    """
+    Replays the requests against the synchronous endpoints from a pool of threads.
+    """
+    from django.db import connections
+    from django.test import Client
+
+    def call(request):
+        kind, payload = request
+        start = time.perf_counter()
+        if kind == 'read':
+            response = Client().get('/api/v1/levels/', payload)
+        else:
+            response = Client().post('/api/v1/levels/create', payload, content_type='application/json')
+        connections.close_all()
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, requests))
+    return time.perf_counter() - start, results
+
+
+def run_asgi(requests, concurrency):
+    """
+    Replays the requests against the async endpoints from concurrent tasks on one event loop.
+    """
+    from django.test import AsyncClient
+
+    async def replay():
+        client = AsyncClient()
+        queue = iter(requests)
+        results = []
+
+        async def work():
+            for kind, payload in queue:
+                start = time.perf_counter()
+                if kind == 'read':
+                    response = await client.get('/api/v1/async/levels/', payload)
+                else:
+                    response = await client.post('/api/v1/async/levels/create', payload, content_type='application/json')
+                results.append((time.perf_counter() - start, response.status_code))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(work() for _ in range(concurrency)))
+        return time.perf_counter() - start, results
+
+    return asyncio.run(replay())
+
+
+def run(rows, count, concurrency):
+    from glucose.models import GlucoseLevelMetadata
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    create_history(metadata, 0, rows)
+    requests = plan_requests(count, rows // 100)
+
+    print(f'{rows} readings, {count} requests ({UPLOAD_SHARE:.0%} uploads of {UPLOAD_SIZE} levels), concurrency {concurrency}')
+    print(f'{"setup":>6}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"errors":>8}')
+    with no_response_cache():
+        for label, replay in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+            seconds, results = replay(requests, concurrency)
+            summarize(label, seconds, [latency for latency, _ in results], sum(code >= 400 for _, code in results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000, help='Number of readings of the user that is read.')
+    parser.add_argument('--requests', type=int, default=2000, help='Number of requests per setup.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Number of concurrent clients.')
+    args = parser.parse_args()
+
+    setup_django()
+    with tempfile.TemporaryDirectory() as directory:
+        # A database file, as concurrent connections to an in-memory database would share one connection's locks.
+        with benchmark_database(os.path.join(directory, 'bench_load.sqlite3')):
+            run(args.rows, args.requests, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures peak Python memory of the streaming NDJSON ingestion against the JSON array path.
+
+The payload is written to a temporary file first so that only memory allocated by the ingestion
+itself is traced.
+
+    python -m benchmarks.bench_ndjson --rows 1000 100000
+"""
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import benchmark_database, iter_levels, setup_django
+
+
+def ingest_array(path):
+    from glucose.views import process_glucose_levels
+
+    with open(path, 'rb') as payload:
+        process_glucose_levels([json.loads(line) for line in payload])
+
+
+def ingest_stream(path):
+    from glucose.ingestion import ingest_ndjson
+
+    with open(path, 'rb') as payload:
+        ingest_ndjson(payload)
+
+
+def run(row_counts):
+    print(f'{"implementation":<16}{"rows":>10}{"peak MiB":>12}{"seconds":>10}')
+    for rows in row_counts:
+        for name, implementation in (('json array', ingest_array), ('ndjson stream', ingest_stream)):
+            with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as payload:
+                for level in iter_levels(rows, user_id=f'bench_{name}_{rows}'):
+                    payload.write(json.dumps(level) + '\n')
+                payload.flush()
+
+                tracemalloc.start()
+                start = time.perf_counter()
+                implementation(payload.name)
+                seconds = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            print(f'{name:<16}{rows:>10}{peak / 2 ** 20:>12.1f}{seconds:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000], help='Upload sizes to measure.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compares page latency of page number and cursor pagination at increasing depths.
+
+Both modes are requested through the get_levels_by_user_id view for a single user with a
+long history. Page number requests include the COUNT(*) and OFFSET of PageNumberPagination.
+
+    python -m benchmarks.bench_pagination --rows 200000 --limit 100
+"""
+import argparse
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.common import benchmark_database, create_history, median_ms, no_response_cache, setup_django
+
+
+def run(rows, limit):
+    from rest_framework.test import APIRequestFactory
+    from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+    from glucose.pagination import KeysetPagination
+    from glucose.views import get_levels_by_user_id
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    create_history(metadata, 0, rows)
+    factory = APIRequestFactory()
+    ordered = GlucoseLevel.objects.filter(metadata=metadata).order_by('device_timestamp', 'id')
+
+    print(f'{"page":>8}{"page number ms":>16}{"cursor ms":>12}')
+    page = 1
+    while (page - 1) * limit < rows:
+        params = {'user_id': 'bench_user', 'limit': limit, 'sort_by': 'device_timestamp'}
+        numbered = median_ms(lambda: get_levels_by_user_id(factory.get('/api/v1/levels/', {**params, 'page': page})), repeats=5)
+
+        cursor = None
+        if page > 1:
+            paginator = KeysetPagination(limit)
+            paginator.request = factory.get('/api/v1/levels/')
+            next_link = paginator.encode_cursor(ordered[(page - 1) * limit - 1], reverse=False)
+            cursor = parse_qs(urlparse(next_link).query)['cursor'][0]
+        cursor_params = {**params, 'pagination': 'cursor', **({'cursor': cursor} if cursor else {})}
+        response = get_levels_by_user_id(factory.get('/api/v1/levels/', cursor_params))
+        assert response.status_code == 200 and response.data['results'], response.data
+        keyset = median_ms(lambda: get_levels_by_user_id(factory.get('/api/v1/levels/', cursor_params)), repeats=5)
+        print(f'{page:>8}{numbered:>16.2f}{keyset:>12.2f}')
+        page *= 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000, help='Size of the user history.')
+    parser.add_argument('--limit', type=int, default=100, help='Page size.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database(), no_response_cache():
+        run(args.rows, args.limit)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures the throughput and memory of converting upload rows into GlucoseLevelDTO objects with
+GlucoseLevelDTO.from_dict, the former per-row conversion, and with the batch GlucoseLevelParser.
+
+The rows are synthetic CGM histories, see glucose.synthetic.generate_history. No database is needed.
+
+    python -m benchmarks.bench_parsing --rows 10000 100000
+"""
+import argparse
+import time
+import tracemalloc
+from itertools import count, islice
+
+from benchmarks.common import setup_django
+
+
+def make_rows(rows):
+    from glucose.synthetic import generate_history
+
+    histories = (generate_history(f'bench_{user}', 30) for user in count())
+    return list(islice((level for history in histories for level in history), rows))
+
+
+def run(row_counts, repeats):
+    from glucose.dtos import GlucoseLevelDTO
+    from glucose.ingestion import GlucoseLevelParser, IngestionSummary
+
+    implementations = [
+        ('from_dict', lambda rows: [GlucoseLevelDTO.from_dict(level) for level in rows]),
+        ('batch parser', lambda rows: GlucoseLevelParser().parse_all(rows, IngestionSummary())),
+    ]
+    print(f'{"implementation":<16}{"rows":>10}{"rows/s":>12}{"peak MiB":>10}')
+    for rows in row_counts:
+        levels = make_rows(rows)
+        for name, implementation in implementations:
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                implementation(levels)
+                timings.append(time.perf_counter() - start)
+            tracemalloc.start()
+            dtos = implementation(levels)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            assert len(dtos) == rows
+            print(f'{name:<16}{rows:>10}{rows / min(timings):>12.0f}{peak / 2 ** 20:>10.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000], help='Upload sizes to measure.')
+    parser.add_argument('--repeats', type=int, default=3, help='Number of runs per size; the fastest is reported.')
+    args = parser.parse_args()
+
+    setup_django()
+    run(args.rows, args.repeats)
+
+
+if __name__ == '__main__':
+    main()
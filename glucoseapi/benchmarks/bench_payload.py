@@ -0,0 +1,61 @@
+"""
+Compares the size and time of a page of glucose levels with field projection, omit_nulls and
+negotiated compression.
+
+Pages are requested through the full middleware stack with the response cache disabled. Brotli is
+only measured when the brotli package is installed.
+
+    python -m benchmarks.bench_payload --rows 1000
+"""
+import argparse
+from datetime import datetime, timezone
+
+from benchmarks.common import benchmark_database, create_history, median_ms, no_response_cache, setup_django
+
+# Query parameters of the compared page variants.
+VARIANTS = [
+    ('all fields', {}),
+    ('omit_nulls', {'omit_nulls': 'true'}),
+    ('fields', {'fields': 'device_timestamp,glucose_value_trend'}),
+    ('fields+omit_nulls', {'fields': 'device_timestamp,glucose_value_trend,glucose_scan', 'omit_nulls': 'true'}),
+]
+
+
+def run(rows):
+    from django.test import Client
+    from glucose.middleware import brotli
+    from glucose.models import GlucoseLevelMetadata
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    create_history(metadata, 0, rows)
+
+    encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+    client = Client()
+    baseline = None
+    print(f'{"variant":<20}{"encoding":<10}{"bytes":>10}{"ratio":>8}{"ms":>8}')
+    with no_response_cache():
+        for name, params in VARIANTS:
+            params = {'user_id': 'bench_user', 'sort_by': 'device_timestamp', 'limit': rows, **params}
+            for encoding in encodings:
+                def request():
+                    return client.get('/api/v1/levels/', params, HTTP_ACCEPT_ENCODING=encoding)
+                response = request()
+                assert response.status_code == 200, response.content[:200]
+                assert response.get('Content-Encoding', 'identity') == encoding
+                size = len(response.content)
+                baseline = baseline or size
+                print(f'{name:<20}{encoding:<10}{size:>10}{baseline / size:>7.1f}x{median_ms(request, repeats=10):>8.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help='Page size.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
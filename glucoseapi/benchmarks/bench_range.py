@@ -0,0 +1,50 @@
+"""
+Measures "last day" and "last 14 days" requests on the levels endpoint as a user's history grows.
+
+    python -m benchmarks.bench_range --sizes 10000 100000 1000000
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import HISTORY_START, benchmark_database, create_history, median_ms, no_response_cache, setup_django
+
+
+def run(sizes):
+    from rest_framework.test import APIRequestFactory
+    from glucose.models import GlucoseLevelMetadata
+    from glucose.views import get_levels_by_user_id
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    factory = APIRequestFactory()
+
+    def request(days, end):
+        params = {
+            'user_id': 'bench_user',
+            'from': (end - timedelta(days=days)).isoformat().replace('+00:00', 'Z'),
+            'to': end.isoformat().replace('+00:00', 'Z'),
+            'limit': 96 * days,
+            'pagination': 'cursor',
+        }
+        return lambda: get_levels_by_user_id(factory.get('/api/v1/levels/', params))
+
+    print(f'{"rows":>10}{"last day ms":>14}{"last 14 days ms":>18}')
+    rows = 0
+    for size in sorted(sizes):
+        create_history(metadata, rows, size)
+        rows = size
+        end = HISTORY_START + size * timedelta(minutes=15)
+        print(f'{size:>10}{median_ms(request(1, end), repeats=5):>14.2f}{median_ms(request(14, end), repeats=5):>18.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='History sizes to measure.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database(), no_response_cache():
+        run(args.sizes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Compares a year of daily glucose averages read from the rollup tables with the same aggregate over the raw readings.
+
+    python -m benchmarks.bench_rollups --days 365
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import HISTORY_START, benchmark_database, create_history, make_levels, measure, median_ms, no_response_cache, setup_django
+
+
+def run(days):
+    from rest_framework.test import APIRequestFactory
+    from glucose.dtos import GlucoseLevelDTO
+    from glucose.ingestion import upsert_glucose_levels
+    from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+    from glucose.rollups import aggregate_levels, rebuild_rollups
+    from glucose.views import get_level_trend
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    rows = days * 96
+    create_history(metadata, 0, rows)
+    start = time.perf_counter()
+    rebuild_rollups()
+    print(f'{rows} readings over {days} days, rollups rebuilt in {time.perf_counter() - start:.2f} s')
+
+    end = HISTORY_START + timedelta(days=days)
+    params = {'user_id': 'bench_user', 'from': HISTORY_START.isoformat(), 'to': end.isoformat()}
+    factory = APIRequestFactory()
+    levels = GlucoseLevel.objects.filter(metadata__user_id='bench_user', device_timestamp__gte=HISTORY_START, device_timestamp__lt=end)
+
+    print(f'{"daily averages":>22}{"median ms":>11}')
+    print(f'{"raw readings":>22}{median_ms(lambda: list(aggregate_levels(levels, "day")), repeats=5):>11.2f}')
+    print(f'{"rollups (endpoint)":>22}{median_ms(lambda: get_level_trend(factory.get("/api/v1/levels/trend", params)), repeats=20):>11.2f}')
+
+    # Cost of keeping the rollups current: one day of new readings after the history.
+    dtos = [GlucoseLevelDTO.from_dict(level) for level in make_levels(96, start=end.replace(tzinfo=None))]
+    with measure() as stats:
+        upsert_glucose_levels(dtos, return_objects=False)
+    print(f'upsert of 96 readings incl. rollup refresh: {stats["seconds"] * 1000:.2f} ms, {stats["queries"]} queries')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=365, help='Length of the history in days.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database(), no_response_cache():
+        run(args.days)
+
+
+if __name__ == '__main__':
+    main()
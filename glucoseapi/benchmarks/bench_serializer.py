@@ -0,0 +1,60 @@
+"""
+Compares serializing a page of glucose levels with GlucoseLevelSerializer and GlucoseLevelRowSerializer.
+
+Each implementation fetches and serializes one page from the database. With --flame-graph DIR the
+call stacks of both are sampled and written as folded stacks (model_serializer.folded and
+row_serializer.folded), which flamegraph.pl or speedscope render as flame graphs.
+
+    python -m benchmarks.bench_serializer --rows 1000 --flame-graph /tmp/flames
+"""
+import argparse
+import os
+from datetime import datetime, timezone
+
+from benchmarks.common import benchmark_database, create_history, median_ms, setup_django, write_flame_graph
+
+
+def run(rows, flame_graph_dir):
+    from rest_framework.renderers import JSONRenderer
+    from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+    from glucose.serializers import GlucoseLevelRowSerializer, GlucoseLevelSerializer
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    create_history(metadata, 0, rows)
+    page = GlucoseLevel.objects.filter(metadata=metadata).order_by('device_timestamp')
+
+    def model_serializer():
+        return GlucoseLevelSerializer(list(page), many=True).data
+
+    def row_serializer():
+        serializer = GlucoseLevelRowSerializer()
+        return serializer.serialize(serializer.select(page))
+
+    renderer = JSONRenderer()
+    assert renderer.render(model_serializer()) == renderer.render(row_serializer())
+
+    implementations = {'model_serializer': model_serializer, 'row_serializer': row_serializer}
+    print(f'{"implementation":<20}{"ms/page":>10}')
+    for name, implementation in implementations.items():
+        print(f'{name:<20}{median_ms(implementation, repeats=10):>10.2f}')
+
+    if flame_graph_dir:
+        os.makedirs(flame_graph_dir, exist_ok=True)
+        for name, implementation in implementations.items():
+            write_flame_graph(implementation, os.path.join(flame_graph_dir, f'{name}.folded'))
+        print(f'Folded stacks written to {flame_graph_dir}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000, help='Page size.')
+    parser.add_argument('--flame-graph', metavar='DIR', help='Write folded call stacks to this directory.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.rows, args.flame_graph)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Measures the glycemic metrics endpoint over windows of a large CGM history.
+
+    python -m benchmarks.bench_stats --rows 1000000
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import HISTORY_START, benchmark_database, create_history, measure, median_ms, no_response_cache, setup_django
+
+
+def run(rows):
+    from rest_framework.test import APIRequestFactory
+    from glucose.models import GlucoseLevelMetadata
+    from glucose.views import get_level_stats
+
+    metadata = GlucoseLevelMetadata.objects.create(user_id='bench_user', created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by='benchmark')
+    create_history(metadata, 0, rows)
+    end = HISTORY_START + rows * timedelta(minutes=15)
+    factory = APIRequestFactory()
+
+    def request(days):
+        params = {'user_id': 'bench_user', 'to': end.isoformat().replace('+00:00', 'Z')}
+        if days is not None:
+            params['from'] = (end - timedelta(days=days)).isoformat().replace('+00:00', 'Z')
+        return lambda: get_level_stats(factory.get('/api/v1/levels/stats', params))
+
+    print(f'{rows} readings')
+    print(f'{"window":>12}{"readings":>10}{"queries":>9}{"median ms":>11}')
+    for label, days in (('14 days', 14), ('90 days', 90), ('all', None)):
+        with measure() as stats:
+            response = request(days)()
+        repeats = 20 if days is not None else 3
+        print(f'{label:>12}{response.data["count"]:>10}{stats["queries"]:>9}{median_ms(request(days), repeats=repeats):>11.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='Number of readings in the history.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database(), no_response_cache():
+        run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares the former per-row update_or_create ingestion with the set-based upsert.
+
+Reports the query count and wall time per 1k rows for a first upload (inserts) and a
+re-upload of the same readings (updates).
+
+    python -m benchmarks.bench_upsert --rows 1300
+"""
+import argparse
+
+from benchmarks.common import benchmark_database, make_levels, measure, setup_django
+
+
+def legacy_process_glucose_levels(levels):
+    """
+    The per-row implementation of process_glucose_levels before the set-based upsert.
+    """
+    from glucose.dtos import GlucoseLevelDTO
+    from glucose.ingestion import UPDATE_FIELDS
+    from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+
+    for level in levels:
+        dto = GlucoseLevelDTO.from_dict(level)
+        metadata, _ = GlucoseLevelMetadata.objects.update_or_create(
+            user_id=dto.user_id,
+            defaults={'created_at': dto.created_at, 'created_by': dto.created_by},
+        )
+        GlucoseLevel.objects.update_or_create(
+            metadata=metadata,
+            device=dto.device,
+            serial_number=dto.serial_number,
+            device_timestamp=dto.device_timestamp,
+            defaults={name: getattr(dto, name) for name in UPDATE_FIELDS},
+        )
+
+
+def run(rows):
+    from glucose.views import process_glucose_levels
+
+    implementations = [('per-row', legacy_process_glucose_levels), ('bulk', process_glucose_levels)]
+    results = []
+    for name, implementation in implementations:
+        levels = make_levels(rows, user_id=f'bench_{name}')
+        for phase in ('insert', 'update'):
+            with measure() as stats:
+                implementation(levels)
+            results.append((name, phase, stats))
+
+    print(f'{"implementation":<16}{"phase":<10}{"queries/1k":>12}{"ms/1k":>12}')
+    for name, phase, stats in results:
+        per_k = 1000 / rows
+        print(f'{name:<16}{phase:<10}{stats["queries"] * per_k:>12.1f}{stats["seconds"] * 1000 * per_k:>12.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1300, help='Number of readings per upload.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        run(args.rows)
+
+
+if __name__ == '__main__':
+    main()
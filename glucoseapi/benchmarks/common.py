@@ -0,0 +1,205 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The benchmarks run against a throw-away test database created the same way `manage.py test` does,
+so they never touch the development database. Run them from the glucoseapi directory, e.g.:
+
+    python -m benchmarks.bench_upsert
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Number of rows per bulk insert when creating histories.
+INSERT_BATCH_SIZE = 5000
+
+# Device timestamp of the first reading of a created history.
+HISTORY_START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+
+def setup_django():
+    """
+    Configures Django for a standalone benchmark script.
+    """
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'glucoseapi.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def benchmark_database(name=None):
+    """
+    Creates a test database for the duration of the context and destroys it afterwards.
+
+    Args:
+        name (str): The name of the test database, e.g. a file path to give concurrent threads their
+            own connections to SQLite instead of a shared in-memory database. Defaults to the TEST NAME setting.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment(debug=False)
+    old_name = connection.settings_dict['NAME']
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def no_response_cache():
+    """
+    Returns a context disabling the cache, so that repeated requests measure the view instead of the response cache.
+    """
+    from django.test.utils import override_settings
+
+    return override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+
+
+@contextmanager
+def measure():
+    """
+    Measures wall time and the number of queries executed inside the context.
+
+    Yields:
+        dict: Filled with 'seconds' and 'queries' when the context exits.
+    """
+    from django.db import connection
+
+    stats = {'queries': 0}
+
+    def count_queries(execute, sql, params, many, context):
+        stats['queries'] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        start = time.perf_counter()
+        yield stats
+        stats['seconds'] = time.perf_counter() - start
+
+
+def median_ms(function, repeats=20):
+    """
+    Calls the function repeatedly and returns the median wall time in milliseconds.
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return sorted(timings)[len(timings) // 2]
+
+
+def write_flame_graph(function, path, duration=2.0, interval=0.001):
+    """
+    Samples the call stacks of a function and writes them in folded format.
+
+    The function is called repeatedly for the given duration while a background thread samples the
+    calling thread. The output can be rendered with flamegraph.pl or loaded into speedscope.
+
+    Args:
+        function (callable): The function to profile.
+        path (str): The file to write the folded stacks to.
+        duration (float): The number of seconds to keep calling the function.
+        interval (float): The number of seconds between two samples.
+    """
+    target = threading.get_ident()
+    stacks = Counter()
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{Path(code.co_filename).name}:{code.co_name}')
+                frame = frame.f_back
+            stacks[';'.join(reversed(stack))] += 1
+            time.sleep(interval)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        function()
+    done.set()
+    sampler.join()
+
+    with open(path, 'w') as output:
+        for stack, count in stacks.most_common():
+            output.write(f'{stack} {count}\n')
+
+
+def make_levels(count, user_id='bench_user', start=datetime(2024, 7, 1), interval=timedelta(minutes=15)):
+    """
+    Builds a payload of glucose level dictionaries as accepted by the create_levels endpoint.
+
+    Args:
+        count (int): The number of readings.
+        user_id (str): The user the readings belong to.
+        start (datetime): The device timestamp of the first reading.
+        interval (timedelta): The time between two readings.
+
+    Returns:
+        list: The glucose level dictionaries.
+    """
+    return list(iter_levels(count, user_id, start, interval))
+
+
+def iter_levels(count, user_id='bench_user', start=datetime(2024, 7, 1), interval=timedelta(minutes=15)):
+    """
+    Lazily yields the glucose level dictionaries of make_levels().
+    """
+    created_at = datetime(2024, 7, 15).isoformat()
+    for i in range(count):
+        yield {
+            'user_id': user_id,
+            'created_at': created_at,
+            'created_by': 'benchmark',
+            'device': 'FreeStyle LibreLink',
+            'serial_number': 'BENCH-0001',
+            'device_timestamp': (start + i * interval).isoformat(),
+            'recording_type': '0',
+            'glucose_value_trend': str(100 + (i * 7) % 80),
+        }
+
+
+def create_history(metadata, start, stop, interval=timedelta(minutes=15)):
+    """
+    Bulk inserts the readings with index start to stop of a user's CGM history.
+
+    Reading i is taken at HISTORY_START + i * interval, so histories can be extended step by step.
+
+    Args:
+        metadata (GlucoseLevelMetadata): The user the readings belong to.
+        start (int): The index of the first reading to insert.
+        stop (int): The index after the last reading to insert.
+        interval (timedelta): The time between two readings.
+    """
+    from glucose.models import GlucoseLevel
+
+    for batch_start in range(start, stop, INSERT_BATCH_SIZE):
+        GlucoseLevel.objects.bulk_create(
+            GlucoseLevel(
+                metadata=metadata,
+                device='FreeStyle LibreLink',
+                serial_number='BENCH-0001',
+                device_timestamp=HISTORY_START + i * interval,
+                recording_type='0',
+                glucose_value_trend=100 + (i * 7) % 80,
+            )
+            for i in range(batch_start, min(batch_start + INSERT_BATCH_SIZE, stop))
+        )
@@ -0,0 +1,201 @@
+"""
+Runs the benchmark suite against synthetic CGM histories and writes JSON results that can be
+compared across commits.
+
+Every scenario sends requests through the full middleware and view stack with Django's test client,
+with the response cache disabled. The data is generated with the generate_glucose_data command, so
+the same parameters produce the same database.
+
+    python -m benchmarks.run_suite --output before.json
+    python -m benchmarks.run_suite --output after.json --compare before.json --threshold 0.2
+
+Timings of shared or single-core machines vary by 20-30% between identical runs; compare runs from
+the same machine, and raise --repeats or --threshold when they are noisy.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks.common import BASE_DIR, benchmark_database, measure, no_response_cache, setup_django
+
+# Format version of the result files.
+RESULTS_VERSION = 1
+
+
+def scenarios(users, days, start):
+    """
+    Returns the scenarios of the suite as (name, method, path, parameters or payload factory) tuples.
+
+    Reads target the first user, uploads create the history of a new user per repeat.
+    """
+    from glucose.synthetic import generate_history
+
+    user_id = 'synthetic_0'
+    end = start + timedelta(days=days)
+    week = {'from': (end - timedelta(days=7)).isoformat(), 'to': end.isoformat()}
+    month = {'from': (end - timedelta(days=30)).isoformat(), 'to': end.isoformat()}
+
+    def upload(repeat):
+        return json.dumps(list(generate_history(f'upload_{repeat}', 1, start)))
+
+    return [
+        ('ingest_create_levels_1_day', 'post', '/api/v1/levels/create', upload),
+        ('read_page_number_deep', 'get', '/api/v1/levels/', {'user_id': user_id, 'sort_by': 'device_timestamp', 'limit': 100, 'page': max(days // 2, 1)}),
+        ('read_page_cursor_latest', 'get', '/api/v1/levels/', {'user_id': user_id, 'sort_by': '-device_timestamp', 'pagination': 'cursor', 'limit': 100}),
+        ('range_query_7_days', 'get', '/api/v1/levels/', {'user_id': user_id, 'pagination': 'cursor', 'limit': 1000, **week}),
+        ('downsample_all_500_points', 'get', '/api/v1/levels/', {'user_id': user_id, 'points': 500}),
+        ('stats_30_days', 'get', '/api/v1/levels/stats', {'user_id': user_id, **month}),
+        ('stats_all', 'get', '/api/v1/levels/stats', {'user_id': user_id}),
+        ('trend_daily_all', 'get', '/api/v1/levels/trend', {'user_id': user_id, 'resolution': 'day'}),
+        ('agp_14_days', 'get', '/api/v1/levels/agp', {'user_id': user_id}),
+    ]
+
+
+def run_scenario(client, method, path, params, repeats):
+    """
+    Sends the request of a scenario repeatedly.
+
+    Returns:
+        dict: The median and 95th percentile wall time in milliseconds, the number of queries of
+            the last request and the response size in bytes.
+    """
+    timings = []
+    # The first request is not timed; it warms up imports, compiled queries and the database page cache.
+    for repeat in ['warmup', *range(repeats)]:
+        if callable(params):
+            payload = params(repeat)
+            with measure() as stats:
+                response = client.post(path, payload, content_type='application/json')
+        else:
+            with measure() as stats:
+                response = getattr(client, method)(path, params)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method.upper()} {path} returned {response.status_code}: {response.content[:200]!r}')
+        if repeat != 'warmup':
+            timings.append(stats['seconds'] * 1000)
+    timings.sort()
+    return {
+        'median_ms': round(timings[len(timings) // 2], 3),
+        'p95_ms': round(timings[min(int(0.95 * len(timings)), len(timings) - 1)], 3),
+        'queries': stats['queries'],
+        'bytes': len(response.content),
+    }
+
+
+def git_revision():
+    """
+    Returns the commit of the working tree and whether it has uncommitted changes, or None outside git.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def run(users, days, seed, repeats, only=None):
+    import django
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from glucose.synthetic import DEFAULT_START
+
+    start = time.perf_counter()
+    call_command('generate_glucose_data', users=users, days=days, seed=seed, stdout=io.StringIO())
+    generate_seconds = time.perf_counter() - start
+
+    commit, dirty = git_revision()
+    results = {
+        'version': RESULTS_VERSION,
+        'commit': commit,
+        'dirty': dirty,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'parameters': {'users': users, 'days': days, 'seed': seed, 'repeats': repeats},
+        'generate_seconds': round(generate_seconds, 3),
+        'scenarios': {},
+    }
+    client = Client()
+    with no_response_cache():
+        for name, method, path, params in scenarios(users, days, DEFAULT_START):
+            if only and name not in only:
+                continue
+            results['scenarios'][name] = run_scenario(client, method, path, params, repeats)
+            print(f'{name:<30}{results["scenarios"][name]["median_ms"]:>10.2f} ms', file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the change of the median time and query count of every scenario against a baseline.
+
+    Query counts do not depend on the machine, so any increase is reported; times only when they
+    grow by more than the threshold.
+
+    Returns:
+        list: The names of the scenarios that got slower or issue more queries.
+    """
+    if baseline.get('parameters') != results['parameters']:
+        print(f'warning: parameters differ from the baseline {baseline.get("parameters")}')
+    print(f'{"scenario":<30}{"base ms":>10}{"ms":>10}{"change":>9}{"queries":>10}')
+    regressions = []
+    for name, result in results['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            print(f'{name:<30}{"-":>10}{result["median_ms"]:>10.2f}{"new":>9}{result["queries"]:>10}')
+            continue
+        change = result['median_ms'] / before['median_ms'] - 1 if before['median_ms'] else 0.0
+        queries = f'{before["queries"]}->{result["queries"]}' if result['queries'] != before['queries'] else str(result['queries'])
+        flag = ''
+        if change > threshold or result['queries'] > before['queries']:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<30}{before["median_ms"]:>10.2f}{result["median_ms"]:>10.2f}{change:>+9.1%}{queries:>10}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5, help='Number of synthetic users.')
+    parser.add_argument('--days', type=int, default=90, help='Number of days of history per user.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the data generator.')
+    parser.add_argument('--repeats', type=int, default=20, help='Number of requests per scenario.')
+    parser.add_argument('--scenario', dest='only', action='append', help='Only run this scenario. Can be repeated.')
+    parser.add_argument('--output', help='File to write the JSON results to. Printed if omitted.')
+    parser.add_argument('--compare', help='JSON results of a previous run to compare against.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown of the median reported as a regression.')
+    args = parser.parse_args()
+
+    setup_django()
+    with benchmark_database():
+        results = run(args.users, args.days, args.seed, args.repeats, args.only)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+            output.write('\n')
+    elif not args.compare:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline), args.threshold)
+        if regressions:
+            sys.exit(f'{len(regressions)} scenarios regressed by more than {args.threshold:.0%}: {", ".join(regressions)}')
+
+
+if __name__ == '__main__':
+    main()
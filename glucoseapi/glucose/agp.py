@@ -0,0 +1,95 @@
+import numpy as np
+from django.db.models import IntegerField
+from django.db.models.functions import Cast, ExtractHour, ExtractMinute, Substr
+from glucose.metrics import fetch_rows, glucose_value, timestamp_text
+from glucose.utils import is_utc
+
+# Percentiles of the Ambulatory Glucose Profile.
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Default width of a time-of-day bucket in minutes.
+BUCKET_MINUTES = 15
+
+# Default number of days covered by a profile when no start is given.
+AGP_DAYS = 14
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def minute_of_day(field, tzinfo=None):
+    """
+    Returns the expression of the minute of the day of a timestamp column in the given time zone.
+
+    In UTC the minute is read from the text form of the column, so no datetime object is built per
+    reading. Other time zones are converted by the database, including daylight saving time.
+
+    Args:
+        field (str): The name of the timestamp column.
+        tzinfo (tzinfo): The time zone of the time of day, UTC if None.
+
+    Returns:
+        Expression: The minute of the day, from 0 to 1439.
+    """
+    if not is_utc(tzinfo):
+        return ExtractHour(field, tzinfo=tzinfo) * 60 + ExtractMinute(field, tzinfo=tzinfo)
+    text = timestamp_text(field)
+    hour = Cast(Substr(text, 12, 2), IntegerField())
+    minute = Cast(Substr(text, 15, 2), IntegerField())
+    return hour * 60 + minute
+
+
+def compute_agp(levels, bucket_minutes=BUCKET_MINUTES, tzinfo=None):
+    """
+    Computes the Ambulatory Glucose Profile of the given glucose levels.
+
+    Readings are binned by the local time of day of their device timestamp and the PERCENTILES of every
+    bin are computed with NumPy in one pass over the sorted values, interpolating linearly between
+    the closest ranks like numpy.percentile. The (minute, glucose) pairs are fetched without per-row
+    converters and go straight into an array.
+
+    Args:
+        levels (QuerySet): The glucose levels to profile.
+        bucket_minutes (int): The width of a time-of-day bucket. Must divide a day.
+        tzinfo (tzinfo): The time zone of the time of day, UTC if None.
+
+    Returns:
+        dict: The number of readings, the start minute and the number of readings of every bucket, and
+            one list of values per percentile under 'p5', 'p25', ... Buckets without readings are None.
+    """
+    rows = (
+        levels.annotate(minute=minute_of_day('device_timestamp', tzinfo), glucose=glucose_value())
+        .filter(glucose__isnull=False)
+        .order_by()
+        .values_list('minute', 'glucose')
+    )
+    data = np.array(fetch_rows(rows), dtype=np.int64).reshape(-1, 2)
+    bins, values = data[:, 0] // bucket_minutes, data[:, 1]
+    order = np.lexsort((values, bins))
+    values = values[order].astype(np.float64)
+
+    bucket_count = MINUTES_PER_DAY // bucket_minutes
+    counts = np.bincount(bins, minlength=bucket_count)
+    offsets = np.cumsum(counts) - counts
+
+    # Fractional rank of every percentile within its bucket, as an index into the sorted values.
+    ranks = offsets[:, None] + np.array(PERCENTILES) / 100 * np.maximum(counts - 1, 0)[:, None]
+    lower = np.floor(ranks).astype(np.int64)
+    upper = np.ceil(ranks).astype(np.int64)
+    if len(values):
+        lower, upper = np.minimum(lower, len(values) - 1), np.minimum(upper, len(values) - 1)
+        percentiles = values[lower] + (values[upper] - values[lower]) * (ranks - lower)
+    else:
+        percentiles = np.zeros(ranks.shape)
+
+    profile = {
+        'count': len(values),
+        'minutes': list(range(0, MINUTES_PER_DAY, bucket_minutes)),
+        'counts': counts.tolist(),
+    }
+    empty = counts == 0
+    for column, percentile in enumerate(PERCENTILES):
+        profile[f'p{percentile}'] = [
+            None if is_empty else value
+            for is_empty, value in zip(empty.tolist(), np.round(percentiles[:, column], 1).tolist())
+        ]
+    return profile
@@ -0,0 +1,199 @@
+import math
+import orjson
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed
+from rest_framework.exceptions import APIException, NotFound, ParseError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+from glucose.pagination import KeysetPagination
+from glucose.renderers import JSONRenderer
+from glucose.serializers import GlucoseLevelMetadataSerializer, GlucoseLevelSerializer
+from glucose.views import (
+    get_downsampled_levels, get_level_filters, get_request_params, get_row_serializer, process_glucose_levels,
+)
+
+# Async versions of the read and create endpoints, for deployments behind an ASGI server. Database
+# reads use Django's async ORM; the upsert runs in a transaction and therefore in a worker thread.
+# Responses are rendered with the same JSON renderer as the DRF views.
+
+
+def csrf_exempt(view):
+    """
+    Exempts an async view from CSRF checks, like the DRF views are.
+
+    Django's csrf_exempt wraps views in a synchronous function before Django 5.0, so the view is
+    marked instead of wrapped.
+    """
+    view.csrf_exempt = True
+    return view
+
+
+def render(data, status=200):
+    """
+    Renders data as a JSON response like the DRF views do.
+    """
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+@csrf_exempt
+async def get_levels_by_user_id(request):
+    """
+    Retrieve glucose levels for a specific user based on user_id.
+
+    Accepts the same query parameters and returns the same pages as the synchronous endpoint,
+    numbered or, with pagination=cursor, keyed by (device_timestamp, id). With points=N the series
+    is downsampled like in the synchronous endpoint, in a worker thread since it is CPU-bound.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The HTTP response containing the serialized glucose levels.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        request = Request(request)
+        user_id, limit, sort_param = get_request_params(request)
+        if user_id is None:
+            return render({"error": "user_id parameter is required"}, status=400)
+        serializer = get_row_serializer(request)
+        if request.query_params.get('points') is not None:
+            count, rows = await sync_to_async(get_downsampled_rows)(request, user_id, serializer)
+            return render({"count": count, "results": serializer.serialize(rows)})
+        levels = GlucoseLevel.objects.filter(metadata__user_id=user_id, **get_level_filters(request))
+
+        if request.query_params.get('pagination') == 'cursor':
+            paginator = KeysetPagination(limit)
+            page_queryset = paginator.get_page_queryset(serializer.select(levels), request)
+            rows = paginator.set_page([row async for row in page_queryset])
+            data = {'next': paginator.get_next_link(), 'previous': paginator.get_previous_link()}
+        else:
+            if sort_param is not None:
+                levels = levels.order_by(sort_param)
+            rows, data = await paginate_by_page(serializer.select(levels), request, limit)
+
+        if not rows and not await GlucoseLevelMetadata.objects.filter(user_id=user_id).aexists():
+            raise NotFound('User is not found')
+        return render({**data, 'results': serializer.serialize(rows)})
+    except APIException as ex:
+        return render({"error": ex.detail}, status=ex.status_code)
+    except Exception as ex:
+        return render({"error": repr(ex)}, status=500)
+
+
+def get_downsampled_rows(request, user_id, row_serializer):
+    """
+    Returns the result of get_downsampled_levels with the selected rows loaded, so that they can be
+    serialized outside of the worker thread.
+    """
+    count, rows = get_downsampled_levels(request, user_id, row_serializer)
+    return count, list(rows)
+
+
+async def paginate_by_page(queryset, request, limit):
+    """
+    Returns a numbered page of the queryset, like PageNumberPagination but with the async ORM.
+
+    Args:
+        queryset (QuerySet): The rows to paginate.
+        request (Request): The request with the page query parameter.
+        limit (str): The page size, or None for the PAGE_SIZE setting. Like in KeysetPagination,
+            sizes above max_page_size are reduced to it.
+
+    Returns:
+        tuple: The rows of the page and a dictionary with the count and the next and previous links.
+
+    Raises:
+        ParseError: If the page size is not a positive integer.
+        NotFound: If the page does not exist.
+    """
+    if limit is None:
+        page_size = api_settings.PAGE_SIZE
+    else:
+        try:
+            page_size = int(limit)
+        except ValueError:
+            raise ParseError(f'Invalid limit parameter: {limit}')
+        if page_size < 1:
+            raise ParseError('limit must be a positive integer')
+        page_size = min(page_size, KeysetPagination.max_page_size)
+    count = await queryset.acount()
+    page_count = max(math.ceil(count / page_size), 1)
+    page = request.query_params.get('page', 1)
+    try:
+        page = page_count if page == 'last' else int(page)
+    except ValueError:
+        raise NotFound('Invalid page.')
+    if not 1 <= page <= page_count:
+        raise NotFound('Invalid page.')
+
+    offset = (page - 1) * page_size
+    rows = [row async for row in queryset[offset:offset + page_size]]
+    url = request.build_absolute_uri()
+    next_link = replace_query_param(url, 'page', page + 1) if page < page_count else None
+    if page == 1:
+        previous_link = None
+    elif page == 2:
+        previous_link = remove_query_param(url, 'page')
+    else:
+        previous_link = replace_query_param(url, 'page', page - 1)
+    return rows, {'count': count, 'next': next_link, 'previous': previous_link}
+
+
+@csrf_exempt
+async def get_level_by_id(request, id):
+    """
+    Retrieve a glucose level by its ID.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        id (int): The ID of the glucose level to retrieve.
+
+    Returns:
+        HttpResponse: The HTTP response containing the serialized glucose level data.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        level = await GlucoseLevel.objects.filter(id=id).afirst()
+        if level is None:
+            return render("Glucose level with given ID not found", status=404)
+        return render(GlucoseLevelSerializer(level).data)
+    except Exception as ex:
+        return render({"error": repr(ex)}, status=500)
+
+
+@csrf_exempt
+async def create_levels(request):
+    """
+    API endpoint for creating glucose levels.
+
+    The upload is received by the event loop; only the upsert occupies a worker thread. Rows that
+    cannot be parsed are rejected like in glucose.views.create_levels.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The HTTP response containing the serialized metadata and glucose levels and the rejected rows.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    try:
+        levels = orjson.loads(request.body)
+        if not levels:
+            return render("No object returned in body", status=400)
+        metadata_objects, glucose_level_objects, summary = await sync_to_async(process_glucose_levels)(levels)
+        if not glucose_level_objects:
+            return render({"rejected": summary.rejected, "errors": summary.errors}, status=400)
+        return render({
+            "metadata": GlucoseLevelMetadataSerializer(metadata_objects, many=True).data,
+            "glucose_levels": GlucoseLevelSerializer(glucose_level_objects, many=True).data,
+            "rejected": summary.rejected,
+            "errors": summary.errors,
+        })
+    except Exception as ex:
+        return render({"error": repr(ex)}, status=500)
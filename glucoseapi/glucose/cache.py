@@ -0,0 +1,212 @@
+import hashlib
+import threading
+import uuid
+from functools import wraps
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+KEY_PREFIX = 'glucose'
+
+
+class CacheCounters:
+    """
+    Thread-safe hit, miss and not-modified counters of the response cache of this process.
+
+    Requests answered with 304 Not Modified count as hits as well.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def record(self, hit, not_modified=False):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if not_modified:
+                self.not_modified += 1
+
+    def snapshot(self):
+        """
+        Returns the counters and the share of hits among all lookups.
+        """
+        with self.lock:
+            hits, misses, not_modified = self.hits, self.misses, self.not_modified
+        lookups = hits + misses
+        return {'hits': hits, 'misses': misses, 'not_modified': not_modified, 'hit_ratio': hits / lookups if lookups else None}
+
+
+counters = CacheCounters()
+
+
+def response_cache():
+    """
+    Returns the Django cache the responses are stored in, selected by the GLUCOSE_CACHE_ALIAS setting.
+    """
+    return caches[getattr(settings, 'GLUCOSE_CACHE_ALIAS', 'default')]
+
+
+def digest(value):
+    return hashlib.sha256(str(value).encode()).hexdigest()[:32]
+
+
+def version_key(user_id):
+    return f'{KEY_PREFIX}:version:{digest(user_id)}'
+
+
+def get_user_version(user_id):
+    """
+    Returns the current data version of a user.
+
+    Versions are random tokens, so a version that was evicted from the cache never comes back and
+    cannot revalidate responses cached before it was evicted.
+
+    Args:
+        user_id (str): The ID of the user.
+
+    Returns:
+        str: The version token.
+    """
+    cache = response_cache()
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_user_versions(user_ids):
+    """
+    Gives the users new data versions, which invalidates all their cached responses.
+
+    Args:
+        user_ids (iterable): The IDs of the users whose data changed.
+    """
+    versions = {version_key(user_id): uuid.uuid4().hex for user_id in set(user_ids)}
+    if versions:
+        response_cache().set_many(versions, timeout=None)
+
+
+def invalidate_users_on_commit(user_ids):
+    """
+    Bumps the data versions of the users once the current transaction commits.
+
+    Bumping after the commit makes sure no request caches the old data under the new version.
+
+    Args:
+        user_ids (iterable): The IDs of the users whose data changes.
+    """
+    user_ids = set(user_ids)
+    transaction.on_commit(lambda: bump_user_versions(user_ids))
+
+
+def response_key(request, user_id, version):
+    """
+    Returns the cache key of a response for the user's data version and the request's URL and query parameters.
+    """
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f'{request.build_absolute_uri(request.path)}?{params}'
+    return f'{KEY_PREFIX}:response:{digest(user_id)}:{version}:{digest(url)}'
+
+
+def make_etag(request, *parts):
+    """
+    Returns a strong ETag for the given parts and the media type negotiated for the request.
+    """
+    return quote_etag(digest(':'.join(map(str, (*parts, request.accepted_media_type)))))
+
+
+def etag_matches(request, etag):
+    """
+    Returns whether the If-None-Match header of the request matches the ETag.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in etags or etag in (tag.removeprefix('W/') for tag in etags)
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+def cached_user_response(view):
+    """
+    Caches the successful responses of a read view that takes a user_id query parameter.
+
+    Responses are stored per data version of the user and per URL including all query parameters,
+    so every write of the user invalidates them without deleting keys. Responses carry an ETag
+    derived from the same key, and a matching If-None-Match header is answered with 304 Not
+    Modified before the view or the cache lookup runs.
+
+    Args:
+        view (function): The view. Applied below @api_view, so it receives a DRF request.
+
+    Returns:
+        function: The caching view.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        user_id = request.query_params.get('user_id')
+        if user_id is None:
+            return view(request, *args, **kwargs)
+
+        cache = response_cache()
+        key = response_key(request, user_id, get_user_version(user_id))
+        etag = make_etag(request, key)
+        if etag_matches(request, etag):
+            counters.record(hit=True, not_modified=True)
+            return not_modified(etag)
+
+        data = cache.get(key)
+        counters.record(hit=data is not None)
+        if data is not None:
+            return Response(data, headers={'ETag': etag})
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, getattr(settings, 'GLUCOSE_CACHE_TIMEOUT', 300))
+            response['ETag'] = etag
+        return response
+    return wrapper
+
+
+def get_cached_level(id):
+    """
+    Returns the cached glucose level if its user's data did not change since it was cached.
+
+    Args:
+        id (int): The ID of the glucose level.
+
+    Returns:
+        tuple: The user ID, the user's data version and the serialized glucose level, or None.
+    """
+    entry = response_cache().get(f'{KEY_PREFIX}:level:{id}')
+    if entry is not None and entry[1] != get_user_version(entry[0]):
+        entry = None
+    return entry
+
+
+def cache_level(id, user_id, version, data):
+    """
+    Caches the data of a glucose level together with the data version of its user.
+
+    Args:
+        id (int): The ID of the glucose level.
+        user_id (str): The ID of the user the level belongs to.
+        version (str): The data version of the user, read before the level was loaded.
+        data (dict): The serialized glucose level.
+    """
+    response_cache().set(f'{KEY_PREFIX}:level:{id}', (user_id, version, data), getattr(settings, 'GLUCOSE_CACHE_TIMEOUT', 300))
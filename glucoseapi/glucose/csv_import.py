@@ -0,0 +1,120 @@
+import csv
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List
+from django.db import transaction
+from glucose.dtos import GlucoseLevelDTO
+from glucose.ingestion import BATCH_SIZE, GlucoseLevelParser, IngestionSummary, upsert_glucose_levels
+from glucose.models import GlucoseLevel
+from glucose.utils import get_field_from_verbose
+
+# Format of the export date in the first row of a LibreView export.
+EXPORT_DATE_FORMAT = "%d-%m-%Y %H:%M UTC"
+
+
+@dataclass
+class ParsedExport:
+    """
+    A LibreView CSV export parsed into glucose levels.
+
+    Attributes:
+        path (str): The path of the export.
+        user_id (str): The ID of the user, taken from the file name.
+        levels (list): The GlucoseLevelDTO of every valid data row.
+        summary (IngestionSummary): The rows rejected while parsing.
+    """
+    path: str
+    user_id: str
+    levels: List[GlucoseLevelDTO] = field(default_factory=list)
+    summary: IngestionSummary = field(default_factory=IngestionSummary)
+
+
+def find_exports(paths):
+    """
+    Expands files and directories into the CSV exports to import.
+
+    Args:
+        paths (list): Paths of CSV files or of directories searched recursively for *.csv files.
+
+    Returns:
+        list: The paths of the CSV files, sorted and without duplicates.
+
+    Raises:
+        FileNotFoundError: If a path does not exist.
+    """
+    exports = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            exports.update(str(file) for file in path.rglob('*.csv') if file.is_file())
+        elif path.is_file():
+            exports.add(str(path))
+        else:
+            raise FileNotFoundError(str(path))
+    return sorted(exports)
+
+
+def parse_export(path):
+    """
+    Parses a LibreView CSV export.
+
+    The first row holds the export metadata, followed by the header row, optionally after an
+    empty row. Headers are mapped to GlucoseLevel fields once per file. Rows that cannot be
+    parsed are counted and reported with their line number. No database access happens here,
+    so exports can be parsed in worker processes.
+
+    Args:
+        path (str): The path of the export. Its file name without extension is the user ID.
+
+    Returns:
+        ParsedExport: The parsed glucose levels.
+
+    Raises:
+        ValueError: If the metadata row is invalid.
+        KeyError: If a header does not match a GlucoseLevel field.
+    """
+    user_id = Path(path).stem
+    parsed = ParsedExport(path=str(path), user_id=user_id)
+    parser = GlucoseLevelParser()
+    with open(path, newline='', encoding='utf-8-sig') as csvfile:
+        reader = csv.reader(csvfile, delimiter=',')
+        metadata_row = next(reader)
+        created_at = datetime.strptime(metadata_row[2], EXPORT_DATE_FORMAT).replace(tzinfo=timezone.utc)
+        created_by = metadata_row[4]
+
+        header_row = next(reader)
+        if not any(header_row):
+            header_row = next(reader)
+        field_names = [get_field_from_verbose(GlucoseLevel._meta, header) for header in header_row]
+
+        for row in reader:
+            if not any(row):
+                continue
+            data = dict(zip(field_names, row))
+            data.update(user_id=user_id, created_at=created_at, created_by=created_by)
+            try:
+                parsed.levels.append(parser.parse(data))
+            except Exception as ex:
+                parsed.summary.reject(reader.line_num, ex)
+    return parsed
+
+
+def import_export(parsed, batch_size=BATCH_SIZE):
+    """
+    Writes a parsed export to the database in a single transaction.
+
+    The levels are upserted in batches, so importing an export again updates its readings instead
+    of duplicating them.
+
+    Args:
+        parsed (ParsedExport): The parsed export.
+        batch_size (int): The number of rows written per batch.
+
+    Returns:
+        IngestionSummary: The number of inserted, updated and rejected rows of the export.
+    """
+    summary = parsed.summary
+    with transaction.atomic():
+        for start in range(0, len(parsed.levels), batch_size):
+            summary.add(upsert_glucose_levels(parsed.levels[start:start + batch_size], return_objects=False))
+    return summary
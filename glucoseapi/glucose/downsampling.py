@@ -0,0 +1,73 @@
+import numpy as np
+from glucose.metrics import fetch_rows, glucose_value, timestamp_text
+
+# Largest number of points a downsampled series may be asked for.
+MAX_POINTS = 5000
+
+
+def largest_triangle_three_buckets(x, y, points):
+    """
+    Selects the points of a series that preserve its visual shape best.
+
+    Implements Largest-Triangle-Three-Buckets (Steinarsson, 2013): the first and last points are
+    kept and every bucket in between contributes the point forming the largest triangle with the
+    previously selected point and the average of the next bucket. Peaks and troughs survive.
+
+    Args:
+        x (numpy.ndarray): The x values, ascending.
+        y (numpy.ndarray): The y values.
+        points (int): The number of points to select.
+
+    Returns:
+        list: The indices of the selected points, ascending.
+    """
+    count = len(x)
+    if points >= count or points < 3:
+        return list(range(count))
+
+    every = (count - 2) / (points - 2)
+    selected = [0]
+    previous = 0
+    for bucket in range(points - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected.append(previous)
+    selected.append(count - 1)
+    return selected
+
+
+def downsample_levels(levels, points):
+    """
+    Returns the ids of the glucose levels that best represent the time series of the given levels.
+
+    Only the id, timestamp and glucose value of readings that have a glucose value are fetched, in
+    device time order, and reduced with largest_triangle_three_buckets.
+
+    Args:
+        levels (QuerySet): The glucose levels to downsample.
+        points (int): The number of readings to select.
+
+    Returns:
+        tuple: The ids of the selected readings in time order and the number of readings in the series.
+    """
+    rows = fetch_rows(
+        levels.annotate(timestamp=timestamp_text('device_timestamp'), glucose=glucose_value())
+        .filter(glucose__isnull=False)
+        .order_by('device_timestamp', 'id')
+        .values_list('id', 'timestamp', 'glucose')
+    )
+    if not rows:
+        return [], 0
+    ids, timestamps, values = zip(*rows)
+    x = np.array(timestamps, dtype='datetime64[s]').astype(np.int64)
+    x = (x - x[0]).astype(np.float64)
+    y = np.array(values, dtype=np.float64)
+    return [ids[index] for index in largest_triangle_three_buckets(x, y, points)], len(rows)
@@ -1,10 +1,16 @@
 from dataclasses import dataclass
+from decimal import Decimal
 from typing import Optional
 from datetime import datetime
+from glucose.utils import parse_decimal, parse_glucose, parse_timestamp
 
-@dataclass
+@dataclass(slots=True)
 class GlucoseLevelDTO:
-    """Data Transfer Object for Glucose Level. Generated with ChatGPT 4o."""
+    """Data Transfer Object for Glucose Level. Generated with ChatGPT 4o.
+
+    Instances use __slots__, which keeps large uploads compact in memory. Uploads are parsed into
+    DTOs with glucose.ingestion.GlucoseLevelParser.
+    """
 
     # GlucoseLevelMetadata fields
     user_id: str
@@ -14,23 +20,23 @@ class GlucoseLevelDTO:
     # GlucoseLevel fields
     device: str
     serial_number: str
-    device_timestamp: str
+    device_timestamp: datetime
     recording_type: str
-    glucose_value_trend: Optional[str] = None
-    glucose_scan: Optional[str] = None
+    glucose_value_trend: Optional[int] = None
+    glucose_scan: Optional[int] = None
     non_numerical_rapid_acting_insulin: Optional[str] = None
-    rapid_acting_insulin: Optional[str] = None
+    rapid_acting_insulin: Optional[Decimal] = None
     non_numerical_nutritional_data: Optional[str] = None
-    carbohydrates_grams: Optional[str] = None
-    carbohydrates_portions: Optional[str] = None
+    carbohydrates_grams: Optional[Decimal] = None
+    carbohydrates_portions: Optional[Decimal] = None
     non_numerical_depot_insulin: Optional[str] = None
-    depot_insulin: Optional[str] = None
+    depot_insulin: Optional[Decimal] = None
     notes: Optional[str] = None
-    glucose_test_strips: Optional[str] = None
-    ketone: Optional[str] = None
-    mealtime_insulin: Optional[str] = None
-    correction_insulin: Optional[str] = None
-    insulin_change_by_user: Optional[str] = None
+    glucose_test_strips: Optional[int] = None
+    ketone: Optional[Decimal] = None
+    mealtime_insulin: Optional[Decimal] = None
+    correction_insulin: Optional[Decimal] = None
+    insulin_change_by_user: Optional[Decimal] = None
 
     def __init__(self, user_id, created_at, created_by, device, serial_number, device_timestamp, 
                  recording_type, glucose_value_trend, glucose_scan, non_numerical_rapid_acting_insulin, 
@@ -62,27 +68,33 @@ class GlucoseLevelDTO:
 
     @classmethod
     def from_dict(cls, data):
+        """
+        Create a DTO from a glucose level dictionary, converting timestamps and measurements to their column types.
+
+        Raises:
+            ValueError: If a timestamp or measurement cannot be converted.
+        """
         return cls(
             user_id = data.get('user_id'),
-            created_at = datetime.fromisoformat(data.get('created_at')),
+            created_at = parse_timestamp(data.get('created_at')),
             created_by = data.get('created_by'),
             device = data.get('device'),
             serial_number = data.get('serial_number'),
-            device_timestamp = datetime.fromisoformat(data.get('device_timestamp')),
+            device_timestamp = parse_timestamp(data.get('device_timestamp')),
             recording_type = data.get('recording_type'),
-            glucose_value_trend = data.get('glucose_value_trend'),
-            glucose_scan = data.get('glucose_scan'),
+            glucose_value_trend = parse_glucose(data.get('glucose_value_trend')),
+            glucose_scan = parse_glucose(data.get('glucose_scan')),
             non_numerical_rapid_acting_insulin = data.get('non_numerical_rapid_acting_insulin'),
-            rapid_acting_insulin = data.get('rapid_acting_insulin'),
+            rapid_acting_insulin = parse_decimal(data.get('rapid_acting_insulin')),
             non_numerical_nutritional_data = data.get('non_numerical_nutritional_data'),
-            carbohydrates_grams = data.get('carbohydrates_grams'),
-            carbohydrates_portions = data.get('carbohydrates_portions'),
+            carbohydrates_grams = parse_decimal(data.get('carbohydrates_grams')),
+            carbohydrates_portions = parse_decimal(data.get('carbohydrates_portions')),
             non_numerical_depot_insulin = data.get('non_numerical_depot_insulin'),
-            depot_insulin = data.get('depot_insulin'),
+            depot_insulin = parse_decimal(data.get('depot_insulin')),
             notes = data.get('notes'),
-            glucose_test_strips = data.get('glucose_test_strips'),
-            ketone = data.get('ketone'),
-            mealtime_insulin = data.get('mealtime_insulin'),
-            correction_insulin = data.get('correction_insulin'),
-            insulin_change_by_user = data.get('insulin_change_by_user')
+            glucose_test_strips = parse_glucose(data.get('glucose_test_strips')),
+            ketone = parse_decimal(data.get('ketone')),
+            mealtime_insulin = parse_decimal(data.get('mealtime_insulin')),
+            correction_insulin = parse_decimal(data.get('correction_insulin')),
+            insulin_change_by_user = parse_decimal(data.get('insulin_change_by_user'))
         )
@@ -0,0 +1,115 @@
+from itertools import islice
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.db import models
+from glucose.models import GlucoseLevel
+
+# Number of rows read from the database and written per record batch.
+CHUNK_SIZE = 10000
+
+# Supported export formats with their content type and file extension.
+FORMATS = {
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def arrow_type(field):
+    """
+    Returns the Arrow type of a GlucoseLevel column.
+
+    Args:
+        field (django.db.models.Field): The model field.
+
+    Returns:
+        pyarrow.DataType: The matching Arrow type.
+    """
+    if isinstance(field, (models.BigAutoField, models.ForeignKey)):
+        return pa.int64()
+    if isinstance(field, models.IntegerField):
+        return pa.int32()
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    return pa.string()
+
+
+COLUMNS = [field.attname for field in GlucoseLevel._meta.concrete_fields]
+SCHEMA = pa.schema([
+    pa.field(field.attname, arrow_type(field), nullable=field.null)
+    for field in GlucoseLevel._meta.concrete_fields
+])
+
+
+class ChunkSink:
+    """
+    Write-only file object collecting the bytes written by an Arrow writer until they are drained.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_levels(queryset, export_format):
+    """
+    Streams the glucose levels of a queryset as Arrow IPC or Parquet.
+
+    The queryset is read with a database iterator in chunks of CHUNK_SIZE rows and every chunk is
+    written as one record batch (one row group for Parquet), so memory use does not depend on the
+    number of rows. Values are converted column by column into typed Arrow arrays.
+
+    Args:
+        queryset (QuerySet): The glucose levels to export.
+        export_format (str): 'arrow' for the Arrow IPC stream format or 'parquet'.
+
+    Yields:
+        bytes: Consecutive parts of the encoded file.
+    """
+    sink = ChunkSink()
+    if export_format == 'parquet':
+        writer = pq.ParquetWriter(sink, SCHEMA)
+    else:
+        writer = pa.ipc.new_stream(sink, SCHEMA)
+
+    rows = queryset.order_by('device_timestamp', 'id').values_list(*COLUMNS).iterator(chunk_size=CHUNK_SIZE)
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        columns = zip(*chunk)
+        writer.write_batch(pa.record_batch(
+            [pa.array(values, type=field.type) for values, field in zip(columns, SCHEMA)],
+            schema=SCHEMA,
+        ))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
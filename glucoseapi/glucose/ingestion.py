@@ -0,0 +1,395 @@
+from dataclasses import dataclass, field, fields
+from typing import List
+import orjson
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
+from glucose.cache import invalidate_users_on_commit
+from glucose.dtos import GlucoseLevelDTO
+from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+from glucose.rollups import refresh_rollups
+from glucose.utils import parse_decimal, parse_glucose, parse_timestamp
+
+# Fields identifying a single reading. Backed by the unique constraint on GlucoseLevel.
+NATURAL_KEY = ('metadata', 'device', 'serial_number', 'device_timestamp')
+
+# Fields overwritten when a reading with the same natural key already exists.
+UPDATE_FIELDS = [
+    f.name for f in GlucoseLevel._meta.concrete_fields
+    if not f.primary_key and f.name not in NATURAL_KEY
+]
+
+# Fields copied from a GlucoseLevelDTO onto a GlucoseLevel instance.
+LEVEL_FIELDS = [name for name in NATURAL_KEY if name != 'metadata'] + UPDATE_FIELDS
+
+# Number of rows sent to the database per statement.
+BATCH_SIZE = 500
+
+# Fields that must be present in every ingested row.
+REQUIRED_FIELDS = ('user_id', 'created_at', 'created_by', 'device', 'serial_number', 'device_timestamp', 'recording_type')
+
+# Maximum number of row-level errors reported back by a streaming ingestion.
+MAX_REPORTED_ERRORS = 100
+
+# Fields whose values are unique per row, so caching their conversion would only cost memory.
+UNCACHED_FIELDS = ('device_timestamp',)
+
+# Number of distinct values cached per field by a GlucoseLevelParser before its cache is cleared.
+MAX_CACHED_VALUES = 4096
+
+
+@dataclass
+class UpsertResult:
+    """
+    Result of a bulk upsert of glucose levels.
+
+    Attributes:
+        metadata_objects (list): The metadata object of each input row, in input order.
+        glucose_level_objects (list): The glucose level object of each input row, in input order.
+        inserted (int): The number of readings that did not exist before the upsert.
+        updated (int): The number of existing readings that were overwritten.
+    """
+    metadata_objects: List[GlucoseLevelMetadata] = field(default_factory=list)
+    glucose_level_objects: List[GlucoseLevel] = field(default_factory=list)
+    inserted: int = 0
+    updated: int = 0
+
+
+@dataclass
+class IngestionSummary:
+    """
+    Summary of a streaming ingestion.
+
+    Attributes:
+        inserted (int): The number of readings that were inserted.
+        updated (int): The number of existing readings that were overwritten.
+        rejected (int): The number of rows that could not be parsed.
+        errors (list): Row-level errors, capped at MAX_REPORTED_ERRORS.
+    """
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[dict] = field(default_factory=list)
+
+    def add(self, result):
+        self.inserted += result.inserted
+        self.updated += result.updated
+
+    def reject(self, line, error):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': repr(error)})
+
+
+class GlucoseLevelParser:
+    """
+    Converts glucose level dictionaries into GlucoseLevelDTO objects.
+
+    The conversion of every field is derived once from its model field. Uploads repeat the same
+    user IDs, devices, serial numbers, export dates and measurements on most rows, so converted
+    values are cached per field and parsed only once; repeated strings also share a single object.
+    Use one parser per upload, file or job, since the caches live as long as the parser.
+    """
+
+    def __init__(self):
+        names = [dto_field.name for dto_field in fields(GlucoseLevelDTO)]
+        self.empty = dict.fromkeys(names)
+        self.converters = {
+            name: (get_converter(name), None if name in UNCACHED_FIELDS else {})
+            for name in names
+        }
+
+    def parse(self, data):
+        """
+        Converts a single glucose level dictionary.
+
+        Args:
+            data (dict): The glucose level dictionary.
+
+        Returns:
+            GlucoseLevelDTO: The parsed glucose level.
+
+        Raises:
+            ValueError: If the row is not an object, a required field is missing or empty, or a
+                value cannot be converted.
+        """
+        if not isinstance(data, dict):
+            raise ValueError('Row is not a JSON object')
+        values = self.empty.copy()
+        # Rows only carry a few of the fields, so only the present keys are visited.
+        for name, value in data.items():
+            converter = self.converters.get(name)
+            if converter is None or value is None:
+                continue
+            convert, cache = converter
+            if cache is None:
+                values[name] = convert(value)
+                continue
+            # Keys include the type, since 1, 1.0 and True are equal but not converted alike.
+            key = value if type(value) is str else (type(value), value)
+            try:
+                values[name] = cache[key]
+            except KeyError:
+                if len(cache) >= MAX_CACHED_VALUES:
+                    cache.clear()
+                values[name] = cache[key] = convert(value)
+            except TypeError:
+                # Lists and objects cannot be cached; they fail the conversion of non-text fields.
+                values[name] = convert(value)
+        missing = [name for name in REQUIRED_FIELDS if values[name] is None or values[name] == '']
+        if missing:
+            raise ValueError(f'Missing required fields: {", ".join(missing)}')
+        return GlucoseLevelDTO(**values)
+
+    def parse_all(self, rows, summary, start=1):
+        """
+        Converts a list of glucose level dictionaries, rejecting invalid rows instead of failing the whole list.
+
+        Args:
+            rows (iterable): The glucose level dictionaries.
+            summary (IngestionSummary): Receives the errors of the rejected rows.
+            start (int): The position reported for the first row.
+
+        Returns:
+            list: The GlucoseLevelDTO of every valid row, in input order.
+        """
+        dtos = []
+        for number, data in enumerate(rows, start=start):
+            try:
+                dtos.append(self.parse(data))
+            except Exception as ex:
+                summary.reject(number, ex)
+        return dtos
+
+
+def get_converter(name):
+    """
+    Returns the function converting a raw value of a GlucoseLevelDTO field to its column type.
+
+    Args:
+        name (str): The name of the field on GlucoseLevel or GlucoseLevelMetadata.
+
+    Returns:
+        callable: The conversion; text fields are kept as they are.
+    """
+    try:
+        model_field = GlucoseLevel._meta.get_field(name)
+    except FieldDoesNotExist:
+        model_field = GlucoseLevelMetadata._meta.get_field(name)
+    if isinstance(model_field, models.DateTimeField):
+        return parse_timestamp
+    if isinstance(model_field, models.DecimalField):
+        return lambda value: parse_decimal(value, model_field.max_digits, model_field.decimal_places)
+    if isinstance(model_field, models.IntegerField):
+        return parse_glucose
+    return lambda value: value
+
+
+def ingest_ndjson(stream, batch_size=BATCH_SIZE):
+    """
+    Parses newline-delimited JSON glucose levels from a stream and upserts them in fixed-size batches.
+
+    Only one batch is held in memory at a time, and every batch is committed in its own transaction.
+    Rows that cannot be parsed are counted and reported instead of aborting the ingestion.
+
+    Args:
+        stream (iterable): An iterable of lines (bytes or str), e.g. a file or an HttpRequest.
+        batch_size (int): The number of rows written per batch.
+
+    Returns:
+        IngestionSummary: The number of inserted, updated and rejected rows.
+    """
+    summary = IngestionSummary()
+    parser = GlucoseLevelParser()
+    batch = []
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            batch.append(parser.parse(orjson.loads(line)))
+        except Exception as ex:
+            summary.reject(line_number, ex)
+            continue
+        if len(batch) >= batch_size:
+            summary.add(upsert_glucose_levels(batch, return_objects=False))
+            batch = []
+    if batch:
+        summary.add(upsert_glucose_levels(batch, return_objects=False))
+    return summary
+
+
+def parse_level(data):
+    """
+    Converts a single glucose level dictionary into a GlucoseLevelDTO.
+
+    Rows of the same upload are converted faster with a shared GlucoseLevelParser.
+
+    Args:
+        data (dict): The glucose level dictionary.
+
+    Returns:
+        GlucoseLevelDTO: The parsed glucose level.
+
+    Raises:
+        ValueError: If the row is not an object, a required field is missing or a value cannot be converted.
+    """
+    return GlucoseLevelParser().parse(data)
+
+
+def upsert_glucose_levels(dtos, return_objects=True):
+    """
+    Creates or updates the metadata and glucose levels of the given DTOs with a fixed number of queries.
+
+    All metadata records are resolved with a single query, missing ones are bulk created and existing
+    ones bulk updated. Glucose levels are written with INSERT ... ON CONFLICT DO UPDATE on their
+    natural key. The hourly and daily rollups of the touched buckets are refreshed afterwards.
+    Everything runs in one transaction, after which the cached responses of the users are invalidated.
+
+    Args:
+        dtos (list): A list of GlucoseLevelDTO objects.
+        return_objects (bool): Whether the primary keys of the written glucose levels should be
+            fetched and the per-row objects returned.
+
+    Returns:
+        UpsertResult: The written objects and the number of inserted and updated readings.
+    """
+    result = UpsertResult()
+    if not dtos:
+        return result
+
+    with transaction.atomic():
+        metadata_by_user = resolve_metadata(dtos)
+
+        levels = []
+        readings = set()
+        for dto in dtos:
+            metadata = metadata_by_user[_prep('user_id', dto.user_id, GlucoseLevelMetadata)]
+            level = GlucoseLevel(metadata=metadata, **{name: getattr(dto, name) for name in LEVEL_FIELDS})
+            levels.append(level)
+            readings.add((metadata.user_id, level.device_timestamp))
+            if return_objects:
+                # Each row keeps its own values in the response, like the former per-row update_or_create.
+                row_metadata = GlucoseLevelMetadata(
+                    id=metadata.id,
+                    user_id=dto.user_id,
+                    created_at=dto.created_at,
+                    created_by=dto.created_by,
+                )
+                level.metadata = row_metadata
+                result.metadata_objects.append(row_metadata)
+                result.glucose_level_objects.append(level)
+
+        # The last row wins when a payload contains the same reading twice.
+        levels_by_key = {natural_key(level): level for level in levels}
+        existing_ids = fetch_level_ids(levels_by_key.keys())
+        result.updated = len(existing_ids)
+        result.inserted = len(levels_by_key) - result.updated
+
+        GlucoseLevel.objects.bulk_create(
+            levels_by_key.values(),
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=NATURAL_KEY,
+            update_fields=UPDATE_FIELDS,
+        )
+        refresh_rollups(readings)
+        invalidate_users_on_commit(user_id for user_id, _ in readings)
+
+        if return_objects:
+            new_keys = [key for key in levels_by_key if key not in existing_ids]
+            ids = {**existing_ids, **fetch_level_ids(new_keys)}
+            for level in levels:
+                level.id = ids[natural_key(level)]
+
+    return result
+
+
+def resolve_metadata(dtos):
+    """
+    Creates or updates the metadata of every user referenced by the given DTOs.
+
+    Args:
+        dtos (list): A list of GlucoseLevelDTO objects.
+
+    Returns:
+        dict: A mapping of the prepared user_id to the saved GlucoseLevelMetadata object.
+            The values of the last DTO of each user are stored.
+    """
+    latest = {_prep('user_id', dto.user_id, GlucoseLevelMetadata): dto for dto in dtos}
+
+    metadata_by_user = {}
+    for metadata in GlucoseLevelMetadata.objects.filter(user_id__in=latest.keys()).order_by('id'):
+        metadata_by_user.setdefault(metadata.user_id, metadata)
+
+    for user_id, dto in latest.items():
+        metadata = metadata_by_user.setdefault(user_id, GlucoseLevelMetadata(user_id=user_id))
+        metadata.created_at = dto.created_at
+        metadata.created_by = dto.created_by
+
+    existing = [metadata for metadata in metadata_by_user.values() if metadata.pk is not None]
+    missing = [metadata for metadata in metadata_by_user.values() if metadata.pk is None]
+    if existing:
+        GlucoseLevelMetadata.objects.bulk_update(existing, ['created_at', 'created_by'], batch_size=BATCH_SIZE)
+    if missing:
+        GlucoseLevelMetadata.objects.bulk_create(missing, batch_size=BATCH_SIZE)
+        # Backends that cannot return primary keys from a bulk insert need another lookup.
+        if any(metadata.pk is None for metadata in missing):
+            ids = dict(
+                GlucoseLevelMetadata.objects
+                .filter(user_id__in=[metadata.user_id for metadata in missing])
+                .order_by('-id')
+                .values_list('user_id', 'id')
+            )
+            for metadata in missing:
+                metadata.id = ids[metadata.user_id]
+    return metadata_by_user
+
+
+def fetch_level_ids(keys):
+    """
+    Looks up the primary keys of the glucose levels with the given natural keys.
+
+    Args:
+        keys (iterable): Natural keys as returned by natural_key().
+
+    Returns:
+        dict: A mapping of natural key to primary key for the readings that exist.
+    """
+    keys = list(keys)
+    ids = {}
+    for start in range(0, len(keys), BATCH_SIZE):
+        chunk = keys[start:start + BATCH_SIZE]
+        wanted = set(chunk)
+        rows = GlucoseLevel.objects.filter(
+            metadata_id__in={key[0] for key in chunk},
+            device_timestamp__in={key[3] for key in chunk},
+        ).values_list('id', 'metadata_id', 'device', 'serial_number', 'device_timestamp')
+        for pk, *values in rows:
+            key = _key_from_values(values)
+            if key in wanted:
+                ids[key] = pk
+    return ids
+
+
+def natural_key(level):
+    """
+    Returns the natural key of a glucose level in its database representation.
+
+    Args:
+        level (GlucoseLevel): The glucose level.
+
+    Returns:
+        tuple: The (metadata_id, device, serial_number, device_timestamp) values.
+    """
+    return _key_from_values([
+        level.metadata_id, level.device, level.serial_number, level.device_timestamp,
+    ])
+
+
+def _key_from_values(values):
+    return tuple(
+        _prep(name, value, GlucoseLevel) for name, value in zip(NATURAL_KEY, values)
+    )
+
+
+def _prep(name, value, model):
+    return model._meta.get_field(name).get_prep_value(value)
@@ -0,0 +1,200 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from glucose.cache import counters
+
+logger = logging.getLogger('glucose.slow_requests')
+
+# Content type of the Prometheus text exposition format.
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds of the histogram buckets.
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Number of statements of a request kept for the slow request log.
+MAX_LOGGED_QUERIES = 100
+
+# Number of characters of the parameters of a statement in the slow request log.
+MAX_LOGGED_PARAMS = 500
+
+
+class RequestMetrics:
+    """
+    Wall time, database queries and serialization time of a single request.
+
+    Attributes:
+        seconds (float): The wall time of the request.
+        queries (int): The number of executed database queries.
+        db_seconds (float): The time spent executing database queries.
+        serializer_seconds (float): The time spent serializing and rendering the response data.
+        statements (list): The SQL, parameters and duration of the first MAX_LOGGED_QUERIES queries.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.statements = []
+        self.serializing = False
+
+    def record_query(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper timing every query, see django.db.backends.base.base.BaseDatabaseWrapper.execute_wrapper.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_seconds += duration
+            if len(self.statements) < MAX_LOGGED_QUERIES:
+                self.statements.append((sql, params, duration))
+
+
+current_metrics = ContextVar('glucose_request_metrics', default=None)
+
+
+@contextmanager
+def timed_serialization():
+    """
+    Adds the time spent inside the context to the serializer time of the current request.
+
+    Nested contexts are only counted once, so serializers can be timed at every level.
+    """
+    metrics = current_metrics.get()
+    if metrics is None or metrics.serializing:
+        yield
+        return
+    metrics.serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_seconds += time.perf_counter() - start
+        metrics.serializing = False
+
+
+def times_serialization(function):
+    """
+    Decorator counting the time spent in the function as serializer time of the current request.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        with timed_serialization():
+            return function(*args, **kwargs)
+    return wrapper
+
+
+class Histogram:
+    """
+    A Prometheus histogram with one series per combination of label values.
+    """
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        """
+        Records a value. Not thread-safe; the registry serializes access.
+        """
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, label_names):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            label_text = ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """
+    Thread-safe per-route request histograms of this process.
+    """
+    label_names = ('route', 'method')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.seconds = Histogram('glucose_request_duration_seconds', 'Wall time of requests.', SECONDS_BUCKETS)
+            self.queries = Histogram('glucose_request_db_queries', 'Database queries per request.', QUERY_BUCKETS)
+            self.db_seconds = Histogram('glucose_request_db_duration_seconds', 'Time spent in database queries per request.', SECONDS_BUCKETS)
+            self.serializer_seconds = Histogram('glucose_request_serializer_duration_seconds', 'Time spent serializing and rendering per request.', SECONDS_BUCKETS)
+            self.response_bytes = Histogram('glucose_response_bytes', 'Size of response bodies; streamed responses are not counted.', BYTES_BUCKETS)
+
+    def record(self, route, method, metrics, response_bytes=None):
+        """
+        Records the metrics of a finished request.
+
+        Args:
+            route (str): The URL pattern the request matched.
+            method (str): The HTTP method.
+            metrics (RequestMetrics): The metrics of the request.
+            response_bytes (int): The size of the response body, or None if it is streamed.
+        """
+        labels = (route, method)
+        with self.lock:
+            self.seconds.observe(labels, metrics.seconds)
+            self.queries.observe(labels, metrics.queries)
+            self.db_seconds.observe(labels, metrics.db_seconds)
+            self.serializer_seconds.observe(labels, metrics.serializer_seconds)
+            if response_bytes is not None:
+                self.response_bytes.observe(labels, response_bytes)
+
+    def render(self):
+        """
+        Returns the histograms and the response cache counters in Prometheus text format.
+        """
+        lines = []
+        with self.lock:
+            for histogram in (self.seconds, self.queries, self.db_seconds, self.serializer_seconds, self.response_bytes):
+                lines += histogram.render(self.label_names)
+        cache = counters.snapshot()
+        for name, description in (('hits', 'Response cache hits.'), ('misses', 'Response cache misses.'), ('not_modified', 'Requests answered with 304 Not Modified.')):
+            lines += [f'# HELP glucose_cache_{name}_total {description}', f'# TYPE glucose_cache_{name}_total counter', f'glucose_cache_{name}_total {cache[name]}']
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def log_slow_request(request, route, metrics):
+    """
+    Logs a slow request with its timings and SQL statements as a warning.
+    """
+    statements = '\n'.join(f'  {duration * 1000:.1f} ms: {sql} {repr(params)[:MAX_LOGGED_PARAMS]}' for sql, params, duration in metrics.statements)
+    omitted = metrics.queries - len(metrics.statements)
+    logger.warning(
+        'Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms, serializer %.1f ms\n%s%s',
+        request.method, request.get_full_path(), route, metrics.seconds * 1000, metrics.queries,
+        metrics.db_seconds * 1000, metrics.serializer_seconds * 1000, statements,
+        f'\n  ... {omitted} more queries' if omitted > 0 else '',
+    )
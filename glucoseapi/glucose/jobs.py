@@ -0,0 +1,178 @@
+import time
+from datetime import timedelta
+import orjson
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from glucose.ingestion import BATCH_SIZE, GlucoseLevelParser, IngestionSummary, upsert_glucose_levels
+from glucose.models import IngestionJob
+
+# Time after which a running job whose worker stopped reporting progress is claimed again.
+STALE_AFTER = timedelta(minutes=5)
+
+# Number of claims after which a job that keeps failing is given up.
+MAX_ATTEMPTS = 3
+
+# Number of queued jobs a worker tries to claim per query.
+CLAIM_CANDIDATES = 10
+
+
+class LeaseLost(Exception):
+    """
+    Raised when another worker claimed the job that is being processed.
+    """
+
+
+def enqueue_ingestion(payload):
+    """
+    Queues an upload of glucose levels for ingestion in the background.
+
+    The payload is stored as it was uploaded; it is parsed by the worker, so queueing does not
+    depend on the size of the upload.
+
+    Args:
+        payload (str): A JSON array of glucose level dictionaries.
+
+    Returns:
+        IngestionJob: The queued job.
+    """
+    return IngestionJob.objects.create(payload=payload)
+
+
+def claimable_jobs():
+    """
+    Returns the jobs a worker may claim: queued jobs and running jobs whose worker went silent.
+    """
+    stale = timezone.now() - STALE_AFTER
+    return IngestionJob.objects.filter(
+        Q(status=IngestionJob.Status.QUEUED) | Q(status=IngestionJob.Status.RUNNING, heartbeat_at__lt=stale)
+    )
+
+
+def claim_next_job():
+    """
+    Claims the oldest claimable job for the calling worker.
+
+    A job is claimed with a conditional UPDATE that only succeeds while the job is still claimable,
+    so concurrent workers never process the same job, on every database backend and without
+    holding row locks.
+
+    Returns:
+        IngestionJob: The claimed job, or None if the queue is empty.
+    """
+    while True:
+        candidates = list(claimable_jobs().order_by('id').values_list('id', flat=True)[:CLAIM_CANDIDATES])
+        if not candidates:
+            return None
+        for id in candidates:
+            now = timezone.now()
+            claimed = claimable_jobs().filter(id=id).update(
+                status=IngestionJob.Status.RUNNING,
+                attempts=F('attempts') + 1,
+                started_at=now,
+                heartbeat_at=now,
+            )
+            if claimed:
+                return IngestionJob.objects.get(id=id)
+
+
+def process_job(job, batch_size=BATCH_SIZE):
+    """
+    Ingests the payload of a claimed job in batches.
+
+    Every batch is upserted in its own transaction together with the progress of the job, so a
+    job that is claimed again after its worker died resumes after the last committed batch. Rows
+    that cannot be parsed are counted and reported with their 1-based position in the payload.
+    Jobs that fail are queued again until they have been attempted MAX_ATTEMPTS times.
+
+    Args:
+        job (IngestionJob): The job, as returned by claim_next_job().
+        batch_size (int): The number of rows written per batch.
+
+    Returns:
+        IngestionJob: The job with its final or current state.
+    """
+    try:
+        if job.attempts > MAX_ATTEMPTS:
+            raise RuntimeError(f'Gave up after {MAX_ATTEMPTS} attempts')
+        levels = orjson.loads(job.payload)
+        if not isinstance(levels, list):
+            raise ValueError('Payload is not a JSON array')
+        job.total_rows = len(levels)
+
+        summary = IngestionSummary(inserted=job.inserted, updated=job.updated, rejected=job.rejected, errors=list(job.errors))
+        parser = GlucoseLevelParser()
+        for start in range(job.processed_rows, len(levels), batch_size):
+            batch = parser.parse_all(levels[start:start + batch_size], summary, start=start + 1)
+            with transaction.atomic():
+                summary.add(upsert_glucose_levels(batch, return_objects=False))
+                job.processed_rows = min(start + batch_size, len(levels))
+                save_progress(job, summary)
+
+        job.status = IngestionJob.Status.SUCCEEDED
+        # The payload is no longer needed once it has been ingested.
+        job.payload = ''
+        job.finished_at = timezone.now()
+        save_progress(job, summary, 'status', 'payload', 'finished_at')
+    except LeaseLost:
+        pass
+    except Exception as ex:
+        job.error = repr(ex)
+        if job.attempts < MAX_ATTEMPTS and not isinstance(ex, ValueError):
+            job.status = IngestionJob.Status.QUEUED
+        else:
+            job.status = IngestionJob.Status.FAILED
+            job.finished_at = timezone.now()
+        try:
+            save_progress(job, None, 'status', 'error', 'finished_at')
+        except LeaseLost:
+            pass
+    return job
+
+
+def save_progress(job, summary, *fields):
+    """
+    Saves the progress of a job, provided the calling worker still holds it.
+
+    Args:
+        job (IngestionJob): The job.
+        summary (IngestionSummary): The counters to store, or None to keep the stored ones.
+        *fields (str): Further fields of the job to store.
+
+    Raises:
+        LeaseLost: If the job was claimed by another worker in the meantime.
+    """
+    if summary is not None:
+        job.inserted, job.updated, job.rejected, job.errors = summary.inserted, summary.updated, summary.rejected, summary.errors
+    job.heartbeat_at = timezone.now()
+    values = {name: getattr(job, name) for name in ('total_rows', 'processed_rows', 'inserted', 'updated', 'rejected', 'errors', 'heartbeat_at', *fields)}
+    if not IngestionJob.objects.filter(id=job.id, attempts=job.attempts).update(**values):
+        raise LeaseLost(job.id)
+
+
+def run_worker(batch_size=BATCH_SIZE, poll_interval=1.0, once=False):
+    """
+    Processes queued jobs one after another.
+
+    Like the request cycle does for views, connections that have failed or outlived CONN_MAX_AGE are
+    closed before every claim, so a long-running worker reconnects after database restarts.
+
+    Args:
+        batch_size (int): The number of rows written per batch.
+        poll_interval (float): The number of seconds to wait when the queue is empty.
+        once (bool): Whether to return when the queue is empty instead of waiting for new jobs.
+
+    Returns:
+        int: The number of jobs processed.
+    """
+    processed = 0
+    while True:
+        close_old_connections()
+        job = claim_next_job()
+        if job is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        process_job(job, batch_size)
+        processed += 1
@@ -0,0 +1,41 @@
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from glucose.ingestion import BATCH_SIZE, GlucoseLevelParser, upsert_glucose_levels
+from glucose.synthetic import DEFAULT_START, generate_history
+
+
+class Command(BaseCommand):
+    """
+    Generates synthetic CGM histories, see glucose.synthetic.generate_history.
+
+    Rows are written with the same batched upserts as uploads, so rollups and cached responses stay
+    consistent, and generating the same users again overwrites their rows instead of duplicating them.
+    """
+    help = 'Generates synthetic CGM histories for benchmarks and development.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Number of users.')
+        parser.add_argument('--days', type=int, default=90, help='Number of days per user.')
+        parser.add_argument('--start', default=DEFAULT_START.date().isoformat(), help='First day of the histories, YYYY-MM-DD.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random number generator.')
+        parser.add_argument('--prefix', default='synthetic_', help='Prefix of the generated user IDs, followed by the user number.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Number of rows written per statement.')
+
+    def handle(self, *args, users, days, start, seed, prefix, batch_size, **options):
+        try:
+            start = datetime.strptime(start, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        except ValueError as ex:
+            raise CommandError(f'Invalid start: {ex}')
+
+        began = time.perf_counter()
+        rows = 0
+        parser = GlucoseLevelParser()
+        for user in range(users):
+            levels = generate_history(f'{prefix}{user}', days, start, seed)
+            while batch := [parser.parse(level) for level in islice(levels, batch_size)]:
+                upsert_glucose_levels(batch, return_objects=False)
+                rows += len(batch)
+        seconds = time.perf_counter() - began
+        self.stdout.write(f'Generated {rows} rows for {users} users in {seconds:.2f} s ({rows / seconds if seconds else 0:.0f} rows/s)')
@@ -0,0 +1,99 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from glucose.csv_import import ParsedExport, find_exports, import_export, parse_export
+from glucose.ingestion import BATCH_SIZE
+from glucose.processes import setup_worker, worker_context, worker_setup_args
+
+
+class Command(BaseCommand):
+    """
+    Imports LibreView CSV exports.
+
+    Exports are parsed in a pool of worker processes. Every export is written with batched upserts
+    in its own transaction, by the workers themselves on databases with concurrent writers and by
+    the main process on SQLite, which allows a single writer only.
+    """
+    help = 'Imports LibreView CSV exports from files or directories.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='CSV files or directories searched recursively for *.csv files.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of worker processes. 1 imports in the main process.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Number of rows written per statement.')
+
+    def handle(self, *args, paths, workers, batch_size, **options):
+        try:
+            exports = find_exports(paths)
+        except FileNotFoundError as ex:
+            raise CommandError(f'Path not found: {ex}')
+
+        start = time.perf_counter()
+        rows = failed = 0
+        for path, result, error in self.load_all(exports, workers, batch_size):
+            if isinstance(result, ParsedExport):
+                path, result, error = write_export(result, batch_size)
+            if error is not None:
+                failed += 1
+                self.stderr.write(f'{path}: {error!r}')
+                continue
+            rows += result.inserted + result.updated
+            if options['verbosity'] > 1 or result.rejected:
+                self.stdout.write(f'{path}: {result.inserted} inserted, {result.updated} updated, {result.rejected} rejected')
+            for row_error in result.errors:
+                self.stderr.write(f'{path}:{row_error["line"]}: {row_error["error"]}')
+
+        seconds = time.perf_counter() - start
+        self.stdout.write(f'Imported {rows} rows from {len(exports) - failed} files in {seconds:.2f} s ({rows / seconds if seconds else 0:.0f} rows/s)')
+        if failed:
+            raise CommandError(f'{failed} of {len(exports)} files could not be imported')
+
+    def load_all(self, exports, workers, batch_size):
+        """
+        Loads the exports, in worker processes if more than one worker is requested.
+
+        Yields:
+            tuple: The path, the IngestionSummary of a written export or the ParsedExport still to be
+                written, and the error or None, in input order.
+        """
+        if workers <= 1 or len(exports) <= 1:
+            for path in exports:
+                yield load(path, batch_size, write=True)
+            return
+
+        write_in_workers = connection.vendor != 'sqlite'
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=worker_context(), initializer=setup_worker, initargs=worker_setup_args(),
+        ) as executor:
+            # Only a few exports are loaded ahead of the main process to bound memory use.
+            pending = deque()
+            for path in exports:
+                pending.append(executor.submit(load, path, batch_size, write_in_workers))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def load(path, batch_size, write):
+    """
+    Parses an export and, if write is set, imports it. Runs in the worker processes.
+    """
+    try:
+        parsed = parse_export(path)
+    except Exception as ex:
+        return path, None, ex
+    return write_export(parsed, batch_size) if write else (path, parsed, None)
+
+
+def write_export(parsed, batch_size):
+    """
+    Imports a parsed export, returning the error instead of raising it.
+    """
+    try:
+        return parsed.path, import_export(parsed, batch_size), None
+    except Exception as ex:
+        return parsed.path, None, ex
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+from glucose.ingestion import BATCH_SIZE
+from glucose.jobs import run_worker
+from glucose.processes import call_in_worker, worker_context, worker_setup_args
+
+
+class Command(BaseCommand):
+    """
+    Processes the ingestion jobs queued by uploads with mode=background.
+
+    Every worker process claims one job at a time and writes it in batches. Workers run until they
+    are stopped, or with --once until the queue is empty.
+    """
+    help = 'Processes queued ingestion jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes. 1 processes jobs in the main process.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Number of rows written per batch.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait for new jobs when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty.')
+
+    def handle(self, *args, workers, batch_size, poll_interval, once, **options):
+        if workers <= 1:
+            processed = run_worker(batch_size, poll_interval, once)
+            self.stdout.write(f'Processed {processed} jobs')
+            return
+
+        connections.close_all()
+        context, setup_args = worker_context(), worker_setup_args()
+        processes = [
+            context.Process(
+                target=call_in_worker,
+                args=(setup_args, 'glucose.jobs.run_worker', batch_size, poll_interval, once),
+                daemon=True,
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.stdout.write(f'{workers} workers stopped')
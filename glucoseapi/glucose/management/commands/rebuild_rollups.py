@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from glucose.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the hourly and daily glucose rollups from the raw readings.
+    """
+    help = 'Rebuilds the hourly and daily glucose rollups from the raw readings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='user_ids', action='append', help='Only rebuild the rollups of this user. Can be repeated.')
+
+    def handle(self, *args, user_ids=None, **options):
+        written = rebuild_rollups(user_ids)
+        for resolution, count in written.items():
+            self.stdout.write(f'{count} {resolution} rollups written')
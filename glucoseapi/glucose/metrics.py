@@ -0,0 +1,141 @@
+import math
+from django.db import connections
+from django.db.models import CharField, Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Cast, Coalesce, Substr
+
+# Target glucose range in mg/dL, bounds inclusive.
+TARGET_RANGE = (70, 180)
+
+# Consensus glucose ranges in mg/dL: (name, lower bound inclusive, upper bound inclusive).
+GLUCOSE_RANGES = (
+    ('very_low', None, 53),
+    ('low', 54, 69),
+    ('in_range', *TARGET_RANGE),
+    ('high', 181, 250),
+    ('very_high', 251, None),
+)
+
+
+def glucose_value():
+    """
+    Returns the expression of the glucose value of a reading in mg/dL.
+
+    CGM readings carry the value in glucose_value_trend and manual scans in glucose_scan.
+    """
+    return Coalesce('glucose_value_trend', 'glucose_scan')
+
+
+def timestamp_text(field):
+    """
+    Returns the expression of the 'YYYY-MM-DD HH:MM:SS' text form of a timestamp column.
+
+    Databases render timestamps in UTC on Django connections, so the text can be parsed or sliced
+    without building a datetime object per row.
+
+    Args:
+        field (str): The name of the timestamp column.
+
+    Returns:
+        Expression: The timestamp as text, without fractional seconds and time zone.
+    """
+    return Substr(Cast(field, CharField()), 1, 19)
+
+
+def fetch_rows(queryset):
+    """
+    Runs the compiled query of a values_list queryset on a plain cursor.
+
+    This skips the per-row converters of the ORM. Annotations are selected after the model fields
+    in the order they were added, so callers must annotate in the order they select.
+
+    Args:
+        queryset (QuerySet): The values_list queryset.
+
+    Returns:
+        list: The result rows as tuples of database values.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def range_filter(lower, upper):
+    conditions = Q()
+    if lower is not None:
+        conditions &= Q(glucose__gte=lower)
+    if upper is not None:
+        conditions &= Q(glucose__lte=upper)
+    return conditions
+
+
+def mean_and_sd(count, total, total_squares):
+    """
+    Returns the mean and sample standard deviation of values given by their count, sum and sum of squares.
+
+    Args:
+        count (int): The number of values.
+        total (int): The sum of the values.
+        total_squares (int): The sum of the squared values.
+
+    Returns:
+        tuple: The mean, or None without values, and the standard deviation, or None with fewer than two values.
+    """
+    if not count:
+        return None, None
+    mean = total / count
+    if count < 2:
+        return mean, None
+    variance = max(total_squares - total * total / count, 0) / (count - 1)
+    return mean, math.sqrt(variance)
+
+
+def compute_glucose_stats(levels):
+    """
+    Computes glycemic metrics of the given glucose levels with a single aggregate query.
+
+    Count, sum, sum of squares, extremes and the number of readings per glucose range are
+    aggregated in SQL; only the final arithmetic on these totals happens in Python.
+
+    Args:
+        levels (QuerySet): The glucose levels to summarize.
+
+    Returns:
+        dict: The number of readings, mean glucose (mg/dL), standard deviation (mg/dL), coefficient of
+            variation (%), glucose management indicator (%), minimum, maximum and the percentage of
+            readings in each glucose range. Metrics that need readings are None if there are none.
+    """
+    totals = (
+        levels.annotate(glucose=glucose_value())
+        .filter(glucose__isnull=False)
+        .aggregate(
+            count=Count('id'),
+            total=Sum('glucose'),
+            total_squares=Sum(F('glucose') * F('glucose')),
+            minimum=Min('glucose'),
+            maximum=Max('glucose'),
+            **{name: Count('id', filter=range_filter(lower, upper)) for name, lower, upper in GLUCOSE_RANGES},
+        )
+    )
+    count = totals['count']
+    stats = {
+        'count': count,
+        'mean': None,
+        'sd': None,
+        'cv': None,
+        'gmi': None,
+        'min': totals['minimum'],
+        'max': totals['maximum'],
+        'time_in_ranges': {name: None for name, _, _ in GLUCOSE_RANGES},
+    }
+    if not count:
+        return stats
+
+    mean, sd = mean_and_sd(count, totals['total'], totals['total_squares'])
+    stats['mean'] = round(mean, 1)
+    stats['gmi'] = round(3.31 + 0.02392 * mean, 1)
+    if sd is not None:
+        stats['sd'] = round(sd, 1)
+        stats['cv'] = round(100 * sd / mean, 1) if mean else None
+    stats['time_in_ranges'] = {name: round(100 * totals[name] / count, 1) for name, _, _ in GLUCOSE_RANGES}
+    return stats
@@ -0,0 +1,233 @@
+import gzip
+import time
+import zlib
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from glucose.instrumentation import RequestMetrics, current_metrics, log_slow_request, registry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content types worth compressing, matched by prefix. Parquet exports are already compressed.
+COMPRESSIBLE_CONTENT_TYPES = ('application/json', 'text/', 'application/vnd.apache.arrow.stream')
+
+# Compression levels balancing speed and size for responses compressed on every request.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+class PerformanceMiddleware:
+    """
+    Records the wall time, database queries and time, serializer time and response size of every
+    request per route, exposed by the metrics endpoint.
+
+    Queries are counted with an execute wrapper on every database connection of the request thread,
+    which is the thread running the ORM calls of async views under ASGI. Requests slower than the
+    GLUCOSE_SLOW_REQUEST_SECONDS setting are logged with their SQL to the glucose.slow_requests
+    logger; None disables the log. Place it first in MIDDLEWARE so the time of all other middleware
+    is included. Like Django's middleware it runs synchronously or, under ASGI, asynchronously, so
+    async views are not adapted to threads.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with self.wrap_connections(metrics):
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        metrics.seconds = time.perf_counter() - start
+        return self.record(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            # Connections belong to the thread running the ORM calls of the request, so the
+            # wrappers are installed and removed there.
+            stack = await sync_to_async(self.wrap_connections)(metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            current_metrics.reset(token)
+        metrics.seconds = time.perf_counter() - start
+        return self.record(request, response, metrics)
+
+    def wrap_connections(self, metrics):
+        """
+        Records the queries of the database connections of the calling thread in the metrics.
+
+        Returns:
+            ExitStack: Removes the execute wrappers when closed.
+        """
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics.record_query))
+        return stack
+
+    def record(self, request, response, metrics):
+        """
+        Records the metrics of a request under its route and logs the request if it was slow.
+        """
+        match = request.resolver_match
+        route = match.route if match is not None else 'unmatched'
+        registry.record(route, request.method, metrics, None if response.streaming else len(response.content))
+
+        threshold = getattr(settings, 'GLUCOSE_SLOW_REQUEST_SECONDS', None)
+        if threshold is not None and metrics.seconds >= threshold:
+            log_slow_request(request, route, metrics)
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, as negotiated with the Accept-Encoding header.
+
+    Brotli requires the optional brotli package and is preferred when a client accepts both with
+    the same quality. Only JSON, text and Arrow responses of at least GLUCOSE_COMPRESS_MIN_BYTES are
+    compressed; streamed responses are compressed chunk by chunk. ETags become weak, since the bytes
+    differ from the uncompressed representation. Place it right after PerformanceMiddleware, so the
+    metrics record the compressed size and the compression time. Like PerformanceMiddleware it runs
+    synchronously or asynchronously.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        """
+        Compresses the response if the client accepts a supported encoding and it is worth it.
+        """
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if (
+            encoding is None
+            or response.has_header('Content-Encoding')
+            or not response.get('Content-Type', '').startswith(COMPRESSIBLE_CONTENT_TYPES)
+        ):
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < getattr(settings, 'GLUCOSE_COMPRESS_MIN_BYTES', 1024):
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+def negotiate_encoding(header):
+    """
+    Selects the content coding of a response from an Accept-Encoding header.
+
+    Args:
+        header (str): The Accept-Encoding header, e.g. 'gzip, br;q=0.9'.
+
+    Returns:
+        str: 'br' or 'gzip', or None if the client accepts neither.
+    """
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            qualities[coding.strip().lower()] = quality
+    candidates = ('br', 'gzip') if brotli is not None else ('gzip',)
+    default = qualities.get('*', 0.0)
+    best = max(candidates, key=lambda coding: qualities.get(coding, default))
+    return best if qualities.get(best, default) > 0 else None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compressor(encoding):
+    """
+    Returns the functions compressing a chunk and finishing the stream of an incremental compressor.
+    """
+    if encoding == 'br':
+        stream = brotli.Compressor(quality=BROTLI_QUALITY)
+        return stream.process, stream.finish
+    # A window of 16 + 15 bits writes a gzip header and trailer.
+    stream = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return stream.compress, stream.flush
+
+
+def compress_stream(chunks, encoding):
+    """
+    Compresses an iterable of byte chunks, yielding the compressed chunks.
+    """
+    process, finish = compressor(encoding)
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+async def compress_async_stream(chunks, encoding):
+    """
+    Compresses an async iterable of byte chunks, yielding the compressed chunks.
+    """
+    process, finish = compressor(encoding)
+    async for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
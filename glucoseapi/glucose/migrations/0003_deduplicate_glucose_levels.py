@@ -0,0 +1,43 @@
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def deduplicate_levels(apps, schema_editor):
+    """
+    Removes duplicate glucose levels so that the natural key can be made unique.
+
+    For every (metadata, device, serial_number, device_timestamp) group only the most recently
+    inserted row is kept, which matches the values an upsert would have left behind.
+
+    Args:
+        apps: A reference to the application registry.
+        schema_editor: The schema editor used for database operations.
+
+    Returns:
+        None
+    """
+    GlucoseLevel = apps.get_model('glucose', 'GlucoseLevel')
+    duplicates = (
+        GlucoseLevel.objects
+        .values('metadata', 'device', 'serial_number', 'device_timestamp')
+        .annotate(latest_id=Max('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        GlucoseLevel.objects.filter(
+            metadata=group['metadata'],
+            device=group['device'],
+            serial_number=group['serial_number'],
+            device_timestamp=group['device_timestamp'],
+        ).exclude(id=group['latest_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glucose', '0002_populate_database'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_levels, migrations.RunPython.noop),
+    ]
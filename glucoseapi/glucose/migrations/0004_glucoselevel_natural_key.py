@@ -0,0 +1,17 @@
+# Generated by Django 4.2.13 on 2026-10-17 00:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glucose', '0003_deduplicate_glucose_levels'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='glucoselevel',
+            constraint=models.UniqueConstraint(fields=('metadata', 'device', 'serial_number', 'device_timestamp'), name='glucose_level_natural_key'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.13 on 2026-10-17 00:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glucose', '0004_glucoselevel_natural_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='glucoselevelmetadata',
+            name='user_id',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='User ID'),
+        ),
+        migrations.AddIndex(
+            model_name='glucoselevel',
+            index=models.Index(fields=['metadata', 'device_timestamp'], name='glucose_level_metadata_time'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.13 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glucose', '0005_glucose_level_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='device_timestamp_typed',
+            field=models.DateTimeField(null=True, verbose_name='Gerätezeitstempel'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='glucose_value_trend_typed',
+            field=models.IntegerField(null=True, verbose_name='Glukosewert-Verlauf mg/dL'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='glucose_scan_typed',
+            field=models.IntegerField(null=True, verbose_name='Glukose-Scan mg/dL'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='rapid_acting_insulin_typed',
+            field=models.DecimalField(decimal_places=2, max_digits=7, null=True, verbose_name='Schnellwirkendes Insulin (Einheiten)'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='carbohydrates_grams_typed',
+            field=models.DecimalField(decimal_places=2, max_digits=7, null=True, verbose_name='Kohlenhydrate (Gramm)'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='carbohydrates_portions_typed',
+            field=models.DecimalField(decimal_places=2, max_digits=7, null=True, verbose_name='Kohlenhydrate (Portionen)'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='depot_insulin_typed',
+            field=models.DecimalField(decimal_places=2, max_digits=7, null=True, verbose_name='Depotinsulin (Einheiten)'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='glucose_test_strips_typed',
+            field=models.IntegerField(null=True, verbose_name='Glukose-Teststreifen mg/dL'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='ketone_typed',
+            field=models.DecimalField(decimal_places=2, max_digits=7, null=True, verbose_name='Keton mmol/L'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='mealtime_insulin_typed',
+            field=models.DecimalField(decimal_places=2, max_digits=7, null=True, verbose_name='Mahlzeiteninsulin (Einheiten)'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='correction_insulin_typed',
+            field=models.DecimalField(decimal_places=2, max_digits=7, null=True, verbose_name='Korrekturinsulin (Einheiten)'),
+        ),
+        migrations.AddField(
+            model_name='glucoselevel',
+            name='insulin_change_by_user_typed',
+            field=models.DecimalField(decimal_places=2, max_digits=7, null=True, verbose_name='Insulin-Änderung durch Anwender (Einheiten)'),
+        ),
+    ]
@@ -0,0 +1,166 @@
+import logging
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from django.db import migrations, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Number of rows converted per transaction.
+CHUNK_SIZE = 2000
+
+GLUCOSE_FIELDS = ('glucose_value_trend', 'glucose_scan', 'glucose_test_strips')
+DECIMAL_FIELDS = (
+    'rapid_acting_insulin', 'carbohydrates_grams', 'carbohydrates_portions', 'depot_insulin',
+    'ketone', 'mealtime_insulin', 'correction_insulin', 'insulin_change_by_user',
+)
+
+# Length of the notes column, which keeps the measurements that are not numbers.
+NOTES_MAX_LENGTH = 200
+
+
+def backfill_typed_columns(apps, schema_editor):
+    """
+    Copies the text measurements of every glucose level into the typed columns.
+
+    Rows are converted in primary key order in chunks of CHUNK_SIZE, each in its own short
+    transaction, so the table is never locked for the whole conversion. Only rows without a
+    converted device timestamp are selected, which makes the migration resumable: running it
+    again after an interruption continues with the remaining rows.
+
+    Measurements that are not numbers, such as a trend of "stable", are left empty in the typed
+    columns and appended to the notes of the level as "<field>: <text>", unless the notes would
+    exceed their maximum length. The number of kept and of lost values is logged at the end. A
+    device timestamp that cannot be parsed stops the migration, since the column becomes required.
+
+    Args:
+        apps: A reference to the application registry.
+        schema_editor: The schema editor used for database operations.
+
+    Returns:
+        None
+    """
+    GlucoseLevel = apps.get_model('glucose', 'GlucoseLevel')
+    db_alias = schema_editor.connection.alias
+    typed_fields = [f'{name}_typed' for name in ('device_timestamp',) + GLUCOSE_FIELDS + DECIMAL_FIELDS]
+
+    last_id = 0
+    kept = lost = 0
+    while True:
+        with transaction.atomic(using=db_alias):
+            levels = list(
+                GlucoseLevel.objects.using(db_alias)
+                .filter(id__gt=last_id, device_timestamp_typed__isnull=True)
+                .order_by('id')[:CHUNK_SIZE]
+            )
+            if not levels:
+                break
+            for level in levels:
+                try:
+                    level.device_timestamp_typed = parse_timestamp(level.device_timestamp)
+                except ValueError as ex:
+                    raise ValueError(f'Glucose level {level.id}: {ex}') from ex
+                if level.device_timestamp_typed is None:
+                    raise ValueError(f'Glucose level {level.id}: missing device timestamp')
+                texts = []
+                for name in GLUCOSE_FIELDS:
+                    setattr(level, f'{name}_typed', _convert(level, name, parse_glucose, texts))
+                for name in DECIMAL_FIELDS:
+                    setattr(level, f'{name}_typed', _convert(level, name, parse_decimal, texts))
+                if texts:
+                    notes = '; '.join(([level.notes] if level.notes else []) + texts)
+                    if len(notes) <= NOTES_MAX_LENGTH:
+                        level.notes = notes
+                        kept += len(texts)
+                    else:
+                        logger.warning('Glucose level %s: dropping non-numeric %s', level.id, '; '.join(texts))
+                        lost += len(texts)
+            GlucoseLevel.objects.using(db_alias).bulk_update(levels, typed_fields + ['notes'])
+            last_id = levels[-1].id
+        logger.info('Converted glucose levels up to id %s', last_id)
+    if kept or lost:
+        logger.warning('Non-numeric measurements: %s moved to notes, %s dropped', kept, lost)
+
+
+# The parsers below are copies of glucose.utils as of this migration, so that later changes to
+# the application code do not change what the migration does.
+
+# Timestamp formats accepted besides ISO 8601, as found in LibreView exports.
+TIMESTAMP_FORMATS = ("%d-%m-%Y %H:%M", "%d.%m.%Y %H:%M", "%m-%d-%Y %I:%M %p")
+
+# Precision of the decimal columns of GlucoseLevel.
+DECIMAL_MAX_DIGITS = 7
+DECIMAL_PLACES = 2
+
+
+def parse_timestamp(value):
+    """
+    Converts a device timestamp into a timezone-aware datetime, naive values as UTC.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            for date_format in TIMESTAMP_FORMATS:
+                try:
+                    parsed = datetime.strptime(text, date_format)
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError(f"Invalid timestamp: {value!r}") from None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def parse_decimal(value, max_digits=DECIMAL_MAX_DIGITS, decimal_places=DECIMAL_PLACES):
+    """
+    Converts a numeric value into a Decimal rounded to the precision of a DecimalField.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid number: {value!r}")
+    try:
+        number = Decimal(repr(value) if isinstance(value, float) else str(value).strip().replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"Invalid number: {value!r}") from None
+    if not number.is_finite() or abs(number) >= 10 ** (max_digits - decimal_places):
+        raise ValueError(f"Invalid number: {value!r}")
+    return number.quantize(Decimal(1).scaleb(-decimal_places), rounding=ROUND_HALF_UP)
+
+
+def parse_glucose(value):
+    """
+    Converts a glucose value into whole mg/dL.
+    """
+    number = parse_decimal(value, max_digits=12, decimal_places=0)
+    return None if number is None else int(number)
+
+
+def _convert(level, name, parse, texts):
+    try:
+        return parse(getattr(level, name))
+    except ValueError:
+        texts.append(f'{name}: {getattr(level, name)}')
+        return None
+
+
+class Migration(migrations.Migration):
+
+    # Every chunk commits on its own so that an interrupted run keeps its progress.
+    atomic = False
+
+    dependencies = [
+        ('glucose', '0006_glucoselevel_typed_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_typed_columns, migrations.RunPython.noop),
+    ]
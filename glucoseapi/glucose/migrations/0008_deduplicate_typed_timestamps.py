@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def deduplicate_typed_timestamps(apps, schema_editor):
+    """
+    Removes glucose levels that only became duplicates once their device timestamps were parsed.
+
+    0003 deduplicated on the timestamp text, so differently written timestamps of the same instant,
+    such as 2024-07-01T12:00:00Z and 2024-07-01 12:00:00+00:00, survived as separate rows. Like
+    in 0003, only the most recently inserted row of every (metadata, device, serial_number,
+    device_timestamp_typed) group is kept, so that 0009 can make the natural key unique again.
+
+    Args:
+        apps: A reference to the application registry.
+        schema_editor: The schema editor used for database operations.
+
+    Returns:
+        None
+    """
+    GlucoseLevel = apps.get_model('glucose', 'GlucoseLevel')
+    db_alias = schema_editor.connection.alias
+    duplicates = (
+        GlucoseLevel.objects.using(db_alias)
+        .values('metadata', 'device', 'serial_number', 'device_timestamp_typed')
+        .annotate(latest_id=Max('id'), rows=Count('id'))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        GlucoseLevel.objects.using(db_alias).filter(
+            metadata=group['metadata'],
+            device=group['device'],
+            serial_number=group['serial_number'],
+            device_timestamp_typed=group['device_timestamp_typed'],
+        ).exclude(id=group['latest_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glucose', '0007_backfill_typed_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_typed_timestamps, migrations.RunPython.noop),
+    ]
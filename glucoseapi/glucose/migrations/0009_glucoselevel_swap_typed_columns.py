@@ -0,0 +1,142 @@
+# Generated by Django 4.2.13 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glucose', '0008_deduplicate_typed_timestamps'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='glucoselevel',
+            name='glucose_level_natural_key',
+        ),
+        migrations.RemoveIndex(
+            model_name='glucoselevel',
+            name='glucose_level_metadata_time',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='device_timestamp',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='glucose_value_trend',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='glucose_scan',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='rapid_acting_insulin',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='carbohydrates_grams',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='carbohydrates_portions',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='depot_insulin',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='glucose_test_strips',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='ketone',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='mealtime_insulin',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='correction_insulin',
+        ),
+        migrations.RemoveField(
+            model_name='glucoselevel',
+            name='insulin_change_by_user',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='device_timestamp_typed',
+            new_name='device_timestamp',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='glucose_value_trend_typed',
+            new_name='glucose_value_trend',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='glucose_scan_typed',
+            new_name='glucose_scan',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='rapid_acting_insulin_typed',
+            new_name='rapid_acting_insulin',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='carbohydrates_grams_typed',
+            new_name='carbohydrates_grams',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='carbohydrates_portions_typed',
+            new_name='carbohydrates_portions',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='depot_insulin_typed',
+            new_name='depot_insulin',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='glucose_test_strips_typed',
+            new_name='glucose_test_strips',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='ketone_typed',
+            new_name='ketone',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='mealtime_insulin_typed',
+            new_name='mealtime_insulin',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='correction_insulin_typed',
+            new_name='correction_insulin',
+        ),
+        migrations.RenameField(
+            model_name='glucoselevel',
+            old_name='insulin_change_by_user_typed',
+            new_name='insulin_change_by_user',
+        ),
+        migrations.AlterField(
+            model_name='glucoselevel',
+            name='device_timestamp',
+            field=models.DateTimeField(verbose_name='Gerätezeitstempel'),
+        ),
+        migrations.AddConstraint(
+            model_name='glucoselevel',
+            constraint=models.UniqueConstraint(fields=('metadata', 'device', 'serial_number', 'device_timestamp'), name='glucose_level_natural_key'),
+        ),
+        migrations.AddIndex(
+            model_name='glucoselevel',
+            index=models.Index(fields=['metadata', 'device_timestamp'], name='glucose_level_metadata_time'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.13 on 2026-10-17 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glucose', '0009_glucoselevel_swap_typed_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyGlucoseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.CharField(max_length=200, verbose_name='User ID')),
+                ('bucket', models.DateTimeField()),
+                ('count', models.IntegerField()),
+                ('total', models.BigIntegerField()),
+                ('total_squares', models.BigIntegerField()),
+                ('minimum', models.IntegerField()),
+                ('maximum', models.IntegerField()),
+                ('below', models.IntegerField()),
+                ('in_range', models.IntegerField()),
+                ('above', models.IntegerField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyGlucoseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.CharField(max_length=200, verbose_name='User ID')),
+                ('bucket', models.DateTimeField()),
+                ('count', models.IntegerField()),
+                ('total', models.BigIntegerField()),
+                ('total_squares', models.BigIntegerField()),
+                ('minimum', models.IntegerField()),
+                ('maximum', models.IntegerField()),
+                ('below', models.IntegerField()),
+                ('in_range', models.IntegerField()),
+                ('above', models.IntegerField()),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hourlyglucoserollup',
+            constraint=models.UniqueConstraint(fields=('user_id', 'bucket'), name='hourlyglucoserollup_user_bucket'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyglucoserollup',
+            constraint=models.UniqueConstraint(fields=('user_id', 'bucket'), name='dailyglucoserollup_user_bucket'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.13 on 2026-10-17 01:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('glucose', '0011_ingestion_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='glucoselevel',
+            name='metadata',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='glucose.glucoselevelmetadata'),
+        ),
+    ]
@@ -9,7 +9,7 @@ class GlucoseLevelMetadata(models.Model):
         created_at (datetime): The date and time when the glucose level was created.
         created_by (str): The name of the user who created the glucose level entry.
     """
-    user_id =  models.CharField(max_length=200, verbose_name="User ID")
+    user_id =  models.CharField(max_length=200, verbose_name="User ID", db_index=True)
     created_at = models.DateTimeField("Erstellt am")
     created_by = models.CharField(max_length=200, verbose_name="Erstellt von")
 
@@ -21,47 +21,151 @@ class GlucoseLevel(models.Model):
         metadata (ForeignKey): The metadata associated with the glucose level.
         device (CharField): The device used for measurement.
         serial_number (CharField): The serial number of the device.
-        device_timestamp (CharField): The timestamp recorded by the device.
+        device_timestamp (DateTimeField): The timestamp recorded by the device.
         recording_type (CharField): The type of recording.
-        glucose_value_trend (CharField): The trend of glucose value in mg/dL (milligrams per deciliter).
-        glucose_scan (CharField): The glucose scan in mg/dL.
+        glucose_value_trend (IntegerField): The trend of glucose value in mg/dL (milligrams per deciliter).
+        glucose_scan (IntegerField): The glucose scan in mg/dL.
         non_numerical_rapid_acting_insulin (CharField): Non-numerical rapid-acting insulin.
-        rapid_acting_insulin (CharField): Rapid-acting insulin in units.
+        rapid_acting_insulin (DecimalField): Rapid-acting insulin in units.
         non_numerical_nutritional_data (CharField): Non-numerical nutritional data.
-        carbohydrates_grams (CharField): Carbohydrates in grams.
-        carbohydrates_portions (CharField): Carbohydrates in portions.
+        carbohydrates_grams (DecimalField): Carbohydrates in grams.
+        carbohydrates_portions (DecimalField): Carbohydrates in portions.
         non_numerical_depot_insulin (CharField): Non-numerical depot insulin.
-        depot_insulin (CharField): Depot insulin in units.
+        depot_insulin (DecimalField): Depot insulin in units.
         notes (CharField): Additional notes.
-        glucose_test_strips (CharField): Glucose test strips in mg/dL.
-        ketone (CharField): Ketone measurement in mmol/L (millimoles per liter).
-        mealtime_insulin (CharField): Mealtime insulin in units.
-        correction_insulin (CharField): Correction insulin in units.
-        insulin_change_by_user (CharField): Insulin change made by the user in units.
+        glucose_test_strips (IntegerField): Glucose test strips in mg/dL.
+        ketone (DecimalField): Ketone measurement in mmol/L (millimoles per liter).
+        mealtime_insulin (DecimalField): Mealtime insulin in units.
+        correction_insulin (DecimalField): Correction insulin in units.
+        insulin_change_by_user (DecimalField): Insulin change made by the user in units.
     """
 
-    metadata = models.ForeignKey(GlucoseLevelMetadata, on_delete=models.CASCADE)
+    # Lookups by metadata use glucose_level_metadata_time, whose leading column it is. A separate
+    # index would be redundant, and SQLite prefers it for time-ordered reads and then sorts.
+    metadata = models.ForeignKey(GlucoseLevelMetadata, on_delete=models.CASCADE, db_index=False)
     device = models.CharField(max_length=200, verbose_name="Gerät")
     serial_number = models.CharField(max_length=200, verbose_name="Seriennummer")
-    device_timestamp = models.CharField(max_length=200, verbose_name="Gerätezeitstempel")
+    device_timestamp = models.DateTimeField(verbose_name="Gerätezeitstempel")
     recording_type = models.CharField(max_length=200, verbose_name="Aufzeichnungstyp")
-    glucose_value_trend = models.CharField(max_length=200, verbose_name="Glukosewert-Verlauf mg/dL", null=True)
-    glucose_scan = models.CharField(max_length=200, verbose_name="Glukose-Scan mg/dL", null=True)
+    glucose_value_trend = models.IntegerField(verbose_name="Glukosewert-Verlauf mg/dL", null=True)
+    glucose_scan = models.IntegerField(verbose_name="Glukose-Scan mg/dL", null=True)
     non_numerical_rapid_acting_insulin = models.CharField(max_length=200, verbose_name="Nicht numerisches schnellwirkendes Insulin", null=True)
-    rapid_acting_insulin = models.CharField(max_length=200, verbose_name="Schnellwirkendes Insulin (Einheiten)", null=True)
+    rapid_acting_insulin = models.DecimalField(max_digits=7, decimal_places=2, verbose_name="Schnellwirkendes Insulin (Einheiten)", null=True)
     non_numerical_nutritional_data = models.CharField(max_length=200, verbose_name="Nicht numerische Nahrungsdaten", null=True)
-    carbohydrates_grams = models.CharField(max_length=200, verbose_name="Kohlenhydrate (Gramm)", null=True)
-    carbohydrates_portions = models.CharField(max_length=200, verbose_name="Kohlenhydrate (Portionen)", null=True)
+    carbohydrates_grams = models.DecimalField(max_digits=7, decimal_places=2, verbose_name="Kohlenhydrate (Gramm)", null=True)
+    carbohydrates_portions = models.DecimalField(max_digits=7, decimal_places=2, verbose_name="Kohlenhydrate (Portionen)", null=True)
     non_numerical_depot_insulin = models.CharField(max_length=200, verbose_name="Nicht numerisches Depotinsulin", null=True)
-    depot_insulin = models.CharField(max_length=200, verbose_name="Depotinsulin (Einheiten)", null=True)
+    depot_insulin = models.DecimalField(max_digits=7, decimal_places=2, verbose_name="Depotinsulin (Einheiten)", null=True)
     notes = models.CharField(max_length=200, verbose_name="Notizen", null=True)
-    glucose_test_strips = models.CharField(max_length=200, verbose_name="Glukose-Teststreifen mg/dL", null=True)
-    ketone = models.CharField(max_length=200, verbose_name="Keton mmol/L", null=True)
-    mealtime_insulin = models.CharField(max_length=200, verbose_name="Mahlzeiteninsulin (Einheiten)", null=True)
-    correction_insulin = models.CharField(max_length=200, verbose_name="Korrekturinsulin (Einheiten)", null=True)
-    insulin_change_by_user = models.CharField(max_length=200, verbose_name="Insulin-Änderung durch Anwender (Einheiten)", null=True)
+    glucose_test_strips = models.IntegerField(verbose_name="Glukose-Teststreifen mg/dL", null=True)
+    ketone = models.DecimalField(max_digits=7, decimal_places=2, verbose_name="Keton mmol/L", null=True)
+    mealtime_insulin = models.DecimalField(max_digits=7, decimal_places=2, verbose_name="Mahlzeiteninsulin (Einheiten)", null=True)
+    correction_insulin = models.DecimalField(max_digits=7, decimal_places=2, verbose_name="Korrekturinsulin (Einheiten)", null=True)
+    insulin_change_by_user = models.DecimalField(max_digits=7, decimal_places=2, verbose_name="Insulin-Änderung durch Anwender (Einheiten)", null=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['metadata', 'device', 'serial_number', 'device_timestamp'],
+                name='glucose_level_natural_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['metadata', 'device_timestamp'], name='glucose_level_metadata_time'),
+        ]
 
+class GlucoseRollup(models.Model):
+    """
+    Aggregated glucose readings of a user over one time bucket.
+
+    Rollups are maintained by glucose.rollups whenever readings are written, so that aggregates over
+    long periods read one row per bucket instead of every reading. Buckets start at UTC boundaries.
+
+    Attributes:
+        user_id (str): The ID of the user the readings belong to.
+        bucket (datetime): The start of the time bucket.
+        count (int): The number of readings with a glucose value.
+        total (int): The sum of the glucose values in mg/dL.
+        total_squares (int): The sum of the squared glucose values.
+        minimum (int): The lowest glucose value in mg/dL.
+        maximum (int): The highest glucose value in mg/dL.
+        below (int): The number of readings below the target range.
+        in_range (int): The number of readings within the target range.
+        above (int): The number of readings above the target range.
+    """
+    user_id = models.CharField(max_length=200, verbose_name="User ID")
+    bucket = models.DateTimeField()
+    count = models.IntegerField()
+    total = models.BigIntegerField()
+    total_squares = models.BigIntegerField()
+    minimum = models.IntegerField()
+    maximum = models.IntegerField()
+    below = models.IntegerField()
+    in_range = models.IntegerField()
+    above = models.IntegerField()
+
+    class Meta:
+        abstract = True
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'bucket'], name='%(class)s_user_bucket'),
+        ]
+
+class HourlyGlucoseRollup(GlucoseRollup):
+    """
+    Aggregated glucose readings of a user over one hour.
+    """
+
+class DailyGlucoseRollup(GlucoseRollup):
+    """
+    Aggregated glucose readings of a user over one day.
+    """
+
+class IngestionJob(models.Model):
+    """
+    An upload of glucose levels queued for ingestion in the background.
+
+    Jobs are stored in the database, which serves as the queue, and processed by the workers of the
+    process_ingestion_jobs management command, see glucose.jobs.
+
+    Attributes:
+        status (str): The processing state of the job.
+        payload (str): The uploaded JSON array of glucose levels.
+        total_rows (int): The number of rows of the payload, known once processing started.
+        processed_rows (int): The number of rows written or rejected so far.
+        inserted (int): The number of readings that were inserted.
+        updated (int): The number of existing readings that were overwritten.
+        rejected (int): The number of rows that could not be parsed.
+        errors (list): Row-level errors, capped at MAX_REPORTED_ERRORS.
+        error (str): The error that failed the job.
+        attempts (int): The number of times a worker claimed the job.
+        created_at (datetime): When the job was queued.
+        started_at (datetime): When a worker last claimed the job.
+        heartbeat_at (datetime): When the worker processing the job last reported progress.
+        finished_at (datetime): When the job succeeded or failed.
+    """
 
+    class Status(models.TextChoices):
+        QUEUED = 'queued'
+        RUNNING = 'running'
+        SUCCEEDED = 'succeeded'
+        FAILED = 'failed'
 
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    payload = models.TextField()
+    total_rows = models.IntegerField(null=True)
+    processed_rows = models.IntegerField(default=0)
+    inserted = models.IntegerField(default=0)
+    updated = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+    errors = models.JSONField(default=list)
+    error = models.TextField(null=True)
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    heartbeat_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='ingestion_job_status'),
+        ]
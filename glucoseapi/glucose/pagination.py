@@ -0,0 +1,139 @@
+import base64
+import json
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination of glucose levels keyed on (device_timestamp, id).
+
+    Unlike PageNumberPagination no COUNT(*) and no OFFSET is issued: every page continues from the
+    position encoded in an opaque cursor, so its cost does not depend on how deep the page is.
+    Levels are returned in ascending device time, or descending with sort_by=-device_timestamp.
+    Page sizes above max_page_size are reduced to it.
+
+    Raises:
+        ParseError: If the page size is not a positive integer.
+    """
+    cursor_query_param = 'cursor'
+    sort_query_param = 'sort_by'
+    page_size = 10
+    max_page_size = 1000
+
+    def __init__(self, page_size=None):
+        if page_size is not None:
+            try:
+                page_size = int(page_size)
+            except (TypeError, ValueError):
+                raise ParseError(f'Invalid limit parameter: {page_size}')
+            if page_size < 1:
+                raise ParseError('limit must be a positive integer')
+            self.page_size = min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Returns the page of the queryset following the cursor of the request.
+
+        Raises:
+            ParseError: If the requested ordering is not supported.
+            NotFound: If the cursor is invalid.
+        """
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Returns the query of the page following the cursor of the request.
+
+        It selects one row more than the page size, which tells whether there are more rows.
+        Evaluate it and pass the rows to set_page(), e.g. with the async ORM.
+
+        Raises:
+            ParseError: If the requested ordering is not supported.
+            NotFound: If the cursor is invalid.
+        """
+        self.request = request
+        self.descending = self.get_descending(request)
+        self.position = self.decode_cursor(request)
+        self.reverse = self.position is not None and self.position['reverse']
+
+        # Walking backwards is a forward walk in the opposite order.
+        descending = self.descending != self.reverse
+        if self.position is not None:
+            timestamp, pk = self.position['timestamp'], self.position['id']
+            if descending:
+                queryset = queryset.filter(Q(device_timestamp__lte=timestamp), Q(device_timestamp__lt=timestamp) | Q(id__lt=pk))
+            else:
+                queryset = queryset.filter(Q(device_timestamp__gte=timestamp), Q(device_timestamp__gt=timestamp) | Q(id__gt=pk))
+        ordering = ('-device_timestamp', '-id') if descending else ('device_timestamp', 'id')
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def set_page(self, results):
+        """
+        Returns the page from the rows of the query returned by get_page_queryset().
+        """
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.first, self.last = (results[0], results[-1]) if results else (None, None)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_descending(self, request):
+        sort_param = request.query_params.get(self.sort_query_param)
+        if sort_param in (None, 'device_timestamp'):
+            return False
+        if sort_param == '-device_timestamp':
+            return True
+        raise ParseError('Cursor pagination only supports sort_by=device_timestamp or sort_by=-device_timestamp')
+
+    def decode_cursor(self, request):
+        """
+        Decodes the cursor query parameter into a position.
+
+        Returns:
+            dict: The timestamp, id and direction of the position, or None for the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            timestamp = parse_datetime(data['t'])
+            if timestamp is None:
+                raise ValueError(data['t'])
+            return {'timestamp': timestamp, 'id': int(data['i']), 'reverse': bool(data['r'])}
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, level, reverse):
+        data = {'t': level.device_timestamp.isoformat(), 'i': level.id, 'r': reverse}
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('ascii')).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
@@ -0,0 +1,25 @@
+import codecs
+import orjson
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from glucose.renderers import JSONRenderer
+
+
+class JSONParser(parsers.JSONParser):
+    """
+    DRF's JSON parser decoding with orjson.
+
+    Like DRF's parser with STRICT_JSON, NaN and Infinity are rejected. Bodies in other encodings
+    than UTF-8, and parsing without STRICT_JSON, are left to DRF's parser.
+    """
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
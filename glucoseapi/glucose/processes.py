@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+import django
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+# Start method of worker processes. Spawned workers do not inherit the threads, locks and database
+# connections of the main process and behave the same on every platform.
+START_METHOD = 'spawn'
+
+
+def worker_context():
+    """
+    Returns the multiprocessing context worker processes are started with.
+    """
+    return multiprocessing.get_context(START_METHOD)
+
+
+def worker_setup_args():
+    """
+    Returns the arguments of setup_worker that configure a worker like the current process.
+
+    Returns:
+        tuple: The settings module and the database settings, which include changes made at runtime,
+            such as the test database names.
+    """
+    return settings.SETTINGS_MODULE, {alias: dict(connections.settings[alias]) for alias in connections.settings}
+
+
+def setup_worker(settings_module, databases):
+    """
+    Configures Django in a spawned worker process. Used as the initializer of process pools.
+
+    Args:
+        settings_module (str): The settings module of the main process.
+        databases (dict): The database settings of the main process.
+    """
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    django.setup()
+    for alias, config in databases.items():
+        connections.settings[alias].update(config)
+
+
+def call_in_worker(setup_args, function, *args):
+    """
+    Configures Django and calls a function in a spawned worker process. Used as a process target.
+
+    The function is given by its dotted path, because modules using models cannot be imported
+    before Django is set up.
+
+    Args:
+        setup_args (tuple): The arguments of setup_worker, see worker_setup_args.
+        function (str): The dotted path of the function.
+        *args: The arguments of the function.
+
+    Returns:
+        The result of the function.
+    """
+    setup_worker(*setup_args)
+    return import_string(function)(*args)
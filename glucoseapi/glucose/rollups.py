@@ -0,0 +1,219 @@
+from datetime import timedelta, timezone
+from functools import reduce
+from itertools import islice
+from operator import or_
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from glucose.cache import invalidate_users_on_commit
+from glucose.metrics import TARGET_RANGE, glucose_value, mean_and_sd
+from glucose.models import DailyGlucoseRollup, GlucoseLevel, GlucoseLevelMetadata, HourlyGlucoseRollup
+from glucose.utils import is_utc
+
+# Rollup model, bucket length and the truncation computing the bucket in SQL, per resolution.
+RESOLUTIONS = {
+    'hour': (HourlyGlucoseRollup, timedelta(hours=1), TruncHour),
+    'day': (DailyGlucoseRollup, timedelta(days=1), TruncDay),
+}
+
+# Aggregated columns of a rollup.
+ROLLUP_FIELDS = ('count', 'total', 'total_squares', 'minimum', 'maximum', 'below', 'in_range', 'above')
+
+# Number of rollup rows written per statement.
+BATCH_SIZE = 500
+
+# Maximum number of time ranges combined into one statement. SQLite limits the depth of an expression.
+RANGES_PER_QUERY = 100
+
+
+def aggregate_levels(levels, resolution):
+    """
+    Aggregates glucose levels into rollup buckets in SQL.
+
+    Args:
+        levels (QuerySet): The glucose levels to aggregate.
+        resolution (str): 'hour' or 'day'.
+
+    Returns:
+        QuerySet: Dictionaries with the user_id, the bucket start and the ROLLUP_FIELDS of every
+            bucket that contains readings with a glucose value.
+    """
+    trunc = RESOLUTIONS[resolution][2]
+    low, high = TARGET_RANGE
+    return (
+        levels.annotate(glucose=glucose_value())
+        .filter(glucose__isnull=False)
+        .values(user_id=F('metadata__user_id'), bucket=trunc('device_timestamp', tzinfo=timezone.utc))
+        .annotate(
+            count=Count('id'),
+            total=Sum('glucose'),
+            total_squares=Sum(F('glucose') * F('glucose')),
+            minimum=Min('glucose'),
+            maximum=Max('glucose'),
+            below=Count('id', filter=Q(glucose__lt=low)),
+            in_range=Count('id', filter=Q(glucose__gte=low, glucose__lte=high)),
+            above=Count('id', filter=Q(glucose__gt=high)),
+        )
+        .order_by()
+    )
+
+
+def bucket_start(timestamp, resolution):
+    """
+    Returns the start of the UTC bucket containing the timestamp.
+    """
+    timestamp = timestamp.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if resolution == 'day':
+        timestamp = timestamp.replace(hour=0)
+    return timestamp
+
+
+def bucket_ranges(buckets, length):
+    """
+    Merges buckets into ranges of consecutive buckets.
+
+    Args:
+        buckets (iterable): (user_id, bucket start) pairs.
+        length (timedelta): The length of a bucket.
+
+    Returns:
+        list: (user_id, start, end) tuples, end exclusive.
+    """
+    ranges = []
+    for user_id, start in sorted(set(buckets)):
+        if ranges and ranges[-1][0] == user_id and ranges[-1][2] == start:
+            ranges[-1] = (user_id, ranges[-1][1], start + length)
+        else:
+            ranges.append((user_id, start, start + length))
+    return ranges
+
+
+def refresh_rollups(readings):
+    """
+    Recomputes the hourly and daily rollups of the buckets containing the given readings.
+
+    Only the touched buckets are aggregated again from the raw readings, which makes the refresh
+    independent of the size of a user's history and also correct for updated readings. Must be
+    called in the transaction that wrote the readings.
+
+    Args:
+        readings (iterable): (user_id, device_timestamp) pairs of the written readings.
+    """
+    readings = list(readings)
+    for resolution, (model, length, _) in RESOLUTIONS.items():
+        ranges = bucket_ranges(
+            ((user_id, bucket_start(timestamp, resolution)) for user_id, timestamp in readings),
+            length,
+        )
+        for start in range(0, len(ranges), RANGES_PER_QUERY):
+            chunk = ranges[start:start + RANGES_PER_QUERY]
+            levels = GlucoseLevel.objects.filter(reduce(or_, (
+                Q(metadata__user_id=user_id, device_timestamp__gte=begin, device_timestamp__lt=end)
+                for user_id, begin, end in chunk
+            )))
+            rollups = [model(**row) for row in aggregate_levels(levels, resolution)]
+            model.objects.filter(reduce(or_, (
+                Q(user_id=user_id, bucket__gte=begin, bucket__lt=end)
+                for user_id, begin, end in chunk
+            ))).delete()
+            model.objects.bulk_create(rollups, batch_size=BATCH_SIZE)
+
+
+def rebuild_rollups(user_ids=None):
+    """
+    Rebuilds the hourly and daily rollups from the raw readings.
+
+    Args:
+        user_ids (list): The users whose rollups are rebuilt, all users if None.
+
+    Returns:
+        dict: The number of rollups written per resolution.
+    """
+    written = {}
+    with transaction.atomic():
+        for resolution, (model, _, _) in RESOLUTIONS.items():
+            levels = GlucoseLevel.objects.all()
+            rollups = model.objects.all()
+            if user_ids is not None:
+                levels = levels.filter(metadata__user_id__in=user_ids)
+                rollups = rollups.filter(user_id__in=user_ids)
+            rollups.delete()
+
+            written[resolution] = 0
+            rows = aggregate_levels(levels, resolution).iterator(chunk_size=BATCH_SIZE)
+            while True:
+                batch = [model(**row) for row in islice(rows, BATCH_SIZE)]
+                if not batch:
+                    break
+                model.objects.bulk_create(batch)
+                written[resolution] += len(batch)
+        if user_ids is None:
+            user_ids = GlucoseLevelMetadata.objects.values_list('user_id', flat=True).distinct()
+        invalidate_users_on_commit(user_ids)
+    return written
+
+
+def local_day_rollups(user_id, tzinfo):
+    """
+    Sums the hourly rollups of a user into the days of the given time zone.
+
+    Returns:
+        QuerySet: Dictionaries with the local day and the ROLLUP_FIELDS of the day, prefixed with 'day_'.
+    """
+    aggregates = {'minimum': Min, 'maximum': Max}
+    return (
+        HourlyGlucoseRollup.objects.filter(user_id=user_id)
+        .values(day=TruncDay('bucket', tzinfo=tzinfo))
+        .annotate(**{f'day_{field}': aggregates.get(field, Sum)(field) for field in ROLLUP_FIELDS})
+    )
+
+
+def get_trend(user_id, resolution, start=None, end=None, tzinfo=None):
+    """
+    Returns the per-bucket glucose summary of a user from the rollup tables.
+
+    Daily buckets in a time zone other than UTC are local days, summed from the hourly rollups. Hours
+    start at UTC boundaries, so in zones with a fractional hour offset the day boundary is rounded to
+    a UTC hour.
+
+    Args:
+        user_id (str): The ID of the user.
+        resolution (str): 'hour' or 'day'.
+        start (datetime): If given, the first bucket must start at or after it.
+        end (datetime): If given, the last bucket must start before it.
+        tzinfo (tzinfo): The time zone of daily buckets, UTC if None.
+
+    Returns:
+        list: One dictionary per bucket, in time order, with the bucket start, the number of readings,
+            mean, standard deviation, minimum and maximum in mg/dL and the number of readings below,
+            in and above the target range.
+    """
+    model = RESOLUTIONS[resolution][0]
+    if resolution == 'day' and not is_utc(tzinfo):
+        rows = local_day_rollups(user_id, tzinfo)
+        bucket = 'day'
+    else:
+        rows = model.objects.filter(user_id=user_id).values('bucket', *ROLLUP_FIELDS)
+        bucket = 'bucket'
+    if start is not None:
+        rows = rows.filter(**{f'{bucket}__gte': start})
+    if end is not None:
+        rows = rows.filter(**{f'{bucket}__lt': end})
+
+    trend = []
+    for row in rows.order_by(bucket):
+        if bucket == 'day':
+            row = {'bucket': row['day'], **{field: row[f'day_{field}'] for field in ROLLUP_FIELDS}}
+        mean, sd = mean_and_sd(row['count'], row['total'], row['total_squares'])
+        trend.append({
+            'bucket': row['bucket'],
+            'count': row['count'],
+            'mean': round(mean, 1),
+            'sd': round(sd, 1) if sd is not None else None,
+            'min': row['minimum'],
+            'max': row['maximum'],
+            'below': row['below'],
+            'in_range': row['in_range'],
+            'above': row['above'],
+        })
+    return trend
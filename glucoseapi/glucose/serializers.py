@@ -1,18 +1,166 @@
-from rest_framework import serializers
-from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+import decimal
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from glucose.instrumentation import timed_serialization, times_serialization
+from glucose.models import GlucoseLevel, GlucoseLevelMetadata, IngestionJob
 
-class GlucoseLevelMetadataSerializer(serializers.ModelSerializer):
+class TimedListSerializer(serializers.ListSerializer):
     """
-    Serializer class for the GlucoseLevelMetadata model.
+    List serializer counting its time as serializer time of the request, once for the whole list.
+    """
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+class TimedModelSerializer(serializers.ModelSerializer):
+    """
+    Model serializer counting its time as serializer time of the request.
+
+    Only .data is timed, so rows serialized with many=True are not timed one by one. The Meta of
+    subclasses must extend TimedModelSerializer.Meta to serialize lists with TimedListSerializer.
     """
     class Meta:
+        list_serializer_class = TimedListSerializer
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+class GlucoseLevelMetadataSerializer(TimedModelSerializer):
+    """
+    Serializer class for the GlucoseLevelMetadata model.
+    """
+    class Meta(TimedModelSerializer.Meta):
         model = GlucoseLevelMetadata
         fields = '__all__'
 
-class GlucoseLevelSerializer(serializers.ModelSerializer):
+class GlucoseLevelSerializer(TimedModelSerializer):
     """
     Serializer class for the GlucoseLevel model.
     """
-    class Meta:
+    class Meta(TimedModelSerializer.Meta):
         model = GlucoseLevel
         fields = '__all__'
+
+class IngestionJobSerializer(TimedModelSerializer):
+    """
+    Serializer class for the status of an IngestionJob, without its payload.
+    """
+    class Meta(TimedModelSerializer.Meta):
+        model = IngestionJob
+        exclude = ['payload']
+
+
+class GlucoseLevelRowSerializer:
+    """
+    Fast read-only serializer for GlucoseLevel rows fetched with values_list().
+
+    Produces the same output as GlucoseLevelSerializer, but the column mapping and the per-column
+    converters are compiled once per instance instead of running the DRF field machinery for every
+    field of every row. Columns whose values are already JSON-ready (integers, strings, primary keys)
+    are copied as they are.
+
+    The output can be narrowed to a subset of the fields, which are then the only columns selected
+    besides the keys of the cursor pagination, and null values can be left out of the rows.
+
+    Args:
+        fields (list): The names of the fields to serialize, all fields if None.
+        omit_nulls (bool): Whether fields with a null value are left out of the rows.
+
+    Raises:
+        ValueError: If a field name is unknown.
+    """
+    # Columns always selected, since the cursor pagination reads them from the rows.
+    KEY_COLUMNS = ('id', 'device_timestamp')
+
+    def __init__(self, fields=None, omit_nulls=False):
+        all_fields = GlucoseLevelSerializer().fields
+        if fields is not None:
+            unknown = [name for name in fields if name not in all_fields]
+            if unknown:
+                raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+            all_fields = {name: field for name, field in all_fields.items() if name in fields}
+        self.names = list(all_fields)
+        self.omit_nulls = omit_nulls
+        self.columns = [field.source for field in all_fields.values()]
+        self.columns += [column for column in self.KEY_COLUMNS if column not in self.columns]
+        self.converters = [
+            (index, converter)
+            for index, converter in enumerate(self.compile_converter(field) for field in all_fields.values())
+            if converter is not None
+        ]
+
+    def select(self, queryset):
+        """
+        Restrict the queryset to the serialized columns.
+
+        Rows are named tuples, so attributes such as device_timestamp and id stay accessible for pagination.
+        """
+        return queryset.values_list(*self.columns, named=True)
+
+    @times_serialization
+    def serialize(self, rows):
+        """
+        Serialize rows returned by a queryset prepared with select().
+
+        Args:
+            rows (iterable): The rows.
+
+        Returns:
+            list: One dictionary per row, equal to the GlucoseLevelSerializer representation of the
+                selected fields.
+        """
+        names = self.names
+        converters = self.converters
+        omit_nulls = self.omit_nulls
+        data = []
+        for row in rows:
+            values = list(row)
+            for index, converter in converters:
+                value = values[index]
+                if value is not None:
+                    values[index] = converter(value)
+            # Key columns selected only for the pagination follow the serialized ones and are cut off by zip().
+            if omit_nulls:
+                data.append({name: value for name, value in zip(names, values) if value is not None})
+            else:
+                data.append(dict(zip(names, values)))
+        return data
+
+    @staticmethod
+    def compile_converter(field):
+        """
+        Return a function converting a non-null column value like field.to_representation, or None if
+        the value can be used as it is.
+        """
+        if isinstance(field, (serializers.IntegerField, serializers.PrimaryKeyRelatedField)):
+            return None
+        if isinstance(field, serializers.CharField):
+            return None
+        if isinstance(field, serializers.DateTimeField) and getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() == ISO_8601:
+            field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+            if field_timezone is None:
+                return field.to_representation
+
+            def datetime_to_representation(value):
+                value = value.astimezone(field_timezone).isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return datetime_to_representation
+        if (isinstance(field, serializers.DecimalField) and field.decimal_places is not None
+                and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+                and not field.normalize_output and not field.localize):
+            quantum = decimal.Decimal('.1') ** field.decimal_places
+            context = decimal.getcontext().copy()
+            if field.max_digits is not None:
+                context.prec = field.max_digits
+            rounding = field.rounding
+
+            def decimal_to_representation(value):
+                if not isinstance(value, decimal.Decimal):
+                    value = decimal.Decimal(str(value).strip())
+                return '{:f}'.format(value.quantize(quantum, rounding=rounding, context=context))
+            return decimal_to_representation
+        return field.to_representation
@@ -0,0 +1,103 @@
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+# LibreView recording types of the generated rows.
+HISTORIC_GLUCOSE = '0'
+SCAN_GLUCOSE = '1'
+INSULIN = '4'
+FOOD = '5'
+
+# Interval of the historic glucose readings of a sensor.
+READING_INTERVAL = timedelta(minutes=15)
+
+# Usual meal times as hours after midnight, and the carbohydrates of a meal in grams.
+MEAL_HOURS = (7.5, 12.5, 19.0)
+MEAL_CARBS = (30, 90)
+
+# Grams of carbohydrates covered by one unit of rapid-acting insulin.
+CARB_RATIO = 10
+
+# Range of the glucose values a sensor reports, in mg/dL.
+SENSOR_RANGE = (40, 400)
+
+# Start of generated histories unless another is given.
+DEFAULT_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def generate_history(user_id, days, start=DEFAULT_START, seed=0):
+    """
+    Generates a realistic synthetic CGM history of a user, in the format accepted by create_levels.
+
+    Historic readings arrive every 15 minutes and follow a circadian baseline with a dawn rise,
+    meal excursions and sensor noise. Every day also has a few scans between readings, a meal with
+    rapid-acting insulin three times a day and a depot insulin dose in the evening. The same user,
+    start and seed always produce the same rows.
+
+    Args:
+        user_id (str): The ID of the user.
+        days (int): The number of days of the history.
+        start (datetime): The start of the first day.
+        seed (int): The seed of the random number generator.
+
+    Yields:
+        dict: The glucose level dictionaries, in device time order per day.
+    """
+    rng = random.Random(f'{seed}:{user_id}')
+    serial_number = f'SYN-{rng.randrange(10 ** 8):08d}'
+    created_at = (start + timedelta(days=days)).isoformat()
+    baseline = rng.uniform(100, 140)
+    noise = 0.0
+
+    def row(timestamp, recording_type, **values):
+        return {
+            'user_id': user_id,
+            'created_at': created_at,
+            'created_by': 'generator',
+            'device': 'FreeStyle LibreLink',
+            'serial_number': serial_number,
+            'device_timestamp': timestamp.isoformat(),
+            'recording_type': recording_type,
+            **{name: str(value) for name, value in values.items()},
+        }
+
+    for day in range(days):
+        midnight = start + timedelta(days=day)
+        meals = [
+            (midnight + timedelta(hours=hour + rng.uniform(-0.75, 0.75)), rng.randint(*MEAL_CARBS))
+            for hour in MEAL_HOURS
+        ]
+
+        def glucose_at(timestamp):
+            hours = (timestamp - midnight).total_seconds() / 3600
+            value = baseline + 15 * math.sin(2 * math.pi * (hours - 4) / 24)
+            for meal_time, carbs in meals:
+                # A meal raises glucose by up to 1.2 mg/dL per gram, peaking an hour later.
+                minutes = (timestamp - meal_time).total_seconds() / 60
+                if minutes > 0:
+                    value += 1.2 * carbs * (minutes / 60) * math.exp(1 - minutes / 60)
+            return value
+
+        rows = []
+        for index in range(int(timedelta(days=1) / READING_INTERVAL)):
+            timestamp = midnight + index * READING_INTERVAL
+            noise = 0.8 * noise + rng.gauss(0, 6)
+            rows.append(row(timestamp, HISTORIC_GLUCOSE, glucose_value_trend=clip(glucose_at(timestamp) + noise)))
+
+        for minute in rng.sample(range(24 * 60), rng.randint(3, 8)):
+            # Scans never coincide with another row, which would have the same natural key.
+            timestamp = midnight + timedelta(minutes=minute, seconds=rng.choice((10, 20, 40, 50)))
+            rows.append(row(timestamp, SCAN_GLUCOSE, glucose_scan=clip(glucose_at(timestamp) + noise + rng.gauss(0, 4))))
+
+        for meal_time, carbs in meals:
+            meal_time = meal_time.replace(second=30, microsecond=0)
+            rows.append(row(meal_time - timedelta(minutes=5), INSULIN, rapid_acting_insulin=f'{carbs / CARB_RATIO:.1f}'))
+            rows.append(row(meal_time, FOOD, carbohydrates_grams=carbs))
+        rows.append(row(midnight + timedelta(hours=22, seconds=45), INSULIN, depot_insulin=rng.randint(16, 24)))
+
+        rows.sort(key=lambda level: level['device_timestamp'])
+        yield from rows
+
+
+def clip(value):
+    return int(min(max(round(value), SENSOR_RANGE[0]), SENSOR_RANGE[1]))
@@ -1,12 +1,73 @@
+import csv
+import gzip
+import io
+import os
+import json
+import runpy
+import statistics
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
+from asgiref.sync import iscoroutinefunction
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.core.management import CommandError, call_command
+from django.core.handlers.asgi import ASGIHandler
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase, APIClient
-from glucose.models import GlucoseLevel, GlucoseLevelMetadata
+from glucose.models import DailyGlucoseRollup, GlucoseLevel, GlucoseLevelMetadata, HourlyGlucoseRollup, IngestionJob
+from glucose.backends.sqlite3.base import DatabaseWrapper as SqliteDatabaseWrapper
+from glucose.cache import bump_user_versions, counters, get_user_version, response_cache
 from glucose.dtos import GlucoseLevelDTO
+from glucose.downsampling import largest_triangle_three_buckets
+from glucose.ingestion import GlucoseLevelParser, IngestionSummary
+from glucose.instrumentation import RequestMetrics, current_metrics, registry, timed_serialization
+from glucose.middleware import CompressionMiddleware, PerformanceMiddleware, negotiate_encoding
+from glucose.pagination import KeysetPagination
+from glucose.parsers import JSONParser as OrjsonParser
+from glucose.renderers import JSONRenderer as OrjsonRenderer
+from glucose.synthetic import generate_history
+from glucose.jobs import LeaseLost, claim_next_job, enqueue_ingestion, process_job, run_worker, save_progress
+from glucose.utils import get_field_from_verbose, get_verbose_name_index, parse_decimal, parse_glucose, parse_timestamp
 from glucose.views import create_or_update_glucose_level
-from glucose.serializers import GlucoseLevelMetadataSerializer, GlucoseLevelSerializer
+from glucose.serializers import GlucoseLevelMetadataSerializer, GlucoseLevelRowSerializer, GlucoseLevelSerializer
 
-class GlucoseLevelTests(APITestCase):
+class GlucoseAPITestCase(APITestCase):
+    """
+    Base test case class starting every test with an empty response cache.
+    """
+
+    def _pre_setup(self):
+        super()._pre_setup()
+        response_cache().clear()
+
+    def make_level(self, minute=0, **values):
+        """
+        Build a glucose level payload for user123 at the given minute after 2024-07-06 12:00, with the given values overriding the defaults.
+        """
+        return {
+            "user_id": "user123",
+            "created_at": "2024-07-06T12:34:56",
+            "created_by": "doctor_jane",
+            "device": "Freestyle Libre",
+            "serial_number": "SN87654321",
+            "device_timestamp": (datetime(2024, 7, 6, 12) + timedelta(minutes=minute)).isoformat(),
+            "recording_type": "0",
+            **values,
+        }
+
+class GlucoseLevelTests(GlucoseAPITestCase):
     """
     Test case class for testing the GlucoseLevel API endpoints. Data Transfer Object for Glucose Level. Partially generated with Github Copilot.
     """
@@ -70,17 +131,48 @@ class GlucoseLevelTests(APITestCase):
         Test case to verify the behavior when attempting to get glucose levels for a non-existent user.
 
         This test sends a GET request to the 'get_levels_by_user_id' endpoint with a non-existent user ID.
-        It then checks that the response status code is 500 (Internal Server Error) and that the error message
+        It then checks that the response status code is 404 (Not Found) and that the error message
         contains the expected error message "User is not found".
 
         This test ensures that the API handles the scenario of requesting glucose levels for a user that does not exist.
 
         """
         url = reverse('get_levels_by_user_id')
-        response = self.client.get(url, {'user_id': 'non_existent_user'})
-        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'user_id': 'non_existent_user'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertIn("User is not found", response.data['error'])
 
+    def test_get_levels_by_user_id_query_budget(self):
+        """
+        Test that a numbered page takes a count and a page query, and a cursor page a single query.
+        """
+        url = reverse('get_levels_by_user_id')
+        with self.assertNumQueries(2):
+            self.client.get(url, {'user_id': 'test_user'})
+        with self.assertNumQueries(1):
+            self.client.get(url, {'user_id': 'test_user', 'pagination': 'cursor'})
+
+    def test_get_levels_by_user_id_multiple_metadata(self):
+        """
+        Test that the levels of every metadata record of a user are returned.
+        """
+        other_metadata = GlucoseLevelMetadata.objects.create(
+            user_id="test_user",
+            created_at="2024-07-03T00:00:00Z",
+            created_by="test_creator"
+        )
+        GlucoseLevel.objects.create(
+            metadata=other_metadata,
+            device="Device3",
+            serial_number="13579",
+            device_timestamp="2024-07-03T12:00:00Z",
+            recording_type="Type1"
+        )
+        url = reverse('get_levels_by_user_id')
+        response = self.client.get(url, {'user_id': 'test_user'})
+        self.assertEqual(len(response.data['results']), 3)
+
     def test_get_level_by_id(self):
         """
         Test case for retrieving a glucose level by its ID.
@@ -119,27 +211,27 @@ class GlucoseLevelTests(APITestCase):
         # Create a GlucoseLevelDTO object for testing
         dto = GlucoseLevelDTO(
             user_id=1,
-            created_at='2022-01-01 12:00:00',
+            created_at=datetime(2022, 1, 1, 12, tzinfo=timezone.utc),
             created_by='John Doe',
             device='Device A',
             serial_number='123456',
-            device_timestamp='2022-01-01 12:00:00',
+            device_timestamp=datetime(2022, 1, 1, 12, tzinfo=timezone.utc),
             recording_type='Type A',
-            glucose_value_trend='Trend A',
-            glucose_scan='Scan A',
+            glucose_value_trend=110,
+            glucose_scan=115,
             non_numerical_rapid_acting_insulin='Insulin A',
-            rapid_acting_insulin=10,
+            rapid_acting_insulin=Decimal('10'),
             non_numerical_nutritional_data='Data A',
-            carbohydrates_grams=50,
-            carbohydrates_portions=2,
+            carbohydrates_grams=Decimal('50'),
+            carbohydrates_portions=Decimal('2'),
             non_numerical_depot_insulin='Insulin B',
-            depot_insulin=20,
+            depot_insulin=Decimal('20'),
             notes='Note A',
-            glucose_test_strips='Strips A',
-            ketone='Ketone A',
-            mealtime_insulin=30,
-            correction_insulin=40,
-            insulin_change_by_user=50
+            glucose_test_strips=120,
+            ketone=Decimal('0.1'),
+            mealtime_insulin=Decimal('30'),
+            correction_insulin=Decimal('40'),
+            insulin_change_by_user=Decimal('50')
         )
 
         # Call the create_or_update_glucose_level function
@@ -147,17 +239,17 @@ class GlucoseLevelTests(APITestCase):
 
         # Assert that the GlucoseLevelMetadata object is created or updated correctly
         assert metadata.user_id == 1
-        assert metadata.created_at == '2022-01-01 12:00:00'
+        assert metadata.created_at == datetime(2022, 1, 1, 12, tzinfo=timezone.utc)
         assert metadata.created_by == 'John Doe'
 
         # Assert that the GlucoseLevel object is created or updated correctly
         assert glucose_level.metadata == metadata
         assert glucose_level.device == 'Device A'
         assert glucose_level.serial_number == '123456'
-        assert glucose_level.device_timestamp == '2022-01-01 12:00:00'
+        assert glucose_level.device_timestamp == datetime(2022, 1, 1, 12, tzinfo=timezone.utc)
         assert glucose_level.recording_type == 'Type A'
-        assert glucose_level.glucose_value_trend == 'Trend A'
-        assert glucose_level.glucose_scan == 'Scan A'
+        assert glucose_level.glucose_value_trend == 110
+        assert glucose_level.glucose_scan == 115
         assert glucose_level.non_numerical_rapid_acting_insulin == 'Insulin A'
         assert glucose_level.rapid_acting_insulin == 10
         assert glucose_level.non_numerical_nutritional_data == 'Data A'
@@ -166,8 +258,8 @@ class GlucoseLevelTests(APITestCase):
         assert glucose_level.non_numerical_depot_insulin == 'Insulin B'
         assert glucose_level.depot_insulin == 20
         assert glucose_level.notes == 'Note A'
-        assert glucose_level.glucose_test_strips == 'Strips A'
-        assert glucose_level.ketone == 'Ketone A'
+        assert glucose_level.glucose_test_strips == 120
+        assert glucose_level.ketone == Decimal('0.1')
         assert glucose_level.mealtime_insulin == 30
         assert glucose_level.correction_insulin == 40
         assert glucose_level.insulin_change_by_user == 50
@@ -198,7 +290,7 @@ class GlucoseLevelTests(APITestCase):
                 "serial_number": "SN12345678",
                 "device_timestamp": "2024-07-06T12:00:00",
                 "recording_type": "fasting",
-                "glucose_value_trend": "stable",
+                "glucose_value_trend": "102",
                 "glucose_scan": "105",
                 "non_numerical_rapid_acting_insulin": "none",
                 "rapid_acting_insulin": "0",
@@ -222,7 +314,7 @@ class GlucoseLevelTests(APITestCase):
                 "serial_number": "SN87654321",
                 "device_timestamp": "2024-07-06T18:30:00",
                 "recording_type": "postprandial",
-                "glucose_value_trend": "rising",
+                "glucose_value_trend": "131",
                 "glucose_scan": "140",
                 "non_numerical_rapid_acting_insulin": "none",
                 "rapid_acting_insulin": "5",
@@ -279,3 +371,1594 @@ class GlucoseLevelTests(APITestCase):
         # Assert response data
         self.assertIn("error", response.data)
 
+
+class GlucoseLevelIndexTests(GlucoseAPITestCase):
+    """
+    Test case class for the natural key and the indexes of the glucose tables.
+    """
+
+    def get_constraints(self, model):
+        """
+        Return the constraints and indexes of the table of the given model by name.
+        """
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(cursor, model._meta.db_table)
+
+    def test_natural_key_and_indexes_exist(self):
+        """
+        Test that the natural key is unique and that levels are indexed by metadata and time and users by user_id.
+        """
+        constraints = self.get_constraints(GlucoseLevel)
+        natural_key = constraints['glucose_level_natural_key']
+        self.assertTrue(natural_key['unique'])
+        self.assertEqual(natural_key['columns'], ['metadata_id', 'device', 'serial_number', 'device_timestamp'])
+        metadata_time = constraints['glucose_level_metadata_time']
+        self.assertTrue(metadata_time['index'])
+        self.assertEqual(metadata_time['columns'], ['metadata_id', 'device_timestamp'])
+
+        user_id_indexes = [c for c in self.get_constraints(GlucoseLevelMetadata).values() if c['index'] and c['columns'] == ['user_id']]
+        self.assertEqual(len(user_id_indexes), 1)
+
+    def test_levels_by_time_use_the_index(self):
+        """
+        Test that the time-ordered levels of a user are looked up through the user_id and the (metadata, device_timestamp) index.
+        """
+        plan = GlucoseLevel.objects.filter(metadata__user_id="user123").order_by('device_timestamp').explain()
+        self.assertIn('glucose_glucoselevelmetadata USING COVERING INDEX glucose_glucoselevelmetadata_user_id', plan)
+        self.assertIn('glucose_glucoselevel USING INDEX glucose_level_metadata_time (metadata_id=?)', plan)
+
+class GlucoseLevelUpsertTests(GlucoseAPITestCase):
+    """
+    Test case class for the set-based upsert used by the create_levels endpoint.
+    """
+
+    def test_query_count_is_independent_of_row_count(self):
+        """
+        Test that the number of queries does not grow with the number of rows in the payload.
+        """
+        # SQLite splits inserts into statements of 49 rows, so stay below that.
+        # The hourly and daily rollups take an aggregate, a delete and an insert each.
+        levels = [self.make_level(minute, glucose_scan="100") for minute in range(40)]
+        with self.assertNumQueries(13):
+            response = self.client.post(reverse("create_levels"), data=levels, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(GlucoseLevel.objects.count(), 40)
+        self.assertEqual(len(response.data['glucose_levels']), 40)
+        self.assertEqual(len({level['id'] for level in response.data['glucose_levels']}), 40)
+
+    def test_existing_levels_are_updated(self):
+        """
+        Test that posting a reading with an existing natural key updates it instead of inserting a new row.
+        """
+        self.client.post(reverse("create_levels"), data=[self.make_level(0, glucose_scan="100")], format="json")
+        first = GlucoseLevel.objects.get()
+
+        levels = [self.make_level(0, glucose_scan="120"), self.make_level(15, glucose_scan="100")]
+        response = self.client.post(reverse("create_levels"), data=levels, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(GlucoseLevel.objects.count(), 2)
+        self.assertEqual(GlucoseLevelMetadata.objects.count(), 1)
+        self.assertEqual(response.data['glucose_levels'][0]['id'], first.id)
+        self.assertEqual(GlucoseLevel.objects.get(id=first.id).glucose_scan, 120)
+
+    def test_duplicate_rows_in_payload(self):
+        """
+        Test that a reading repeated within one payload is stored once with the values of its last occurrence.
+        """
+        levels = [self.make_level(0, glucose_scan="100"), self.make_level(0, glucose_scan="110")]
+        response = self.client.post(reverse("create_levels"), data=levels, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [level['id'] for level in response.data['glucose_levels']]
+        self.assertEqual(ids[0], ids[1])
+        self.assertEqual(GlucoseLevel.objects.get().glucose_scan, 110)
+
+    def test_invalid_rows_are_rejected(self):
+        """
+        Test that rows that cannot be parsed are reported with their position while the valid rows are written.
+        """
+        missing_timestamp = self.make_level(1, glucose_scan="100")
+        del missing_timestamp["device_timestamp"]
+        levels = [self.make_level(0, glucose_scan="100"), missing_timestamp, self.make_level(2, glucose_scan="high")]
+        response = self.client.post(reverse("create_levels"), data=levels, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['glucose_levels']), 1)
+        self.assertEqual(response.data['rejected'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']], [2, 3])
+        self.assertIn('device_timestamp', response.data['errors'][0]['error'])
+        self.assertEqual(GlucoseLevel.objects.count(), 1)
+
+        response = self.client.post(reverse("create_levels"), data=[missing_timestamp], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['rejected'], 1)
+
+class GlucoseLevelParserTests(GlucoseAPITestCase):
+    """
+    Test case class for the batch parser converting glucose level dictionaries into DTOs.
+    """
+
+    def test_parse_converts_like_from_dict(self):
+        """
+        Test that the parser converts every field like GlucoseLevelDTO.from_dict.
+        """
+        row = self.make_level(glucose_value_trend="101.6", rapid_acting_insulin="2,5", ketone=0.3, notes="after lunch")
+        parser = GlucoseLevelParser()
+        self.assertEqual(parser.parse(row), GlucoseLevelDTO.from_dict(row))
+        # Cached values give the same result.
+        self.assertEqual(parser.parse(row), GlucoseLevelDTO.from_dict(row))
+        self.assertFalse(hasattr(parser.parse(row), '__dict__'))
+
+    def test_repeated_values_are_shared(self):
+        """
+        Test that repeated values are converted once and shared between the DTOs of a batch.
+        """
+        parser = GlucoseLevelParser()
+        first = parser.parse(self.make_level(serial_number="".join(["SN", "1"])))
+        second = parser.parse(self.make_level(15, serial_number="".join(["SN", "1"])))
+        self.assertIs(first.serial_number, second.serial_number)
+        self.assertIs(first.created_at, second.created_at)
+        self.assertIsNot(first.device_timestamp, second.device_timestamp)
+
+    def test_values_of_different_types_are_cached_apart(self):
+        """
+        Test that equal values of different types are not mixed up by the cache.
+        """
+        parser = GlucoseLevelParser()
+        self.assertEqual(parser.parse(self.make_level(recording_type=1)).recording_type, 1)
+        with self.assertRaises(ValueError):
+            parser.parse(self.make_level(glucose_scan=True))
+        self.assertEqual(parser.parse(self.make_level(glucose_scan=1)).glucose_scan, 1)
+
+    def test_parse_all_reports_row_errors(self):
+        """
+        Test that parse_all keeps the valid rows and rejects missing, empty and invalid values with their position.
+        """
+        rows = [
+            self.make_level(),
+            self.make_level(device_timestamp=None),
+            self.make_level(device=""),
+            self.make_level(ketone="n/a"),
+            "not an object",
+            self.make_level(15),
+        ]
+        summary = IngestionSummary()
+        dtos = GlucoseLevelParser().parse_all(rows, summary, start=11)
+
+        self.assertEqual([dto.device_timestamp.minute for dto in dtos], [0, 15])
+        self.assertEqual(summary.rejected, 4)
+        self.assertEqual([error['line'] for error in summary.errors], [12, 13, 14, 15])
+        self.assertIn('device_timestamp', summary.errors[0]['error'])
+        self.assertIn('device', summary.errors[1]['error'])
+
+class GlucoseLevelIngestTests(GlucoseAPITestCase):
+    """
+    Test case class for the streaming NDJSON ingestion endpoint.
+    """
+
+    def post_ndjson(self, lines):
+        """
+        Post the given lines as newline-delimited JSON to the 'ingest_levels' endpoint.
+        """
+        return self.client.generic("POST", reverse("ingest_levels"), "\n".join(lines), content_type="application/x-ndjson")
+
+    def test_ingest_levels_summary(self):
+        """
+        Test that valid rows are written in batches and invalid rows are reported with their line number.
+        """
+        rows = [self.make_level(minute, glucose_value_trend="100") for minute in range(3)]
+        lines = [json.dumps(row) for row in rows]
+        lines.insert(1, "not json")
+        lines.append(json.dumps({"user_id": "user123"}))
+
+        response = self.post_ndjson(lines)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['inserted'], 3)
+        self.assertEqual(response.data['updated'], 0)
+        self.assertEqual(response.data['rejected'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']], [2, 5])
+        self.assertEqual(GlucoseLevel.objects.count(), 3)
+
+        response = self.post_ndjson([json.dumps(rows[0])])
+        self.assertEqual(response.data['inserted'], 0)
+        self.assertEqual(response.data['updated'], 1)
+
+    def test_ingest_levels_no_data(self):
+        """
+        Test that an empty body is rejected with 400 Bad Request.
+        """
+        response = self.post_ndjson([])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TypedColumnMigrationTests(TransactionTestCase):
+    """
+    Test case class for the migration of the text columns into typed columns.
+    """
+    before = [('glucose', '0002_populate_database')]
+    after = [('glucose', '0009_glucoselevel_swap_typed_columns')]
+
+    def migrate(self, targets):
+        """
+        Migrate the test database to the given targets and return the historical app registry.
+        """
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        """
+        Migrate the test database back to the latest migrations.
+        """
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_timestamps_equal_once_parsed_are_deduplicated(self):
+        """
+        Test that readings whose timestamp texts differ but parse to the same instant are merged, keeping the latest row.
+        """
+        apps = self.migrate(self.before)
+        metadata = apps.get_model('glucose', 'GlucoseLevelMetadata').objects.create(user_id="user123", created_at="2024-07-01T00:00:00Z", created_by="test")
+        OldGlucoseLevel = apps.get_model('glucose', 'GlucoseLevel')
+        for text, trend in (("2024-07-01T12:00:00Z", "100"), ("2024-07-01 12:00:00+00:00", "110")):
+            latest = OldGlucoseLevel.objects.create(metadata=metadata, device="D", serial_number="S", device_timestamp=text, recording_type="0", glucose_value_trend=trend)
+
+        apps = self.migrate(self.after)
+        levels = list(apps.get_model('glucose', 'GlucoseLevel').objects.values_list('id', 'glucose_value_trend'))
+        self.assertEqual(levels, [(latest.id, 110)])
+
+    def test_non_numeric_measurements_are_moved_to_notes(self):
+        """
+        Test that measurements that are not numbers are appended to the notes, and counted as dropped when the notes are full.
+        """
+        apps = self.migrate(self.before)
+        metadata = apps.get_model('glucose', 'GlucoseLevelMetadata').objects.create(user_id="user123", created_at="2024-07-01T00:00:00Z", created_by="test")
+        OldGlucoseLevel = apps.get_model('glucose', 'GlucoseLevel')
+        kept = OldGlucoseLevel.objects.create(metadata=metadata, device="D", serial_number="1", device_timestamp="2024-07-01T12:00:00Z", recording_type="0", glucose_value_trend="stable", ketone="n/a", notes="after lunch")
+        full = OldGlucoseLevel.objects.create(metadata=metadata, device="D", serial_number="2", device_timestamp="2024-07-01T12:00:00Z", recording_type="0", glucose_scan="HI", notes="x" * 200)
+
+        with self.assertLogs('glucose.migrations.0007_backfill_typed_columns', 'WARNING') as logs:
+            apps = self.migrate(self.after)
+        levels = apps.get_model('glucose', 'GlucoseLevel').objects
+        self.assertEqual(levels.values_list('glucose_value_trend', 'ketone', 'notes').get(id=kept.id), (None, None, 'after lunch; glucose_value_trend: stable; ketone: n/a'))
+        self.assertEqual(levels.values_list('glucose_scan', 'notes').get(id=full.id), (None, "x" * 200))
+        self.assertIn('Non-numeric measurements: 2 moved to notes, 1 dropped', logs.output[-1])
+
+
+class ConversionTests(GlucoseAPITestCase):
+    """
+    Test case class for the conversion of text measurements into typed column values.
+    """
+
+    def test_parse_timestamp(self):
+        """
+        Test that ISO and LibreView timestamps are parsed into aware datetimes, naive ones as UTC.
+        """
+        expected = datetime(2024, 7, 6, 12, 30, tzinfo=timezone.utc)
+        self.assertEqual(parse_timestamp("2024-07-06T12:30:00"), expected)
+        self.assertEqual(parse_timestamp("2024-07-06T14:30:00+02:00"), expected)
+        self.assertEqual(parse_timestamp("06-07-2024 12:30"), expected)
+        self.assertIsNone(parse_timestamp(""))
+        with self.assertRaises(ValueError):
+            parse_timestamp("yesterday")
+
+    def test_parse_numbers(self):
+        """
+        Test that glucose values are rounded to whole mg/dL and decimals accept decimal commas.
+        """
+        self.assertEqual(parse_glucose("105"), 105)
+        self.assertEqual(parse_glucose(104.5), 105)
+        self.assertEqual(parse_decimal("1,5"), Decimal("1.50"))
+        self.assertIsNone(parse_decimal(None))
+        with self.assertRaises(ValueError):
+            parse_glucose("stable")
+        with self.assertRaises(ValueError):
+            parse_decimal("1e9")
+
+    def test_levels_are_ordered_by_time(self):
+        """
+        Test that sorting by device_timestamp is chronological rather than lexicographic.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        for timestamp in ("2024-07-10T08:00:00Z", "2024-07-09T23:00:00Z"):
+            GlucoseLevel.objects.create(metadata=metadata, device="D", serial_number="S", device_timestamp=timestamp, recording_type="0", glucose_value_trend=100)
+        response = self.client.get(reverse('get_levels_by_user_id'), {'user_id': 'user123', 'sort_by': 'device_timestamp'})
+        self.assertEqual([level['device_timestamp'] for level in response.data['results']], ["2024-07-09T23:00:00Z", "2024-07-10T08:00:00Z"])
+
+
+class KeysetPaginationTests(GlucoseAPITestCase):
+    """
+    Test case class for the cursor pagination of the 'get_levels_by_user_id' endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create a user with seven glucose levels, two of which share a device timestamp.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        timestamps = [datetime(2024, 7, 1, hour, tzinfo=timezone.utc) for hour in (0, 1, 2, 2, 3, 4, 5)]
+        self.levels = [
+            GlucoseLevel.objects.create(metadata=metadata, device="D", serial_number=str(i), device_timestamp=timestamp, recording_type="0", glucose_value_trend=100 + i)
+            for i, timestamp in enumerate(timestamps)
+        ]
+
+    def walk(self, params, link='next'):
+        """
+        Follow the given link from the first page and collect the ids of all pages.
+        """
+        response = self.client.get(reverse('get_levels_by_user_id'), params)
+        pages = [[level['id'] for level in response.data['results']]]
+        while response.data[link]:
+            response = self.client.get(response.data[link])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([level['id'] for level in response.data['results']])
+        return pages, response
+
+    def test_cursor_pages_cover_all_levels_in_order(self):
+        """
+        Test that following next cursors returns every level once, ordered by (device_timestamp, id).
+        """
+        pages, last_response = self.walk({'user_id': 'user123', 'pagination': 'cursor', 'limit': 2})
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual(sum(pages, []), [level.id for level in self.levels])
+        self.assertNotIn('count', last_response.data)
+
+        # Walking back from the last page returns the preceding pages
+        response = self.client.get(last_response.data['previous'])
+        self.assertEqual([level['id'] for level in response.data['results']], pages[-2])
+
+    def test_cursor_pages_descending(self):
+        """
+        Test that sort_by=-device_timestamp walks the levels from newest to oldest.
+        """
+        pages, _ = self.walk({'user_id': 'user123', 'pagination': 'cursor', 'limit': 3, 'sort_by': '-device_timestamp'})
+        self.assertEqual(sum(pages, []), [level.id for level in reversed(self.levels)])
+
+    def test_cursor_page_does_not_count(self):
+        """
+        Test that a cursor page issues no COUNT query.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('get_levels_by_user_id'), {'user_id': 'user123', 'pagination': 'cursor'})
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+    def test_invalid_cursor_and_sort(self):
+        """
+        Test that an invalid cursor returns 404 and an unsupported ordering returns 400.
+        """
+        url = reverse('get_levels_by_user_id')
+        response = self.client.get(url, {'user_id': 'user123', 'pagination': 'cursor', 'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(url, {'user_id': 'user123', 'pagination': 'cursor', 'sort_by': 'glucose_scan'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_time_range_and_device_filters(self):
+        """
+        Test that from/to, device and recording_type narrow the levels in the query.
+        """
+        url = reverse('get_levels_by_user_id')
+        response = self.client.get(url, {'user_id': 'user123', 'from': '2024-07-01T02:00:00Z', 'to': '2024-07-01T04:00:00Z'})
+        self.assertEqual(response.data['count'], 3)
+
+        response = self.client.get(url, {'user_id': 'user123', 'from': '2024-07-01T02:00:00Z', 'pagination': 'cursor', 'limit': 2})
+        self.assertEqual([level['id'] for level in response.data['results']], [self.levels[2].id, self.levels[3].id])
+
+        GlucoseLevel.objects.filter(id=self.levels[0].id).update(device="Other", recording_type="1")
+        response = self.client.get(url, {'user_id': 'user123', 'device': 'Other'})
+        self.assertEqual([level['id'] for level in response.data['results']], [self.levels[0].id])
+        response = self.client.get(url, {'user_id': 'user123', 'recording_type': '0'})
+        self.assertEqual(response.data['count'], 6)
+
+        response = self.client.get(url, {'user_id': 'user123', 'from': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+    def test_invalid_limit(self):
+        """
+        Test that non-numeric and non-positive limits are rejected with 400, in the async endpoint as well.
+        """
+        for url in (reverse('get_levels_by_user_id'), reverse('async_get_levels_by_user_id')):
+            for limit in ('abc', '0', '-3'):
+                response = self.client.get(url, {'user_id': 'user123', 'pagination': 'cursor', 'limit': limit})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, (url, limit))
+                self.assertIn('limit', response.json()['error'])
+
+    def test_limit_is_clamped(self):
+        """
+        Test that limits above max_page_size are reduced to it.
+        """
+        with mock.patch.object(KeysetPagination, 'max_page_size', 3):
+            response = self.client.get(reverse('get_levels_by_user_id'), {'user_id': 'user123', 'pagination': 'cursor', 'limit': 100000})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
+
+class GlucoseLevelRowSerializerTests(GlucoseAPITestCase):
+    """
+    Test case class for the fast read serializer.
+    """
+
+    def test_output_is_identical_to_model_serializer(self):
+        """
+        Test that rendering rows with GlucoseLevelRowSerializer gives the same bytes as GlucoseLevelSerializer.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        GlucoseLevel.objects.create(
+            metadata=metadata, device="Gerät", serial_number="SN1", recording_type="1",
+            device_timestamp=datetime(2024, 7, 1, 8, 30, 15, 123456, tzinfo=timezone.utc),
+            glucose_scan=104, rapid_acting_insulin=Decimal("4.5"), ketone=Decimal("0.1"), notes="Frühstück",
+        )
+        GlucoseLevel.objects.create(
+            metadata=metadata, device="Gerät", serial_number="SN1", recording_type="0",
+            device_timestamp=datetime(2024, 7, 1, 8, 45, tzinfo=timezone.utc), glucose_value_trend=99,
+        )
+        levels = GlucoseLevel.objects.order_by('id')
+        serializer = GlucoseLevelRowSerializer()
+
+        expected = JSONRenderer().render(GlucoseLevelSerializer(levels, many=True).data)
+        actual = JSONRenderer().render(serializer.serialize(serializer.select(levels)))
+
+        self.assertEqual(actual, expected)
+
+    def create_levels(self, count):
+        """
+        Create a user with the given number of CGM trend readings, 15 minutes apart.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        GlucoseLevel.objects.bulk_create(
+            GlucoseLevel(metadata=metadata, device="D", serial_number="S", recording_type="0",
+                         device_timestamp=datetime(2024, 7, 1, tzinfo=timezone.utc) + i * timedelta(minutes=15), glucose_value_trend=100 + i)
+            for i in range(count)
+        )
+
+    def test_fields_narrow_the_select(self):
+        """
+        Test that fields limits the output and the selected columns, while cursor pagination keeps working.
+        """
+        self.create_levels(3)
+        params = {"user_id": "user123", "fields": "device_timestamp,glucose_value_trend", "pagination": "cursor", "limit": 2}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("get_levels_by_user_id"), params)
+        select = queries.captured_queries[0]["sql"]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [
+            {"device_timestamp": "2024-07-01T00:00:00Z", "glucose_value_trend": 100},
+            {"device_timestamp": "2024-07-01T00:15:00Z", "glucose_value_trend": 101},
+        ])
+        self.assertIn("glucose_value_trend", select)
+        self.assertNotIn("ketone", select)
+        self.assertNotIn("serial_number", select)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"], [{"device_timestamp": "2024-07-01T00:30:00Z", "glucose_value_trend": 102}])
+
+    def test_omit_nulls(self):
+        """
+        Test that omit_nulls leaves out the fields without a value, also in the async endpoint.
+        """
+        self.create_levels(1)
+        expected = {"id", "metadata", "device", "serial_number", "device_timestamp", "recording_type", "glucose_value_trend"}
+        for url in (reverse("get_levels_by_user_id"), reverse("async_get_levels_by_user_id")):
+            response = self.client.get(url, {"user_id": "user123", "omit_nulls": "true"})
+            self.assertEqual(set(response.json()["results"][0]), expected)
+
+    def test_invalid_projection(self):
+        """
+        Test that unknown fields and invalid omit_nulls values are rejected with 400 Bad Request.
+        """
+        self.create_levels(1)
+        for params in ({"fields": "device,glucose"}, {"omit_nulls": "yes"}):
+            response = self.client.get(reverse("get_levels_by_user_id"), {"user_id": "user123", **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class GlucoseLevelExportTests(GlucoseAPITestCase):
+    """
+    Test case class for the columnar export endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create a user with three glucose levels on consecutive days.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        for day in (3, 1, 2):
+            GlucoseLevel.objects.create(
+                metadata=metadata, device="D", serial_number="S", recording_type="0",
+                device_timestamp=datetime(2024, 7, day, tzinfo=timezone.utc), glucose_value_trend=100 + day, ketone=Decimal("0.1"),
+            )
+
+    def export(self, **params):
+        """
+        Request an export of user123 and return the response with its streamed content.
+        """
+        response = self.client.get(reverse('export_levels'), {'user_id': 'user123', **params})
+        return response, b''.join(response.streaming_content)
+
+    def test_export_arrow(self):
+        """
+        Test that the Arrow IPC stream contains the typed levels in device time order.
+        """
+        response, content = self.export(**{'from': '2024-07-02T00:00:00Z'})
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.arrow.stream')
+        table = pa.ipc.open_stream(content).read_all()
+        self.assertEqual(table.column('glucose_value_trend').to_pylist(), [102, 103])
+        self.assertEqual(table.schema.field('device_timestamp').type, pa.timestamp('us', tz='UTC'))
+        self.assertEqual(table.column('ketone').to_pylist(), [Decimal("0.10"), Decimal("0.10")])
+
+    def test_export_parquet(self):
+        """
+        Test that the Parquet export contains every level of the user.
+        """
+        _, content = self.export(file_format='parquet')
+        table = pq.read_table(io.BytesIO(content))
+        self.assertEqual(table.column('glucose_value_trend').to_pylist(), [101, 102, 103])
+
+    def test_export_unknown_user_and_format(self):
+        """
+        Test that unknown users return 404 and unknown formats 400.
+        """
+        response = self.client.get(reverse('export_levels'), {'user_id': 'nobody'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('export_levels'), {'user_id': 'user123', 'file_format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class GlucoseLevelStatsTests(GlucoseAPITestCase):
+    """
+    Test case class for the glycemic metrics endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create a user with one CGM reading per glucose range, a scan and an insulin entry without glucose.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        readings = [("glucose_value_trend", 50), ("glucose_value_trend", 60), ("glucose_value_trend", 100), ("glucose_value_trend", 200), ("glucose_scan", 300), ("rapid_acting_insulin", 4)]
+        for hour, (field, value) in enumerate(readings):
+            GlucoseLevel.objects.create(
+                metadata=metadata, device="D", serial_number="S", recording_type="0",
+                device_timestamp=datetime(2024, 7, 1, hour, tzinfo=timezone.utc), **{field: value},
+            )
+
+    def test_get_level_stats(self):
+        """
+        Test that the metrics are computed over trend and scan values in a single query.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('get_level_stats'), {'user_id': 'user123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        values = [50, 60, 100, 200, 300]
+        mean = sum(values) / len(values)
+        sd = statistics.stdev(values)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(response.data['mean'], round(mean, 1))
+        self.assertEqual(response.data['sd'], round(sd, 1))
+        self.assertEqual(response.data['cv'], round(100 * sd / mean, 1))
+        self.assertEqual(response.data['gmi'], round(3.31 + 0.02392 * mean, 1))
+        self.assertEqual((response.data['min'], response.data['max']), (50, 300))
+        self.assertEqual(response.data['time_in_ranges'], {'very_low': 20.0, 'low': 20.0, 'in_range': 20.0, 'high': 20.0, 'very_high': 20.0})
+
+    def test_get_level_stats_window(self):
+        """
+        Test that from and to restrict the readings, and that an empty window has no metrics.
+        """
+        url = reverse('get_level_stats')
+        response = self.client.get(url, {'user_id': 'user123', 'from': '2024-07-01T02:00:00Z', 'to': '2024-07-01T04:00:00Z'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['mean'], 150.0)
+
+        response = self.client.get(url, {'user_id': 'user123', 'from': '2025-01-01T00:00:00Z'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+        self.assertIsNone(response.data['mean'])
+
+        response = self.client.get(url, {'user_id': 'nobody'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class GlucoseRollupTests(GlucoseAPITestCase):
+    """
+    Test case class for the hourly and daily rollups and the trend endpoint.
+    """
+
+    def test_rollups_follow_writes(self):
+        """
+        Test that inserting and updating readings refreshes the touched hourly and daily buckets.
+        """
+        levels = [
+            self.make_level(device_timestamp="2024-07-06T12:00:00", glucose_value_trend=60),
+            self.make_level(device_timestamp="2024-07-06T12:15:00", glucose_value_trend=100),
+            self.make_level(device_timestamp="2024-07-06T13:00:00", glucose_value_trend=200),
+            self.make_level(device_timestamp="2024-07-07T08:00:00", glucose_value_trend=120),
+        ]
+        self.client.post(reverse("create_levels"), data=levels, format="json")
+
+        hour = HourlyGlucoseRollup.objects.get(user_id="user123", bucket=datetime(2024, 7, 6, 12, tzinfo=timezone.utc))
+        self.assertEqual((hour.count, hour.total, hour.total_squares), (2, 160, 60 * 60 + 100 * 100))
+        self.assertEqual((hour.minimum, hour.maximum, hour.below, hour.in_range, hour.above), (60, 100, 1, 1, 0))
+        self.assertEqual(HourlyGlucoseRollup.objects.count(), 3)
+        day = DailyGlucoseRollup.objects.get(user_id="user123", bucket=datetime(2024, 7, 6, tzinfo=timezone.utc))
+        self.assertEqual((day.count, day.total, day.below, day.in_range, day.above), (3, 360, 1, 1, 1))
+
+        # Overwrite one reading of the first day
+        self.client.post(reverse("create_levels"), data=[self.make_level(device_timestamp="2024-07-06T12:00:00", glucose_value_trend=80)], format="json")
+        hour = HourlyGlucoseRollup.objects.get(user_id="user123", bucket=datetime(2024, 7, 6, 12, tzinfo=timezone.utc))
+        day = DailyGlucoseRollup.objects.get(user_id="user123", bucket=datetime(2024, 7, 6, tzinfo=timezone.utc))
+        self.assertEqual((hour.count, hour.total, hour.below, hour.in_range), (2, 180, 0, 2))
+        self.assertEqual((day.count, day.total, day.below), (3, 380, 0))
+        self.assertEqual(DailyGlucoseRollup.objects.get(bucket=datetime(2024, 7, 7, tzinfo=timezone.utc)).total, 120)
+
+    def test_rebuild_rollups_command(self):
+        """
+        Test that the rebuild_rollups command restores the rollups from the raw readings.
+        """
+        levels = [self.make_level(device_timestamp=f"2024-07-06T{hour:02d}:00:00", glucose_value_trend=100 + hour) for hour in range(24)]
+        self.client.post(reverse("create_levels"), data=levels, format="json")
+        expected = list(HourlyGlucoseRollup.objects.order_by('bucket').values())
+        HourlyGlucoseRollup.objects.all().delete()
+        DailyGlucoseRollup.objects.all().delete()
+
+        call_command('rebuild_rollups', stdout=io.StringIO())
+
+        actual = list(HourlyGlucoseRollup.objects.order_by('bucket').values())
+        self.assertEqual([{**row, 'id': None} for row in actual], [{**row, 'id': None} for row in expected])
+        self.assertEqual(DailyGlucoseRollup.objects.get().count, 24)
+
+    def test_get_level_trend(self):
+        """
+        Test that the trend endpoint summarizes every bucket from the rollups in a single query, days from the daily rollups.
+        """
+        levels = [
+            self.make_level(device_timestamp="2024-07-06T12:00:00", glucose_value_trend=60),
+            self.make_level(device_timestamp="2024-07-06T12:15:00", glucose_value_trend=100),
+            self.make_level(device_timestamp="2024-07-07T08:00:00", glucose_value_trend=120),
+        ]
+        self.client.post(reverse("create_levels"), data=levels, format="json")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("get_level_trend"), {"user_id": "user123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries.captured_queries), 1)
+        self.assertIn("glucose_dailyglucoserollup", queries.captured_queries[0]["sql"])
+        self.assertNotIn("glucose_hourlyglucoserollup", queries.captured_queries[0]["sql"])
+        first, second = response.data["results"]
+        self.assertEqual(first["bucket"], datetime(2024, 7, 6, tzinfo=timezone.utc))
+        self.assertEqual((first["count"], first["mean"], first["sd"], first["min"], first["max"]), (2, 80.0, round(statistics.stdev([60, 100]), 1), 60, 100))
+        self.assertEqual((second["count"], second["mean"], second["sd"]), (1, 120.0, None))
+
+        response = self.client.get(reverse("get_level_trend"), {"user_id": "user123", "resolution": "hour", "from": "2024-07-06T12:30:00Z"})
+        self.assertEqual([row["bucket"] for row in response.data["results"]], [datetime(2024, 7, 7, 8, tzinfo=timezone.utc)])
+
+        response = self.client.get(reverse("get_level_trend"), {"user_id": "user123", "resolution": "week"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_level_trend_local_days(self):
+        """
+        Test that daily buckets in a non-UTC time zone are local days summed from the hourly rollups.
+        """
+        levels = [
+            self.make_level(device_timestamp="2024-07-06T12:00:00+02:00", glucose_value_trend=60),
+            self.make_level(device_timestamp="2024-07-06T23:30:00+02:00", glucose_value_trend=100),
+            self.make_level(device_timestamp="2024-07-07T01:30:00+02:00", glucose_value_trend=120),
+        ]
+        self.client.post(reverse("create_levels"), data=levels, format="json")
+
+        response = self.client.get(reverse("get_level_trend"), {"user_id": "user123", "tz": "Europe/Berlin"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, second = response.data["results"]
+        self.assertEqual(first["bucket"], datetime(2024, 7, 5, 22, tzinfo=timezone.utc))
+        self.assertEqual((first["count"], first["mean"], first["min"], first["max"]), (2, 80.0, 60, 100))
+        self.assertEqual((second["count"], second["mean"]), (1, 120.0))
+
+        response = self.client.get(reverse("get_level_trend"), {"user_id": "user123", "tz": "Europe/Berlin", "from": "2024-07-06T12:00:00Z"})
+        self.assertEqual([row["count"] for row in response.data["results"]], [1])
+        response = self.client.get(reverse("get_level_trend"), {"user_id": "user123", "tz": "Mars/Olympus"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("get_level_trend"), {"user_id": "user123", "tz": "UTC"})
+        self.assertIn("glucose_dailyglucoserollup", queries.captured_queries[0]["sql"])
+
+
+class GlucoseLevelAgpTests(GlucoseAPITestCase):
+    """
+    Test case class for the Ambulatory Glucose Profile endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create 20 days of readings every 5 minutes with glucose values depending on day and time of day.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        self.start = datetime(2024, 7, 1, tzinfo=timezone.utc)
+        self.readings = []
+        for i in range(20 * 288):
+            timestamp = self.start + timedelta(minutes=5 * i)
+            value = 80 + (i % 288) // 3 + (i * 37) % 50
+            self.readings.append((timestamp, value))
+        GlucoseLevel.objects.bulk_create(
+            GlucoseLevel(metadata=metadata, device="D", serial_number="S", recording_type="0", device_timestamp=timestamp, glucose_value_trend=value)
+            for timestamp, value in self.readings
+        )
+
+    def test_get_level_agp(self):
+        """
+        Test that the percentiles of every time-of-day bucket match numpy.percentile.
+        """
+        params = {"user_id": "user123", "from": "2024-07-01T00:00:00Z", "to": "2024-07-15T00:00:00Z", "bucket_minutes": 60}
+        response = self.client.get(reverse("get_level_agp"), params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        window = [(timestamp, value) for timestamp, value in self.readings if timestamp < datetime(2024, 7, 15, tzinfo=timezone.utc)]
+        self.assertEqual(response.data["count"], len(window))
+        self.assertEqual(response.data["minutes"], list(range(0, 1440, 60)))
+        self.assertEqual(response.data["counts"], [14 * 12] * 24)
+        for hour in (0, 7, 23):
+            values = [value for timestamp, value in window if timestamp.hour == hour]
+            for percentile in (5, 25, 50, 75, 95):
+                self.assertAlmostEqual(response.data[f"p{percentile}"][hour], np.percentile(values, percentile), delta=0.05 + 1e-9)
+
+    def test_get_level_agp_defaults(self):
+        """
+        Test that the profile covers the 14 days before the latest reading by default and marks empty buckets.
+        """
+        response = self.client.get(reverse("get_level_agp"), {"user_id": "user123"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["from"], self.readings[-1][0] - timedelta(days=14))
+        self.assertEqual(len(response.data["p50"]), 96)
+
+        response = self.client.get(reverse("get_level_agp"), {"user_id": "user123", "from": "2025-01-01T00:00:00Z"})
+        self.assertEqual(response.data["count"], 0)
+        self.assertEqual(response.data["p50"], [None] * 96)
+
+        response = self.client.get(reverse("get_level_agp"), {"user_id": "user123", "bucket_minutes": 7})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse("get_level_agp"), {"user_id": "nobody"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_level_agp_time_zone(self):
+        """
+        Test that readings are binned by the local time of day of the tz parameter.
+        """
+        params = {"user_id": "user123", "from": "2024-07-01T00:00:00Z", "to": "2024-07-15T00:00:00Z", "bucket_minutes": 60}
+        utc = self.client.get(reverse("get_level_agp"), params).data
+        response = self.client.get(reverse("get_level_agp"), {**params, "tz": "America/New_York"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["tz"], "America/New_York")
+        self.assertEqual(response.data["count"], utc["count"])
+        # New York is at UTC-4 in July, so local hour h holds the readings of UTC hour h + 4
+        for hour in (0, 7, 20):
+            self.assertEqual(response.data["p50"][hour], utc["p50"][(hour + 4) % 24])
+
+        response = self.client.get(reverse("get_level_agp"), {**params, "tz": "Mars/Olympus"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_get_level_agp_utc_reads_timestamp_text(self):
+        """
+        Test that the time of day in UTC, by default or named, is sliced from the timestamp text instead of converted per row.
+        """
+        params = {"user_id": "user123", "bucket_minutes": 60}
+        for extra in ({}, {"tz": "UTC"}, {"tz": "Etc/UTC"}):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse("get_level_agp"), {**params, **extra})
+            self.assertEqual(response.data["tz"], "UTC")
+            self.assertFalse(any("django_datetime_extract" in query["sql"] for query in queries.captured_queries))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("get_level_agp"), {**params, "tz": "Europe/Berlin"})
+        self.assertTrue(any("django_datetime_extract" in query["sql"] for query in queries.captured_queries))
+
+
+class DownsamplingTests(GlucoseAPITestCase):
+    """
+    Test case class for downsampled glucose series on the levels endpoint.
+    """
+
+    def setUp(self):
+        """
+        Create 500 readings every 5 minutes around 120 mg/dL with a single high and a single low.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        start = datetime(2024, 7, 1, tzinfo=timezone.utc)
+        values = [120 + (i % 7) for i in range(500)]
+        values[123], values[321] = 350, 45
+        GlucoseLevel.objects.bulk_create(
+            GlucoseLevel(metadata=metadata, device="D", serial_number="S", recording_type="0", device_timestamp=start + timedelta(minutes=5 * i), glucose_value_trend=value)
+            for i, value in enumerate(values)
+        )
+        # An insulin entry without glucose value is not part of the series
+        GlucoseLevel.objects.create(metadata=metadata, device="D", serial_number="S", recording_type="4", device_timestamp=start + timedelta(minutes=1), rapid_acting_insulin=Decimal("4"))
+
+    def test_largest_triangle_three_buckets(self):
+        """
+        Test that the first, last and extreme points are kept and the requested number of points is returned.
+        """
+        x = np.arange(100, dtype=np.float64)
+        y = np.zeros(100)
+        y[40], y[70] = 10, -10
+        selected = largest_triangle_three_buckets(x, y, 10)
+        self.assertEqual(len(selected), 10)
+        self.assertEqual((selected[0], selected[-1]), (0, 99))
+        self.assertIn(40, selected)
+        self.assertIn(70, selected)
+        self.assertEqual(largest_triangle_three_buckets(x[:5], y[:5], 10), [0, 1, 2, 3, 4])
+
+    def test_get_levels_downsampled(self):
+        """
+        Test that points=N returns N full readings in time order that keep the high and the low, in two queries.
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("get_levels_by_user_id"), {"user_id": "user123", "points": 30})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 500)
+        results = response.data["results"]
+        self.assertEqual(len(results), 30)
+        self.assertEqual(results, sorted(results, key=lambda level: level["device_timestamp"]))
+        values = [level["glucose_value_trend"] for level in results]
+        self.assertIn(350, values)
+        self.assertIn(45, values)
+        self.assertEqual(set(results[0]), set(GlucoseLevelSerializer().fields))
+
+    def test_get_levels_downsampled_invalid(self):
+        """
+        Test that an invalid number of points is rejected and an unknown user is not found.
+        """
+        url = reverse("get_levels_by_user_id")
+        self.assertEqual(self.client.get(url, {"user_id": "user123", "points": "many"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {"user_id": "user123", "points": 2}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {"user_id": "nobody", "points": 10}).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class GlucoseCsvImportTests(GlucoseAPITestCase):
+    """
+    Test case class for the import_glucose_csv management command.
+    """
+
+    HEADER = ["Gerät", "Seriennummer", "Gerätezeitstempel", "Aufzeichnungstyp", "Glukosewert-Verlauf mg/dL", "Glukose-Scan mg/dL", "Schnellwirkendes Insulin (Einheiten)"]
+
+    def write_export(self, directory, user_id, rows):
+        """
+        Write a LibreView CSV export with the given data rows and return its path.
+        """
+        path = os.path.join(directory, f"{user_id}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["Glukose-Daten", "Erstellt am", "06-07-2024 12:34 UTC", "Erstellt von", "doctor_jane"])
+            writer.writerow(self.HEADER)
+            writer.writerows(rows)
+        return path
+
+    def test_import_directory(self):
+        """
+        Test that every export of a directory is imported, invalid rows are reported and re-imports update.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            self.write_export(directory, "user1", [
+                ["FreeStyle LibreLink", "SN1", "06-07-2024 08:00", "0", "104", "", ""],
+                ["FreeStyle LibreLink", "SN1", "06-07-2024 08:15", "1", "", "120", ""],
+                ["FreeStyle LibreLink", "SN1", "not a date", "0", "99", "", ""],
+            ])
+            os.makedirs(os.path.join(directory, "nested"))
+            self.write_export(os.path.join(directory, "nested"), "user2", [
+                ["FreeStyle LibreLink", "SN2", "07-07-2024 09:00", "4", "", "", "2,5"],
+            ])
+            stdout, stderr = io.StringIO(), io.StringIO()
+            call_command("import_glucose_csv", directory, workers=1, stdout=stdout, stderr=stderr)
+            call_command("import_glucose_csv", directory, workers=1, stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.assertIn("Imported 3 rows from 2 files", stdout.getvalue())
+        self.assertIn("user1.csv:5:", stderr.getvalue())
+        self.assertEqual(GlucoseLevelMetadata.objects.count(), 2)
+        self.assertEqual(GlucoseLevel.objects.count(), 3)
+        metadata = GlucoseLevelMetadata.objects.get(user_id="user1")
+        self.assertEqual((metadata.created_at, metadata.created_by), (datetime(2024, 7, 6, 12, 34, tzinfo=timezone.utc), "doctor_jane"))
+        scan = GlucoseLevel.objects.get(metadata=metadata, recording_type="1")
+        self.assertEqual((scan.device_timestamp, scan.glucose_scan), (datetime(2024, 7, 6, 8, 15, tzinfo=timezone.utc), 120))
+        self.assertEqual(GlucoseLevel.objects.get(metadata__user_id="user2").rapid_acting_insulin, Decimal("2.50"))
+        self.assertEqual(DailyGlucoseRollup.objects.get(user_id="user1").count, 2)
+
+    def test_import_in_worker_processes(self):
+        """
+        Test that exports parsed in worker processes are written, and that a file with an unknown header fails the command.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [
+                self.write_export(directory, f"user{i}", [["FreeStyle LibreLink", "SN1", f"06-07-2024 08:{minute:02d}", "0", "100", "", ""] for minute in range(10)])
+                for i in range(3)
+            ]
+            with open(os.path.join(directory, "broken.csv"), "w") as csvfile:
+                csvfile.write("Glukose-Daten,Erstellt am,06-07-2024 12:34 UTC,Erstellt von,doctor_jane\nUnbekannt\n")
+            with self.assertRaises(CommandError):
+                call_command("import_glucose_csv", *paths, os.path.join(directory, "broken.csv"), workers=2, stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.assertEqual(GlucoseLevel.objects.count(), 30)
+
+
+class FieldMappingTests(GlucoseAPITestCase):
+    """
+    Test case class for the mapping of export column headers to GlucoseLevel fields.
+    """
+
+    def test_get_field_from_verbose(self):
+        """
+        Test that German verbose names, field names and English LibreView headers map to fields regardless of case and spacing.
+        """
+        meta = GlucoseLevel._meta
+        self.assertEqual(get_field_from_verbose(meta, "Gerätezeitstempel"), "device_timestamp")
+        self.assertEqual(get_field_from_verbose(meta, "Glukosewert-Verlauf mg/dL"), "glucose_value_trend")
+        self.assertEqual(get_field_from_verbose(meta, "Historic Glucose mg/dL"), "glucose_value_trend")
+        self.assertEqual(get_field_from_verbose(meta, "  device   TIMESTAMP "), "device_timestamp")
+        self.assertEqual(get_field_from_verbose(meta, "carbohydrates_grams"), "carbohydrates_grams")
+        self.assertIs(get_verbose_name_index(meta), get_verbose_name_index(meta))
+
+    def test_unknown_header_lists_close_matches(self):
+        """
+        Test that an unknown header raises a KeyError naming the closest known headers.
+        """
+        with self.assertRaises(KeyError) as context:
+            get_field_from_verbose(GlucoseLevel._meta, "Glukosewert-Verlauf mmol/L")
+        self.assertIn("glukosewert-verlauf mg/dl", str(context.exception))
+
+
+class ResponseCacheTests(GlucoseAPITestCase):
+    """
+    Test case class for the per-user response cache and the conditional GET support of the read endpoints.
+    """
+
+    def post_levels(self, levels):
+        """
+        Post levels to the 'create_levels' endpoint and run the callbacks of the committed transaction.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse("create_levels"), data=levels, format="json")
+
+    def test_levels_page_is_cached_until_write(self):
+        """
+        Test that repeated page requests are served from the cache and a write of the user invalidates them.
+        """
+        self.post_levels([self.make_level(0, recording_type="1", glucose_scan=100)])
+        url = reverse("get_levels_by_user_id")
+        before = counters.snapshot()
+
+        self.client.get(url, {"user_id": "user123", "limit": 5})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {"limit": 5, "user_id": "user123"})
+        self.assertEqual(response.data["count"], 1)
+        with self.assertNumQueries(2):
+            self.client.get(url, {"user_id": "user123", "limit": 6})
+
+        after = counters.snapshot()
+        self.assertEqual((after["hits"] - before["hits"], after["misses"] - before["misses"]), (1, 2))
+
+        self.post_levels([self.make_level(15, recording_type="1", glucose_scan=120)])
+        response = self.client.get(url, {"user_id": "user123", "limit": 5})
+        self.assertEqual(response.data["count"], 2)
+
+    def test_stats_are_cached_until_write(self):
+        """
+        Test that the metrics endpoint is cached per user and recomputed after a write.
+        """
+        self.post_levels([self.make_level(0, recording_type="1", glucose_scan=100)])
+        url = reverse("get_level_stats")
+        self.client.get(url, {"user_id": "user123"})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, {"user_id": "user123"}).data["mean"], 100.0)
+        self.post_levels([self.make_level(0, recording_type="1", glucose_scan=140)])
+        self.assertEqual(self.client.get(url, {"user_id": "user123"}).data["mean"], 140.0)
+
+    def test_level_by_id_is_cached_until_write(self):
+        """
+        Test that a level is served from the cache while its user's data is unchanged.
+        """
+        response = self.post_levels([self.make_level(0, recording_type="1", glucose_scan=100)])
+        url = reverse("get_level_by_id", args=[response.data["glucose_levels"][0]["id"]])
+
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data["glucose_scan"], 100)
+
+        self.post_levels([self.make_level(0, recording_type="1", glucose_scan=130)])
+        self.assertEqual(self.client.get(url).data["glucose_scan"], 130)
+
+    def test_level_by_id_write_during_miss(self):
+        """
+        Test that a write committed while a level is loaded is not cached under the newer version.
+        """
+        response = self.post_levels([self.make_level(0, recording_type="1", glucose_scan=100)])
+        level_id = response.data["glucose_levels"][0]["id"]
+        url = reverse("get_level_by_id", args=[level_id])
+
+        def write_then_get_version(user_id):
+            GlucoseLevel.objects.filter(id=level_id).update(glucose_scan=130)
+            bump_user_versions([user_id])
+            return get_user_version(user_id)
+
+        with mock.patch("glucose.views.get_user_version", side_effect=write_then_get_version):
+            self.client.get(url)
+        self.assertEqual(self.client.get(url).data["glucose_scan"], 130)
+
+    def test_get_cache_stats(self):
+        """
+        Test that the cache counters are exposed.
+        """
+        response = self.client.get(reverse("get_cache_stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"hits", "misses", "not_modified", "hit_ratio"})
+
+    def test_levels_page_not_modified(self):
+        """
+        Test that a matching If-None-Match header returns 304 without queries until the user's data changes.
+        """
+        self.post_levels([self.make_level(0, recording_type="1", glucose_scan=100)])
+        url = reverse("get_levels_by_user_id")
+        params = {"user_id": "user123", "limit": 5}
+
+        etag = self.client.get(url, params)["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        with self.assertNumQueries(0):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=f'"other", W/{etag}').status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotEqual(self.client.get(url, {**params, "limit": 6})["ETag"], etag)
+
+        self.post_levels([self.make_level(15, recording_type="1", glucose_scan=120)])
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_level_by_id_not_modified(self):
+        """
+        Test that a level answers a matching If-None-Match header with 304, also when it is no longer cached.
+        """
+        response = self.post_levels([self.make_level(0, recording_type="1", glucose_scan=100)])
+        level_id = response.data["glucose_levels"][0]["id"]
+        url = reverse("get_level_by_id", args=[level_id])
+
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        response_cache().delete(f"glucose:level:{level_id}")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.post_levels([self.make_level(0, recording_type="1", glucose_scan=130)])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+class AsyncViewsTests(GlucoseAPITestCase):
+    """
+    Test case class for the async read and create endpoints, which must answer like the synchronous ones.
+    """
+
+    def setUp(self):
+        """
+        Create a user with five glucose levels and record the responses of the synchronous endpoints.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        self.levels = [
+            GlucoseLevel.objects.create(metadata=metadata, device="D", serial_number=str(i), device_timestamp=datetime(2024, 7, 1, i, tzinfo=timezone.utc), recording_type="0", glucose_value_trend=100 + i)
+            for i in range(5)
+        ]
+        self.params = {'user_id': 'user123', 'limit': 2, 'page': 2, 'from': '2024-07-01T01:00:00Z'}
+        self.page = json.loads(self.client.get(reverse('get_levels_by_user_id'), self.params).content)
+        self.level = json.loads(self.client.get(reverse('get_level_by_id', args=[self.levels[0].id])).content)
+        self.downsampled = json.loads(self.client.get(reverse('get_levels_by_user_id'), {'user_id': 'user123', 'points': 3}).content)
+
+    async def test_levels_page_matches_sync(self):
+        """
+        Test that a numbered page equals the page of the synchronous endpoint, apart from the URL prefix of the links.
+        """
+        response = await self.async_client.get(reverse('async_get_levels_by_user_id'), self.params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(data['results'], self.page['results'])
+        self.assertEqual(data['previous'], self.page['previous'].replace('/api/v1/', '/api/v1/async/'))
+        self.assertIsNone(data['next'])
+
+    async def test_levels_cursor_pages(self):
+        """
+        Test that following the next cursors returns every level once in order.
+        """
+        response = await self.async_client.get(reverse('async_get_levels_by_user_id'), {'user_id': 'user123', 'pagination': 'cursor', 'limit': 2})
+        ids = [level['id'] for level in response.json()['results']]
+        while response.json()['next']:
+            response = await self.async_client.get(response.json()['next'])
+            ids += [level['id'] for level in response.json()['results']]
+        self.assertEqual(ids, [level.id for level in self.levels])
+
+    async def test_levels_errors(self):
+        """
+        Test that a missing user_id returns 400, an unknown user and an invalid page 404, and other methods 405.
+        """
+        url = reverse('async_get_levels_by_user_id')
+        self.assertEqual((await self.async_client.get(url)).status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.async_client.get(url, {'user_id': 'nobody'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json(), {'error': 'User is not found'})
+        self.assertEqual((await self.async_client.get(url, {'user_id': 'user123', 'page': 9})).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual((await self.async_client.post(url)).status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_levels_limit(self):
+        """
+        Test that a limit that is not a positive integer returns 400 and a limit above the maximum page size is reduced to it.
+        """
+        url = reverse('async_get_levels_by_user_id')
+        for limit, error in (('abc', 'Invalid limit parameter: abc'), ('0', 'limit must be a positive integer'), ('-1', 'limit must be a positive integer')):
+            response = await self.async_client.get(url, {'user_id': 'user123', 'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.json(), {'error': error})
+        with mock.patch.object(KeysetPagination, 'max_page_size', 2):
+            response = await self.async_client.get(url, {'user_id': 'user123', 'limit': 5000})
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(data['count'], 5)
+        self.assertIn('page=2', data['next'])
+
+    async def test_levels_downsampled(self):
+        """
+        Test that points=N returns the downsampled series of the synchronous endpoint and an invalid points value 400.
+        """
+        response = await self.async_client.get(reverse('async_get_levels_by_user_id'), {'user_id': 'user123', 'points': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), self.downsampled)
+        self.assertEqual(len(response.json()['results']), 3)
+        response = await self.async_client.get(reverse('async_get_levels_by_user_id'), {'user_id': 'user123', 'points': 2})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_level_by_id(self):
+        """
+        Test that a level equals the response of the synchronous endpoint and an unknown id returns 404.
+        """
+        response = await self.async_client.get(reverse('async_get_level_by_id', args=[self.levels[0].id]))
+        self.assertEqual(response.json(), self.level)
+        response = await self.async_client.get(reverse('async_get_level_by_id', args=[0]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_create_levels(self):
+        """
+        Test that posted levels are upserted and returned, and an empty body returns 400.
+        """
+        level = self.make_level(recording_type="1", glucose_scan="140")
+        url = reverse('async_create_levels')
+        response = await self.async_client.post(url, json.dumps([level]), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['glucose_levels'][0]['glucose_scan'], 140)
+        self.assertEqual(await GlucoseLevel.objects.filter(metadata__user_id='user123').acount(), 6)
+
+        response = await self.async_client.post(url, '[]', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_csrf_exempt(self):
+        """
+        Test that the async endpoints, like the DRF views, are exempt from CSRF checks.
+        """
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(reverse('async_create_levels'), '[]', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.post(reverse('create_levels'), '[]', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for name, args in (('async_get_levels_by_user_id', []), ('async_get_level_by_id', [self.levels[0].id])):
+            self.assertEqual(client.post(reverse(name, args=args)).status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+class IngestionJobTests(GlucoseAPITestCase):
+    """
+    Test case class for the background ingestion of uploads queued with mode=background.
+    """
+
+    def make_levels(self, count):
+        """
+        Build count glucose scan payloads 15 minutes apart.
+        """
+        return [self.make_level(15 * i, recording_type="1", glucose_scan=str(100 + i)) for i in range(count)]
+
+    def process_jobs(self):
+        call_command("process_ingestion_jobs", "--once", stdout=io.StringIO())
+
+    def test_background_upload_is_accepted_and_processed(self):
+        """
+        Test that a background upload is answered with 202 before any level is written and that the worker ingests it.
+        """
+        response = self.client.post(reverse("create_levels") + "?mode=background", data=self.make_levels(3), format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "queued")
+        self.assertNotIn("payload", response.data)
+        self.assertEqual(response["Location"], reverse("get_ingestion_job", args=[response.data["id"]]))
+        self.assertFalse(GlucoseLevel.objects.exists())
+
+        self.process_jobs()
+        job = self.client.get(response["Location"]).data
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual((job["total_rows"], job["processed_rows"], job["inserted"], job["updated"], job["rejected"]), (3, 3, 3, 0, 0))
+        self.assertEqual(GlucoseLevel.objects.filter(metadata__user_id="user123").count(), 3)
+        self.assertEqual(IngestionJob.objects.get(id=job["id"]).payload, "")
+
+    def test_rejected_rows_and_invalid_payloads(self):
+        """
+        Test that unparseable rows are reported by position, invalid payloads fail the job and empty uploads return 400.
+        """
+        levels = self.make_levels(2)
+        del levels[1]["device"]
+        valid = enqueue_ingestion(json.dumps(levels))
+        invalid = enqueue_ingestion('{"user_id": "user123"}')
+        self.process_jobs()
+
+        valid.refresh_from_db()
+        self.assertEqual((valid.status, valid.inserted, valid.rejected), (IngestionJob.Status.SUCCEEDED, 1, 1))
+        self.assertEqual(valid.errors[0]["line"], 2)
+        invalid.refresh_from_db()
+        self.assertEqual(invalid.status, IngestionJob.Status.FAILED)
+        self.assertIn("JSON array", invalid.error)
+
+        response = self.client.post(reverse("create_levels") + "?mode=background", data=[], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(reverse("get_ingestion_job", args=[0])).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stale_job_is_claimed_again_and_resumes(self):
+        """
+        Test that a job whose worker went silent is claimed by another worker, which continues after the last
+        committed batch, while the first worker can no longer save progress.
+        """
+        job = enqueue_ingestion(json.dumps(self.make_levels(4)))
+        first = claim_next_job()
+        self.assertIsNone(claim_next_job())
+        first.processed_rows = 2
+        save_progress(first, None)
+        IngestionJob.objects.filter(id=job.id).update(heartbeat_at=datetime(2024, 1, 1, tzinfo=timezone.utc))
+
+        second = claim_next_job()
+        self.assertEqual((second.id, second.attempts, second.processed_rows), (job.id, 2, 2))
+        with self.assertRaises(LeaseLost):
+            save_progress(first, None)
+        process_job(second, batch_size=1)
+        self.assertEqual((second.status, second.inserted, second.processed_rows), (IngestionJob.Status.SUCCEEDED, 2, 4))
+        self.assertEqual(GlucoseLevel.objects.count(), 2)
+
+    def test_worker_closes_old_connections_before_every_claim(self):
+        """
+        Test that the worker closes failed and expired connections before each claim, including the one that finds the queue empty.
+        """
+        for _ in range(2):
+            enqueue_ingestion(json.dumps(self.make_levels(1)))
+        calls = mock.Mock()
+        with mock.patch("glucose.jobs.close_old_connections", calls.close_old_connections), \
+                mock.patch("glucose.jobs.claim_next_job", calls.claim_next_job) as claim:
+            claim.side_effect = claim_next_job
+            self.assertEqual(run_worker(once=True), 2)
+        self.assertEqual([name for name, args, kwargs in calls.mock_calls], ["close_old_connections", "claim_next_job"] * 3)
+
+class SqliteBackendTests(GlucoseAPITestCase):
+    """
+    Test case class for the tuned SQLite backend of the default database profile.
+    """
+
+    def open(self, path, timeout):
+        """
+        Open a new connection of the configured backend to the database file at path.
+        """
+        wrapper = SqliteDatabaseWrapper({**connection.settings_dict, 'NAME': path, 'OPTIONS': {'timeout': timeout}})
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_pragmas_and_immediate_transactions(self):
+        """
+        Test that new connections use WAL with synchronous=NORMAL and that transactions take the write lock when they begin.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'db.sqlite3')
+            first, second = self.open(path, 5), self.open(path, 0)
+            with first.cursor() as cursor:
+                self.assertEqual(cursor.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+                self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone()[0], 1)
+
+            first._start_transaction_under_autocommit()
+            with self.assertRaisesMessage(Exception, 'database is locked'):
+                second._start_transaction_under_autocommit()
+            first.cursor().execute('ROLLBACK')
+            second._start_transaction_under_autocommit()
+            second.cursor().execute('ROLLBACK')
+
+    def test_conn_max_age_defaults(self):
+        """
+        Test that connections persist for 60 seconds under WSGI, are closed after every request under ASGI, and that CONN_MAX_AGE overrides both.
+        """
+        path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'glucoseapi', 'settings.py')
+        for environ, expected in (({}, 60), ({'GLUCOSE_SERVER': 'asgi'}, 0), ({'GLUCOSE_SERVER': 'asgi', 'CONN_MAX_AGE': '30'}, 30), ({'CONN_MAX_AGE': ''}, None)):
+            with self.subTest(environ=environ), mock.patch.dict(os.environ, environ):
+                for name in {'GLUCOSE_SERVER', 'CONN_MAX_AGE'} - environ.keys():
+                    os.environ.pop(name, None)
+                self.assertEqual(runpy.run_path(path)['DATABASES']['default']['CONN_MAX_AGE'], expected)
+
+class InstrumentationTests(GlucoseAPITestCase):
+    """
+    Test case class for the per-request performance middleware, the metrics endpoint and the slow request log.
+    """
+
+    def setUp(self):
+        """
+        Create a user with three glucose levels and start with empty metrics.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        for i in range(3):
+            GlucoseLevel.objects.create(metadata=metadata, device="D", serial_number="1", device_timestamp=datetime(2024, 7, 1, i, tzinfo=timezone.utc), recording_type="0", glucose_value_trend=100 + i)
+        registry.reset()
+
+    def metric(self, text, name):
+        """
+        Return the value of the sample with the given name and labels from Prometheus text.
+        """
+        for line in text.splitlines():
+            if line.startswith(name + " "):
+                return float(line.rsplit(" ", 1)[1])
+        self.fail(f"{name} not found")
+
+    def test_metrics_per_route(self):
+        """
+        Test that the wall time, queries, serializer time and response size of a request are recorded under its route.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("get_levels_by_user_id"), {"user_id": "user123", "pagination": "cursor"})
+        query_count = len(queries.captured_queries)
+
+        metrics = self.client.get(reverse("get_metrics"))
+        self.assertEqual(metrics["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        text = metrics.content.decode()
+        labels = '{route="api/v1/levels/",method="GET"}'
+        self.assertEqual(self.metric(text, f"glucose_request_duration_seconds_count{labels}"), 1)
+        self.assertEqual(self.metric(text, f"glucose_request_db_queries_sum{labels}"), query_count)
+        self.assertGreater(self.metric(text, f"glucose_request_serializer_duration_seconds_sum{labels}"), 0)
+        self.assertEqual(self.metric(text, f"glucose_response_bytes_sum{labels}"), len(response.content))
+        self.assertEqual(self.metric(text, 'glucose_request_db_queries_bucket{route="api/v1/levels/",method="GET",le="+Inf"}'), 1)
+        self.assertIn("glucose_cache_misses_total", text)
+
+    async def test_metrics_of_async_views(self):
+        """
+        Test that the middleware runs asynchronously before async handlers and records the queries of async views.
+        """
+        async def get_async_response(request):
+            return HttpResponse()
+
+        self.assertTrue(iscoroutinefunction(PerformanceMiddleware(get_async_response)))
+        self.assertFalse(iscoroutinefunction(PerformanceMiddleware(lambda request: HttpResponse())))
+
+        response = await self.async_client.get(reverse("async_get_levels_by_user_id"), {"user_id": "user123", "pagination": "cursor"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        text = (await self.async_client.get(reverse("get_metrics"))).content.decode()
+        labels = '{route="api/v1/async/levels/",method="GET"}'
+        self.assertEqual(self.metric(text, f"glucose_request_duration_seconds_count{labels}"), 1)
+        self.assertGreater(self.metric(text, f"glucose_request_db_queries_sum{labels}"), 0)
+        self.assertEqual(self.metric(text, f"glucose_response_bytes_sum{labels}"), len(response.content))
+
+    def test_model_serializer_is_timed_once_per_list(self):
+        """
+        Test that a list serialized with a model serializer is timed once, not once per row.
+        """
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            with mock.patch("glucose.serializers.timed_serialization", wraps=timed_serialization) as timer:
+                data = GlucoseLevelSerializer(GlucoseLevel.objects.all(), many=True).data
+        finally:
+            current_metrics.reset(token)
+        self.assertEqual(len(data), 3)
+        self.assertEqual(timer.call_count, 1)
+        self.assertGreater(metrics.serializer_seconds, 0)
+
+    def test_slow_request_log(self):
+        """
+        Test that requests over the threshold are logged with their SQL and that None disables the log.
+        """
+        url = reverse("get_levels_by_user_id")
+        with override_settings(GLUCOSE_SLOW_REQUEST_SECONDS=0), self.assertLogs("glucose.slow_requests", "WARNING") as logs:
+            self.client.get(url, {"user_id": "user123"})
+        self.assertIn("api/v1/levels/", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+        with override_settings(GLUCOSE_SLOW_REQUEST_SECONDS=None), self.assertNoLogs("glucose.slow_requests", "WARNING"):
+            self.client.get(url, {"user_id": "user123", "limit": 2})
+
+class OrjsonTests(GlucoseAPITestCase):
+    """
+    Test case class for the orjson renderer and parser.
+    """
+
+    def test_renderer_matches_drf(self):
+        """
+        Test that the renderer produces the same bytes as DRF's JSON renderer.
+        """
+        data = {
+            "datetime": datetime(2024, 7, 6, 12, 30, 15, 123456, tzinfo=timezone.utc),
+            "offset": datetime(2024, 7, 6, 12, 30, tzinfo=timezone(timedelta(hours=2))),
+            "naive": datetime(2024, 7, 6, 12, 30, 15, 500),
+            "date": datetime(2024, 7, 6).date(),
+            "decimal": Decimal("2.50"),
+            "uuid": uuid.UUID(int=1),
+            "numpy": np.array([1.5, 2.0]),
+            "numpy_scalar": np.float64(0.25),
+            "text": "Zucker \u2028 mg/dL \u2029 \u00fc",
+            "error": ErrorDetail("invalid", code="invalid"),
+            "tuple": (1, None, True, 12.5),
+            1: "integer key",
+        }
+        self.assertEqual(OrjsonRenderer().render(data), JSONRenderer().render(data))
+        # Integers beyond 64 bits are left to DRF's renderer.
+        self.assertEqual(OrjsonRenderer().render({"big": 2 ** 70}), JSONRenderer().render({"big": 2 ** 70}))
+        self.assertEqual(OrjsonRenderer().render(data, "application/json; indent=2"), JSONRenderer().render(data, "application/json; indent=2"))
+        self.assertEqual(OrjsonRenderer().render(None), b"")
+
+    def test_renderer_float_differences(self):
+        """
+        Test the accepted differences to DRF's renderer: shortest float exponents and null for non-finite floats.
+        """
+        renderer = OrjsonRenderer()
+        self.assertEqual(renderer.render([0.5, 1e-4, 1e15]), JSONRenderer().render([0.5, 1e-4, 1e15]))
+        self.assertEqual(renderer.render([1e-7, 1e-5, 1e16]), b"[1e-7,0.00001,1e16]")
+        self.assertEqual(JSONRenderer().render([1e-7, 1e-5, 1e16]), b"[1e-07,1e-05,1e+16]")
+        self.assertEqual(renderer.render({"mean": float("nan"), "max": float("inf")}), b'{"mean":null,"max":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({"mean": float("nan")})
+
+    def test_responses_match_drf(self):
+        """
+        Test that level pages and stats are rendered exactly like with DRF's JSON renderer.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        for i in range(3):
+            GlucoseLevel.objects.create(metadata=metadata, device="D", serial_number="1", device_timestamp=datetime(2024, 7, 1, i, 0, 0, 250000, tzinfo=timezone.utc), recording_type="0", glucose_value_trend=100 + i, ketone=Decimal("0.3"))
+        for url, params in ((reverse("get_levels_by_user_id"), {"user_id": "user123"}), (reverse("get_level_stats"), {"user_id": "user123"}), (reverse("get_level_trend"), {"user_id": "user123", "resolution": "hour"})):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_parser(self):
+        """
+        Test that the parser decodes UTF-8 bodies and rejects invalid JSON and NaN like DRF's parser.
+        """
+        parser = OrjsonParser()
+        self.assertEqual(parser.parse(io.BytesIO('[{"notes": "\u00fc", "value": 1.5}]'.encode())), [{"notes": "\u00fc", "value": 1.5}])
+        self.assertEqual(parser.parse(io.BytesIO('{"notes": "\u00fc"}'.encode("latin-1")), parser_context={"encoding": "latin-1"}), {"notes": "\u00fc"})
+        for body in (b"[{]", b"[NaN]"):
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(body))
+
+    def test_create_levels_malformed_json(self):
+        """
+        Test that a malformed JSON upload is answered with 400 Bad Request.
+        """
+        response = self.client.post(reverse("create_levels"), "[{", content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("JSON parse error", response.data["error"])
+
+class CompressionTests(GlucoseAPITestCase):
+    """
+    Test case class for the negotiated response compression.
+    """
+
+    def setUp(self):
+        """
+        Create a user with 50 glucose levels.
+        """
+        metadata = GlucoseLevelMetadata.objects.create(user_id="user123", created_at=datetime(2024, 7, 1, tzinfo=timezone.utc), created_by="test")
+        GlucoseLevel.objects.bulk_create(
+            GlucoseLevel(metadata=metadata, device="D", serial_number="S", recording_type="0",
+                         device_timestamp=datetime(2024, 7, 1, tzinfo=timezone.utc) + i * timedelta(minutes=15), glucose_value_trend=100 + i)
+            for i in range(50)
+        )
+
+    def test_negotiate_encoding(self):
+        """
+        Test that brotli is preferred when available and that q=0 and unknown codings are refused.
+        """
+        with mock.patch("glucose.middleware.brotli", None):
+            self.assertEqual(negotiate_encoding("gzip, deflate, br"), "gzip")
+        with mock.patch("glucose.middleware.brotli", object()):
+            self.assertEqual(negotiate_encoding("gzip, deflate, br"), "br")
+            self.assertEqual(negotiate_encoding("br;q=0.5, gzip"), "gzip")
+            self.assertEqual(negotiate_encoding("*;q=0.1, br;q=0"), "gzip")
+        self.assertIsNone(negotiate_encoding(""))
+        self.assertIsNone(negotiate_encoding("deflate, gzip;q=0"))
+
+    def test_gzip_page(self):
+        """
+        Test that large pages are gzip compressed with a weak ETag and small responses are sent as they are.
+        """
+        params = {"user_id": "user123", "limit": 50}
+        plain = self.client.get(reverse("get_levels_by_user_id"), params)
+        response = self.client.get(reverse("get_levels_by_user_id"), params, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content) / 5)
+        self.assertEqual(response["ETag"], "W/" + plain["ETag"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+
+        response = self.client.get(reverse("get_levels_by_user_id"), {"user_id": "user123", "limit": 1}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_gzip_stream(self):
+        """
+        Test that streamed Arrow exports are compressed chunk by chunk and Parquet exports are not compressed.
+        """
+        response = self.client.get(reverse("export_levels"), {"user_id": "user123"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        table = pa.ipc.open_stream(gzip.decompress(b"".join(response.streaming_content))).read_all()
+        self.assertEqual(table.num_rows, 50)
+
+        response = self.client.get(reverse("export_levels"), {"user_id": "user123", "file_format": "parquet"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    async def test_gzip_async(self):
+        """
+        Test that pages of async views and async streams are compressed by the middleware running asynchronously.
+        """
+        url = reverse("async_get_levels_by_user_id")
+        params = {"user_id": "user123", "limit": 50, "pagination": "cursor"}
+        plain = await self.async_client.get(url, params)
+        response = await self.async_client.get(url, params, headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+        async def chunks():
+            for chunk in (b"[1,", b"2]"):
+                yield chunk
+
+        async def get_response(request):
+            return StreamingHttpResponse(chunks(), content_type="application/json")
+
+        middleware = CompressionMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(b"".join([chunk async for chunk in response.streaming_content])), b"[1,2]")
+
+    def test_asgi_middleware_chain_is_async(self):
+        """
+        Test that no middleware makes Django adapt the ASGI handler chain to synchronous code.
+        """
+        # Django logs every adapted handler in debug mode.
+        with override_settings(DEBUG=True), self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
+
+class SyntheticDataTests(GlucoseAPITestCase):
+    """
+    Test case class for the synthetic CGM history generator and the generate_glucose_data command.
+    """
+
+    def test_history_is_reproducible_and_plausible(self):
+        """
+        Test that a history has a reading every 15 minutes plus scans and insulin and food events, and is the same for the same seed.
+        """
+        history = list(generate_history("user123", 2))
+        self.assertEqual(history, list(generate_history("user123", 2)))
+        self.assertNotEqual(history, list(generate_history("user123", 2, seed=1)))
+
+        by_type = {}
+        for level in history:
+            by_type.setdefault(level["recording_type"], []).append(level)
+        self.assertEqual(len(by_type["0"]), 2 * 96)
+        self.assertTrue(6 <= len(by_type["1"]) <= 16)
+        self.assertEqual(len(by_type["4"]), 2 * 4)
+        self.assertEqual(len(by_type["5"]), 2 * 3)
+        self.assertEqual(len({level["device_timestamp"] for level in history}), len(history))
+        self.assertTrue(all(40 <= int(level["glucose_value_trend"]) <= 400 for level in by_type["0"]))
+        self.assertGreater(statistics.pstdev(int(level["glucose_value_trend"]) for level in by_type["0"]), 10)
+
+    def test_command_upserts_histories(self):
+        """
+        Test that the command writes the histories with their rollups and that running it again does not duplicate rows.
+        """
+        call_command("generate_glucose_data", users=2, days=1, stdout=io.StringIO())
+        count = GlucoseLevel.objects.count()
+        self.assertEqual(GlucoseLevel.objects.filter(metadata__user_id="synthetic_1").count(), len(list(generate_history("synthetic_1", 1))))
+        self.assertEqual(DailyGlucoseRollup.objects.filter(user_id="synthetic_0").count(), 1)
+
+        call_command("generate_glucose_data", users=2, days=1, stdout=io.StringIO())
+        self.assertEqual(GlucoseLevel.objects.count(), count)
+        with self.assertRaises(CommandError):
+            call_command("generate_glucose_data", start="01.01.2024", stdout=io.StringIO())
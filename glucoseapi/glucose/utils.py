@@ -1,8 +1,78 @@
+import difflib
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+from django.utils import timezone
+
+# Timestamp formats accepted besides ISO 8601, as found in LibreView exports.
+TIMESTAMP_FORMATS = ("%d-%m-%Y %H:%M", "%d.%m.%Y %H:%M", "%m-%d-%Y %I:%M %p")
+
+# IANA names of UTC.
+UTC_ZONE_NAMES = frozenset(('UTC', 'Etc/UTC', 'Etc/UCT', 'UCT', 'Etc/Universal', 'Universal', 'Etc/Zulu', 'Zulu'))
+
+# Precision of the decimal columns of GlucoseLevel.
+DECIMAL_MAX_DIGITS = 7
+DECIMAL_PLACES = 2
+
+# Column headers of LibreView exports in other locales, by field name. Headers in mmol/L are not
+# listed because their values would need to be converted.
+HEADER_ALIASES = {
+    'device': ("Device",),
+    'serial_number': ("Serial Number",),
+    'device_timestamp': ("Device Timestamp",),
+    'recording_type': ("Record Type", "Recording Type"),
+    'glucose_value_trend': ("Historic Glucose mg/dL", "Historic Glucose (mg/dL)"),
+    'glucose_scan': ("Scan Glucose mg/dL", "Scan Glucose (mg/dL)"),
+    'non_numerical_rapid_acting_insulin': ("Non-numeric Rapid-Acting Insulin",),
+    'rapid_acting_insulin': ("Rapid-Acting Insulin (units)",),
+    'non_numerical_nutritional_data': ("Non-numeric Food",),
+    'carbohydrates_grams': ("Carbohydrates (grams)",),
+    'carbohydrates_portions': ("Carbohydrates (servings)", "Carbohydrates (portions)"),
+    'non_numerical_depot_insulin': ("Non-numeric Long-Acting Insulin",),
+    'depot_insulin': ("Long-Acting Insulin (units)", "Long-Acting Insulin Value (units)"),
+    'notes': ("Notes",),
+    'glucose_test_strips': ("Strip Glucose mg/dL", "Strip Glucose (mg/dL)"),
+    'ketone': ("Ketone mmol/L", "Ketone (mmol/L)"),
+    'mealtime_insulin': ("Meal Insulin (units)",),
+    'correction_insulin': ("Correction Insulin (units)",),
+    'insulin_change_by_user': ("User Change Insulin (units)",),
+}
+
+def normalize_header(header):
+    """
+    Normalizes a column header for lookups: case and surrounding or repeated whitespace are ignored.
+    """
+    return " ".join(str(header).split()).casefold()
+
+@lru_cache(maxsize=None)
+def get_verbose_name_index(meta):
+    """
+    Builds the reverse index from column headers to field names of a model, once per model.
+
+    The index contains the verbose name and the name of every field plus the HEADER_ALIASES of
+    its name, all normalized with normalize_header.
+
+    Args:
+        meta (django.db.models.options.Options): The meta information of the model.
+
+    Returns:
+        dict: A mapping of normalized header to field name.
+    """
+    index = {}
+    for field in meta.get_fields():
+        verbose_name = getattr(field, 'verbose_name', None)
+        if verbose_name is None:
+            continue
+        for header in (verbose_name, field.name, *HEADER_ALIASES.get(field.name, ())):
+            index.setdefault(normalize_header(header), field.name)
+    return index
+
 def get_field_from_verbose(meta, verbose_name):
     """
     Retrieves the name of a field from the given model's meta information based on its verbose name.
 
-    Source: https://stackoverflow.com/questions/56283155/how-to-access-a-field-name-in-django-model-via-the-verbose-name-or-column-name
+    German verbose names, field names and the English LibreView headers in HEADER_ALIASES are
+    accepted, ignoring case and whitespace. Lookups use a cached index and take constant time.
 
     Args:
         meta (django.db.models.options.Options): The meta information of the model.
@@ -12,9 +82,107 @@ def get_field_from_verbose(meta, verbose_name):
         str: The name of the field.
 
     Raises:
-        KeyError: If a field with the given verbose name is not found.
+        KeyError: If a field with the given verbose name is not found. The message lists close matches.
     """
+    index = get_verbose_name_index(meta)
+    normalized = normalize_header(verbose_name)
     try:
-        return next(f.name for f in meta.get_fields() if f.verbose_name == verbose_name)
-    except:
-        raise KeyError(verbose_name)
\ No newline at end of file
+        return index[normalized]
+    except KeyError:
+        matches = difflib.get_close_matches(normalized, index.keys(), n=3)
+        suggestion = f"; close matches: {', '.join(matches)}" if matches else ""
+        raise KeyError(f"Unknown column {verbose_name!r} for {meta.object_name}{suggestion}") from None
+
+
+def parse_timestamp(value):
+    """
+    Converts a device timestamp into a timezone-aware datetime.
+
+    Accepts datetimes, ISO 8601 strings and the date formats used by LibreView exports.
+    Naive values are interpreted as UTC.
+
+    Args:
+        value (datetime | str | None): The timestamp.
+
+    Returns:
+        datetime: The aware datetime, or None for empty values.
+
+    Raises:
+        ValueError: If the value is not a recognized timestamp.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(text)
+        except ValueError:
+            for date_format in TIMESTAMP_FORMATS:
+                try:
+                    parsed = datetime.strptime(text, date_format)
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError(f"Invalid timestamp: {value!r}") from None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def parse_decimal(value, max_digits=DECIMAL_MAX_DIGITS, decimal_places=DECIMAL_PLACES):
+    """
+    Converts a numeric value into a Decimal rounded to the precision of a DecimalField.
+
+    Decimal commas, as used in German exports, are accepted.
+
+    Args:
+        value (str | int | float | Decimal | None): The value.
+        max_digits (int): The maximum number of digits of the column.
+        decimal_places (int): The number of decimal places of the column.
+
+    Returns:
+        Decimal: The rounded value, or None for empty values.
+
+    Raises:
+        ValueError: If the value is not a finite number or does not fit the column.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid number: {value!r}")
+    try:
+        number = Decimal(repr(value) if isinstance(value, float) else str(value).strip().replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"Invalid number: {value!r}") from None
+    if not number.is_finite() or abs(number) >= 10 ** (max_digits - decimal_places):
+        raise ValueError(f"Invalid number: {value!r}")
+    return number.quantize(Decimal(1).scaleb(-decimal_places), rounding=ROUND_HALF_UP)
+
+
+def parse_glucose(value):
+    """
+    Converts a glucose value into whole mg/dL.
+
+    Args:
+        value (str | int | float | Decimal | None): The glucose value in mg/dL.
+
+    Returns:
+        int: The rounded glucose value, or None for empty values.
+
+    Raises:
+        ValueError: If the value is not a number.
+    """
+    number = parse_decimal(value, max_digits=12, decimal_places=0)
+    return None if number is None else int(number)
+
+
+def is_utc(tzinfo):
+    """
+    Returns whether a time zone is UTC, given as None, datetime.timezone.utc or a ZoneInfo.
+
+    ZoneInfo('UTC') does not compare equal to datetime.timezone.utc, so the IANA name is checked.
+    """
+    return tzinfo is None or tzinfo == dt_timezone.utc or getattr(tzinfo, 'key', None) in UTC_ZONE_NAMES
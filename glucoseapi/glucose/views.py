@@ -1,17 +1,46 @@
-import json
+from datetime import timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.db.models import Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import APIException, NotFound, ParseError
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from glucose.models import GlucoseLevel, GlucoseLevelMetadata
-from glucose.serializers import GlucoseLevelMetadataSerializer, GlucoseLevelSerializer
-from glucose.dtos import GlucoseLevelDTO
+from glucose.models import GlucoseLevel, GlucoseLevelMetadata, IngestionJob
+from glucose.serializers import GlucoseLevelMetadataSerializer, GlucoseLevelRowSerializer, GlucoseLevelSerializer, IngestionJobSerializer
+from glucose.cache import (
+    cache_level, cached_user_response, counters, etag_matches, get_cached_level, get_user_version, make_etag, not_modified,
+)
+from glucose.downsampling import MAX_POINTS, downsample_levels
+from glucose.export import FORMATS, stream_levels
+from glucose.ingestion import GlucoseLevelParser, IngestionSummary, ingest_ndjson, upsert_glucose_levels
+from glucose.instrumentation import PROMETHEUS_CONTENT_TYPE, registry
+from glucose.jobs import enqueue_ingestion
+from glucose.agp import AGP_DAYS, BUCKET_MINUTES, MINUTES_PER_DAY, compute_agp
+from glucose.metrics import compute_glucose_stats
+from glucose.rollups import RESOLUTIONS, get_trend
+from glucose.pagination import KeysetPagination
+from glucose.utils import is_utc, parse_timestamp
+
+# Accepted values of boolean query parameters.
+BOOLEAN_VALUES = {'true': True, '1': True, 'false': False, '0': False}
 
 # Create your views here.
 @api_view(['GET'])
+@cached_user_response
 def get_levels_by_user_id(request):
     """
     Retrieve glucose levels for a specific user based on user_id.
 
+    Pages are numbered by default. With pagination=cursor the levels are paginated by
+    (device_timestamp, id) with opaque next/previous cursors and without a total count.
+    The levels can be narrowed with the from (inclusive) and to (exclusive) device time,
+    device and recording_type query parameters. With points=N the time-ordered readings that
+    have a glucose value are downsampled to N representative readings instead of paginated.
+    fields=a,b limits the levels to the given fields, which are the only columns queried, and
+    omit_nulls=true leaves out fields without a value.
+
     Args:
         request (HttpRequest): The HTTP request object.
 
@@ -25,11 +54,14 @@ def get_levels_by_user_id(request):
         user_id, limit, sort_param = get_request_params(request)
         if user_id is None:
             return Response({"error": "user_id parameter is required"}, status=400)
-        paginator, result_page = get_filtered_levels(request, user_id, limit, sort_param)  
-        if result_page is not None:
-            serializer = GlucoseLevelSerializer(result_page, many=True)
-        if paginator is not None:
-            return paginator.get_paginated_response(serializer.data)
+        serializer = get_row_serializer(request)
+        if request.query_params.get('points') is not None:
+            count, levels = get_downsampled_levels(request, user_id, serializer)
+            return Response({"count": count, "results": serializer.serialize(levels)})
+        paginator, result_page = get_filtered_levels(request, user_id, limit, sort_param, serializer)
+        return paginator.get_paginated_response(serializer.serialize(result_page))
+    except APIException as ex:
+        return Response({"error": ex.detail}, status=ex.status_code)
     except Exception as ex:
         return Response({"error": repr(ex)}, status=500)
 
@@ -38,6 +70,10 @@ def get_level_by_id(request, id):
     """
     Retrieve a glucose level by its ID.
 
+    Responses are cached until the data of the level's user changes and carry an ETag derived
+    from the user's data version. A matching If-None-Match header is answered with 304 Not Modified
+    without serializing the level, and without querying it while it is cached.
+
     Args:
         request (HttpRequest): The HTTP request object.
         id (int): The ID of the glucose level to retrieve.
@@ -50,12 +86,226 @@ def get_level_by_id(request, id):
 
     """
     try:
-        level = GlucoseLevel.objects.filter(id=id).first()
-        if level is not None:
+        cached = get_cached_level(id)
+        if cached is not None:
+            user_id, version, data = cached
+            etag = make_etag(request, 'level', id, version)
+            matches = etag_matches(request, etag)
+            counters.record(hit=True, not_modified=matches)
+            if matches:
+                return not_modified(etag)
+            return Response(data, headers={'ETag': etag})
+        counters.record(hit=False)
+
+        # The version is read before the level is loaded: a write committing after the read bumps the
+        # version, which invalidates the entry cached below.
+        user_id = GlucoseLevel.objects.filter(id=id).values_list('metadata__user_id', flat=True).first()
+        if user_id is not None:
+            version = get_user_version(user_id)
+            etag = make_etag(request, 'level', id, version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            level = GlucoseLevel.objects.select_related('metadata').filter(id=id).first()
+        if user_id is not None and level is not None:
             serializer = GlucoseLevelSerializer(level)
-            return Response(serializer.data)
+            cache_level(id, user_id, version, serializer.data)
+            return Response(serializer.data, headers={'ETag': etag})
         else:
             return Response("Glucose level with given ID not found", status=404)
+    except APIException as ex:
+        return Response({"error": ex.detail}, status=ex.status_code)
+    except Exception as ex:
+        return Response({"error": repr(ex)}, status=500)
+
+@api_view(['GET'])
+def get_cache_stats(request):
+    """
+    Retrieve the hit and miss counters of the response cache of this process.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response containing the counters and the hit ratio.
+    """
+    return Response(counters.snapshot())
+
+@api_view(['GET'])
+def get_metrics(request):
+    """
+    Retrieve the per-route request metrics of this process in Prometheus text format.
+
+    For every route and method there are histograms of the wall time, the number and time of
+    database queries, the serializer time and the response size, followed by the response cache counters.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        HttpResponse: The metrics in Prometheus text format.
+    """
+    return HttpResponse(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@api_view(['GET'])
+@cached_user_response
+def get_level_stats(request):
+    """
+    Compute glycemic metrics for a user, optionally within a device time window.
+
+    Time in ranges, mean glucose, standard deviation, coefficient of variation and the glucose
+    management indicator are aggregated by the database. The from (inclusive) and to (exclusive)
+    query parameters bound the window.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response containing the metrics.
+
+    Raises:
+        Exception: If an error occurs while computing the metrics.
+    """
+    try:
+        user_id = request.query_params.get('user_id')
+        if user_id is None:
+            return Response({"error": "user_id parameter is required"}, status=400)
+        levels = GlucoseLevel.objects.filter(metadata__user_id=user_id, **get_level_filters(request))
+        stats = compute_glucose_stats(levels)
+        if not stats['count'] and not GlucoseLevelMetadata.objects.filter(user_id=user_id).exists():
+            raise NotFound('User is not found')
+        return Response({"user_id": user_id, **stats})
+    except APIException as ex:
+        return Response({"error": ex.detail}, status=ex.status_code)
+    except Exception as ex:
+        return Response({"error": repr(ex)}, status=500)
+
+@api_view(['GET'])
+@cached_user_response
+def get_level_trend(request):
+    """
+    Retrieve the hourly or daily glucose trend of a user from the rollup tables.
+
+    The resolution query parameter selects 'day' (default) or 'hour' buckets, from (inclusive) and
+    to (exclusive) bound the bucket start times. Days are local days of the IANA time zone given as tz,
+    UTC by default.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response containing one summary per bucket.
+
+    Raises:
+        Exception: If an error occurs while retrieving the trend.
+    """
+    try:
+        user_id = request.query_params.get('user_id')
+        if user_id is None:
+            return Response({"error": "user_id parameter is required"}, status=400)
+        resolution = request.query_params.get('resolution', 'day')
+        if resolution not in RESOLUTIONS:
+            raise ParseError(f"Unsupported resolution: {resolution}")
+        start, end = get_time_range(request)
+        trend = get_trend(user_id, resolution, start, end, get_time_zone(request))
+        if not trend and not GlucoseLevelMetadata.objects.filter(user_id=user_id).exists():
+            raise NotFound('User is not found')
+        return Response({"user_id": user_id, "resolution": resolution, "results": trend})
+    except APIException as ex:
+        return Response({"error": ex.detail}, status=ex.status_code)
+    except Exception as ex:
+        return Response({"error": repr(ex)}, status=500)
+
+@api_view(['GET'])
+@cached_user_response
+def get_level_agp(request):
+    """
+    Compute the Ambulatory Glucose Profile of a user.
+
+    Returns the 5th, 25th, 50th, 75th and 95th glucose percentiles by time of day as arrays with one
+    value per bucket of bucket_minutes (default 15). The from (inclusive) and to (exclusive) query
+    parameters bound the device time window, which defaults to the 14 days before to or before the
+    latest reading. The time of day is the local time in the IANA time zone given as tz, UTC by
+    default, which keeps naive device timestamps, stored as UTC, at their device time.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response containing the profile.
+
+    Raises:
+        Exception: If an error occurs while computing the profile.
+    """
+    try:
+        user_id = request.query_params.get('user_id')
+        if user_id is None:
+            return Response({"error": "user_id parameter is required"}, status=400)
+        bucket_minutes = request.query_params.get('bucket_minutes', BUCKET_MINUTES)
+        try:
+            bucket_minutes = int(bucket_minutes)
+        except ValueError:
+            raise ParseError(f"Invalid bucket_minutes parameter: {bucket_minutes}")
+        if not 0 < bucket_minutes <= 60 or MINUTES_PER_DAY % bucket_minutes:
+            raise ParseError("bucket_minutes must divide a day and be at most 60")
+        tzinfo = get_time_zone(request)
+
+        levels = GlucoseLevel.objects.filter(metadata__user_id=user_id)
+        start, end = get_time_range(request)
+        if start is None:
+            latest = end
+            if latest is None:
+                latest = levels.aggregate(latest=Max('device_timestamp'))['latest']
+                if latest is None and not GlucoseLevelMetadata.objects.filter(user_id=user_id).exists():
+                    raise NotFound('User is not found')
+            if latest is not None:
+                start = latest - timedelta(days=AGP_DAYS)
+        if start is not None:
+            levels = levels.filter(device_timestamp__gte=start)
+        if end is not None:
+            levels = levels.filter(device_timestamp__lt=end)
+
+        profile = compute_agp(levels, bucket_minutes, tzinfo)
+        return Response({
+            "user_id": user_id, "from": start, "to": end, "tz": str(tzinfo), "bucket_minutes": bucket_minutes, **profile,
+        })
+    except APIException as ex:
+        return Response({"error": ex.detail}, status=ex.status_code)
+    except Exception as ex:
+        return Response({"error": repr(ex)}, status=500)
+
+@api_view(['GET'])
+def export_levels(request):
+    """
+    Export all glucose levels of a user as an Arrow IPC stream or a Parquet file.
+
+    The levels are read from the database in chunks and streamed as record batches in device time order.
+    The file_format query parameter selects 'arrow' (default) or 'parquet'; from and to bound the device time.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        StreamingHttpResponse: The streamed file.
+
+    Raises:
+        Exception: If an error occurs before streaming starts.
+    """
+    try:
+        user_id = request.query_params.get('user_id')
+        if user_id is None:
+            return Response({"error": "user_id parameter is required"}, status=400)
+        export_format = request.query_params.get('file_format', 'arrow')
+        if export_format not in FORMATS:
+            return Response({"error": f"file_format must be one of {', '.join(FORMATS)}"}, status=400)
+        levels = GlucoseLevel.objects.filter(metadata__user_id=user_id, **get_level_filters(request))
+        if not GlucoseLevelMetadata.objects.filter(user_id=user_id).exists():
+            raise NotFound('User is not found')
+        content_type, extension = FORMATS[export_format]
+        response = StreamingHttpResponse(stream_levels(levels, export_format), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="glucose_levels_{user_id}.{extension}"'
+        return response
+    except APIException as ex:
+        return Response({"error": ex.detail}, status=ex.status_code)
     except Exception as ex:
         return Response({"error": repr(ex)}, status=500)
 
@@ -74,43 +324,180 @@ def get_request_params(request):
     sort_param = request.query_params.get('sort_by')
     return user_id, limit, sort_param
 
-def get_filtered_levels(request, user_id, limit, sort_param):
+def get_row_serializer(request):
+    """
+    Create the row serializer for the fields and omit_nulls query parameters of the given request.
+
+    Args:
+        request (Request): The request object.
+
+    Returns:
+        GlucoseLevelRowSerializer: The serializer of the comma-separated fields, or of all fields if
+            fields is not set, leaving out null values if omit_nulls is true.
+
+    Raises:
+        ParseError: If fields contains an unknown field or omit_nulls is not true or false.
+    """
+    params = request.query_params
+    fields = params.get('fields')
+    if fields is not None:
+        fields = [name.strip() for name in fields.split(',') if name.strip()]
+    omit_nulls = params.get('omit_nulls', 'false').lower()
+    if omit_nulls not in BOOLEAN_VALUES:
+        raise ParseError(f"Invalid omit_nulls parameter: {params['omit_nulls']}")
+    try:
+        return GlucoseLevelRowSerializer(fields, BOOLEAN_VALUES[omit_nulls])
+    except ValueError as ex:
+        raise ParseError(str(ex))
+
+def get_filtered_levels(request, user_id, limit, sort_param, row_serializer=None):
     """
     Retrieve filtered glucose levels for a specific user.
 
+    The levels of all metadata records of the user are selected through a join in the page query
+    itself. The existence of the user is only checked when the page is empty.
+
     Args:
         request (HttpRequest): The HTTP request object.
         user_id (int): The ID of the user.
         limit (int): The maximum number of levels to retrieve.
         sort_param (str): The parameter to sort the levels by.
+        row_serializer (GlucoseLevelRowSerializer): If given, the page contains rows selected for
+            this serializer instead of model instances.
 
     Returns:
         tuple: A tuple containing the paginator object and the paginated result page.
 
     Raises:
-        ValueError: If the user is not found.
+        NotFound: If the user is not found.
+    """
+    levels = GlucoseLevel.objects.filter(metadata__user_id=user_id, **get_level_filters(request))
+    paginator = create_paginator(limit, request.query_params.get('pagination'))
+    # The keyset paginator applies its own ordering.
+    if sort_param is not None and not isinstance(paginator, KeysetPagination):
+        levels = levels.order_by(sort_param)
+    if row_serializer is not None:
+        levels = row_serializer.select(levels)
+    result_page = paginator.paginate_queryset(levels, request)
+    if not result_page and not GlucoseLevelMetadata.objects.filter(user_id=user_id).exists():
+        raise NotFound('User is not found')
+    return paginator, result_page
+
+def get_downsampled_levels(request, user_id, row_serializer):
+    """
+    Retrieve a downsampled glucose series for a specific user.
+
+    The readings are reduced to the number given by the points query parameter with
+    largest-triangle-three-buckets, which keeps highs and lows visible, and only the selected
+    readings are loaded in full.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        user_id (int): The ID of the user.
+        row_serializer (GlucoseLevelRowSerializer): The serializer the rows are selected for.
+
+    Returns:
+        tuple: The number of readings in the series and the selected rows in time order.
+
+    Raises:
+        ParseError: If points is not a number between 3 and MAX_POINTS.
+        NotFound: If the user is not found.
+    """
+    points = request.query_params.get('points')
+    try:
+        points = int(points)
+    except ValueError:
+        raise ParseError(f"Invalid points parameter: {points}")
+    if not 3 <= points <= MAX_POINTS:
+        raise ParseError(f"points must be between 3 and {MAX_POINTS}")
+
+    levels = GlucoseLevel.objects.filter(metadata__user_id=user_id, **get_level_filters(request))
+    ids, count = downsample_levels(levels, points)
+    if not ids and not GlucoseLevelMetadata.objects.filter(user_id=user_id).exists():
+        raise NotFound('User is not found')
+    rows = row_serializer.select(GlucoseLevel.objects.filter(id__in=ids).order_by('device_timestamp', 'id')) if ids else []
+    return count, rows
+
+def get_level_filters(request):
+    """
+    Get the queryset filters for the optional level query parameters of the given request.
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        dict: Field lookups for the from, to, device and recording_type query parameters that are set.
+
+    Raises:
+        ParseError: If from or to is not a valid timestamp.
+    """
+    params = request.query_params
+    start, end = get_time_range(request)
+    filters = {}
+    if start is not None:
+        filters['device_timestamp__gte'] = start
+    if end is not None:
+        filters['device_timestamp__lt'] = end
+    for param in ('device', 'recording_type'):
+        if params.get(param) is not None:
+            filters[param] = params[param]
+    return filters
+
+def get_time_range(request):
+    """
+    Get the time range of the from (inclusive) and to (exclusive) query parameters of the given request.
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        tuple: The start and end timestamps, each None if its parameter is not set.
+
+    Raises:
+        ParseError: If from or to is not a valid timestamp.
+    """
+    bounds = []
+    for param in ('from', 'to'):
+        value = request.query_params.get(param)
+        try:
+            bounds.append(parse_timestamp(value) if value else None)
+        except ValueError as ex:
+            raise ParseError(f"Invalid {param} parameter: {ex}")
+    return tuple(bounds)
+
+def get_time_zone(request):
+    """
+    Get the time zone of the tz query parameter of the given request.
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        tzinfo: The time zone, datetime.timezone.utc for UTC or if the parameter is not set.
+
+    Raises:
+        ParseError: If tz is not an IANA time zone name.
     """
-    user = GlucoseLevelMetadata.objects.filter(user_id=user_id)
-    if user.exists():
-        user = user.first()
-        levels = GlucoseLevel.objects.filter(metadata=user)
-        if sort_param is not None:
-            levels = levels.order_by(sort_param)
-        paginator = create_paginator(limit)
-        result_page = paginator.paginate_queryset(levels, request)
-        return paginator, result_page
-    raise ValueError('User is not found')
+    name = request.query_params.get('tz', 'UTC')
+    try:
+        zone = ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ParseError(f"Unknown time zone: {name}")
+    return timezone.utc if is_utc(zone) else zone
 
-def create_paginator(limit):
+def create_paginator(limit, mode=None):
     """
     Creates a paginator object with the specified limit.
 
     Args:
         limit (int): The maximum number of items per page.
+        mode (str): 'cursor' for keyset pagination, page numbers otherwise.
 
     Returns:
-        paginator (PageNumberPagination): The paginator object with the specified limit.
+        paginator (PageNumberPagination | KeysetPagination): The paginator object with the specified limit.
     """
+    if mode == 'cursor':
+        return KeysetPagination(limit)
     paginator = PageNumberPagination()
     if limit is not None:
         paginator.page_size = limit
@@ -121,49 +508,164 @@ def create_levels(request):
     """
     API endpoint for creating glucose levels.
 
+    With mode=background the upload is only stored and acknowledged with 202 Accepted and the
+    status of the queued ingestion job, which the workers of the process_ingestion_jobs command
+    ingest later. The status is available at the URL of the Location header.
+
+    Rows that cannot be parsed are rejected without discarding the rest of the upload. They are
+    counted and reported with their 1-based position; if no row is valid the response is 400 Bad Request.
+
     Args:
         request (HttpRequest): The HTTP request object.
 
     Returns:
-        Response: The HTTP response object containing the serialized metadata and glucose levels.
+        Response: The HTTP response object containing the serialized metadata and glucose levels
+            and the rejected rows, or the status of the queued ingestion job.
 
     Raises:
         Exception: If an error occurs during the processing of glucose levels.
 
     """
     try:
-        levels = json.loads(request.body)
+        if request.query_params.get('mode') == 'background':
+            return queue_levels(request)
+        levels = request.data
         if levels:
-            metadata_objects, glucose_level_objects = process_glucose_levels(levels)
+            metadata_objects, glucose_level_objects, summary = process_glucose_levels(levels)
+            if not glucose_level_objects:
+                return Response({"rejected": summary.rejected, "errors": summary.errors}, status=400)
             serialized_metadata = GlucoseLevelMetadataSerializer(metadata_objects, many=True)
             serialized_glucose_levels = GlucoseLevelSerializer(glucose_level_objects, many=True)
-            return Response({"metadata": serialized_metadata.data, "glucose_levels": serialized_glucose_levels.data})
+            return Response({
+                "metadata": serialized_metadata.data,
+                "glucose_levels": serialized_glucose_levels.data,
+                "rejected": summary.rejected,
+                "errors": summary.errors,
+            })
         else:
             return Response("No object returned in body", status=400)
+    except APIException as ex:
+        return Response({"error": ex.detail}, status=ex.status_code)
     except Exception as ex:
         return Response({"error": repr(ex)}, status=500)
 
+def queue_levels(request):
+    """
+    Queues the uploaded glucose levels for ingestion in the background.
+
+    The body is stored without being parsed, so the response time does not depend on the size of the upload.
+
+    Args:
+        request (Request): The DRF request object.
+
+    Returns:
+        Response: 202 Accepted with the status of the queued ingestion job.
+    """
+    payload = request.body.decode('utf-8')
+    if payload.strip() in ('', '[]'):
+        return Response("No object returned in body", status=400)
+    job = enqueue_ingestion(payload)
+    return Response(IngestionJobSerializer(job).data, status=202, headers={'Location': reverse('get_ingestion_job', args=[job.id])})
+
+@api_view(['GET'])
+def get_ingestion_job(request, id):
+    """
+    Retrieve the status and progress of an ingestion job.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        id (int): The ID of the ingestion job.
+
+    Returns:
+        Response: The HTTP response containing the status, the number of processed, inserted,
+            updated and rejected rows and the row-level errors of the job.
+    """
+    try:
+        job = IngestionJob.objects.defer('payload').filter(id=id).first()
+        if job is None:
+            return Response("Ingestion job with given ID not found", status=404)
+        return Response(IngestionJobSerializer(job).data)
+    except Exception as ex:
+        return Response({"error": repr(ex)}, status=500)
+
+@api_view(['POST'])
+def ingest_levels(request):
+    """
+    API endpoint for streaming ingestion of glucose levels in newline-delimited JSON.
+
+    The body is read line by line and written in fixed-size batches, so memory use does not depend
+    on the size of the upload. Chunked transfer encoding is supported.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response object containing the number of inserted, updated and rejected rows
+            and the row-level errors.
+
+    Raises:
+        Exception: If an error occurs while writing the glucose levels.
+
+    """
+    try:
+        summary = ingest_ndjson(get_body_stream(request))
+        if not (summary.inserted or summary.updated or summary.rejected):
+            return Response("No object returned in body", status=400)
+        return Response({
+            "inserted": summary.inserted,
+            "updated": summary.updated,
+            "rejected": summary.rejected,
+            "errors": summary.errors,
+        })
+    except Exception as ex:
+        return Response({"error": repr(ex)}, status=500)
+
+def get_body_stream(request):
+    """
+    Get a file-like object for reading the request body incrementally.
+
+    Without a Content-Length header Django exposes an empty body under WSGI. Servers that terminate
+    chunked requests themselves signal this with wsgi.input_terminated, in which case the raw input is read.
+
+    Args:
+        request (Request): The DRF request object.
+
+    Returns:
+        file-like: An object yielding the body line by line.
+    """
+    meta = request.META
+    if not meta.get('CONTENT_LENGTH') and meta.get('wsgi.input_terminated'):
+        return meta['wsgi.input']
+    return request._request
+
 def process_glucose_levels(levels):
     """
     Process a list of glucose levels.
 
+    The rows are converted with a batch parser, see glucose.ingestion.GlucoseLevelParser. Rows
+    that cannot be parsed are rejected with their 1-based position, and all valid rows are written
+    with a single set-based upsert, see glucose.ingestion.upsert_glucose_levels.
+
     Args:
         levels (list): A list of glucose level dictionaries.
 
     Returns:
-        tuple: A tuple containing two lists - metadata_objects and glucose_level_objects.
-            metadata_objects (list): A list of metadata objects created or updated for each glucose level.
+        tuple: A tuple containing metadata_objects, glucose_level_objects and summary.
+            metadata_objects (list): A list of metadata objects created or updated for each valid glucose level.
             glucose_level_objects (list): A list of glucose level objects created or updated.
+            summary (IngestionSummary): The number of inserted, updated and rejected rows and the row-level errors.
+
+    Raises:
+        ValueError: If levels is not a list.
 
     """
-    metadata_objects = []
-    glucose_level_objects = []
-    for level in levels:
-        dto = GlucoseLevelDTO.from_dict(level)
-        metadata, glucose_level = create_or_update_glucose_level(dto)
-        metadata_objects.append(metadata)
-        glucose_level_objects.append(glucose_level)
-    return metadata_objects, glucose_level_objects
+    if not isinstance(levels, list):
+        raise ValueError('Body is not a JSON array')
+    summary = IngestionSummary()
+    dtos = GlucoseLevelParser().parse_all(levels, summary)
+    result = upsert_glucose_levels(dtos)
+    summary.add(result)
+    return result.metadata_objects, result.glucose_level_objects, summary
 
 def create_or_update_glucose_level(dto):
     """
@@ -176,38 +678,5 @@ def create_or_update_glucose_level(dto):
         A tuple containing the metadata and glucose level objects.
 
     """
-    metadata, created = GlucoseLevelMetadata.objects.update_or_create(
-        user_id=dto.user_id,
-        defaults={
-            'created_at': dto.created_at,
-            'created_by': dto.created_by,
-        }
-    )
-
-    # Create or update the glucose level
-    glucose_level, created = GlucoseLevel.objects.update_or_create(
-        metadata=metadata,
-        device=dto.device,
-        serial_number=dto.serial_number,
-        device_timestamp=dto.device_timestamp,
-        defaults={
-            'recording_type': dto.recording_type,
-            'glucose_value_trend': dto.glucose_value_trend,
-            'glucose_scan': dto.glucose_scan,
-            'non_numerical_rapid_acting_insulin': dto.non_numerical_rapid_acting_insulin,
-            'rapid_acting_insulin': dto.rapid_acting_insulin,
-            'non_numerical_nutritional_data': dto.non_numerical_nutritional_data,
-            'carbohydrates_grams': dto.carbohydrates_grams,
-            'carbohydrates_portions': dto.carbohydrates_portions,
-            'non_numerical_depot_insulin': dto.non_numerical_depot_insulin,
-            'depot_insulin': dto.depot_insulin,
-            'notes': dto.notes,
-            'glucose_test_strips': dto.glucose_test_strips,
-            'ketone': dto.ketone,
-            'mealtime_insulin': dto.mealtime_insulin,
-            'correction_insulin': dto.correction_insulin,
-            'insulin_change_by_user': dto.insulin_change_by_user,
-        }
-    )
-    
-    return metadata, glucose_level
+    result = upsert_glucose_levels([dto])
+    return result.metadata_objects[0], result.glucose_level_objects[0]
@@ -10,7 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'glucose.middleware.PerformanceMiddleware',
+    'glucose.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,12 +78,72 @@ WSGI_APPLICATION = 'glucoseapi.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
+# The profile is selected with GLUCOSE_DATABASE:
+# - sqlite (default): single-node installs. WAL mode, synchronous=NORMAL and writers waiting up to
+#   SQLITE_TIMEOUT seconds for the write lock, see glucose.backends.sqlite3.
+# - postgresql: configured with the POSTGRES_* variables and requires psycopg. Set PGBOUNCER=1 behind
+#   PgBouncer in transaction pooling mode, which does not support server-side cursors.
+# Connections are kept open for CONN_MAX_AGE seconds (0 closes them after every request, empty keeps
+# them open) and checked before they are reused. Django 4.2 has no connection pool and keeps one
+# connection per thread. Under WSGI that is one per worker thread, so the default is 60 seconds.
+# Under ASGI (GLUCOSE_SERVER=asgi, see gunicorn.conf.py) sync code runs in executor threads, whose
+# persistent connections are never closed by the request cycle and accumulate. The default is
+# therefore 0 there, which opens a connection per request; put PgBouncer in front of PostgreSQL to
+# pool them.
+
+GLUCOSE_DATABASE = os.environ.get('GLUCOSE_DATABASE', 'sqlite')
+conn_max_age = os.environ.get('CONN_MAX_AGE', '0' if os.environ.get('GLUCOSE_SERVER') == 'asgi' else '60')
+
+if GLUCOSE_DATABASE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'glucoseapi'),
+            'USER': os.environ.get('POSTGRES_USER', 'glucoseapi'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('PGBOUNCER') == '1',
+        }
+    }
+elif GLUCOSE_DATABASE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'glucose.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': float(os.environ.get('SQLITE_TIMEOUT', '20')),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Unknown GLUCOSE_DATABASE {GLUCOSE_DATABASE!r}, expected sqlite or postgresql')
+
+DATABASES['default'].update(
+    CONN_MAX_AGE=int(conn_max_age) if conn_max_age else None,
+    CONN_HEALTH_CHECKS=True,
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Responses of the per-user read endpoints are cached in GLUCOSE_CACHE_ALIAS. The local-memory cache is
+# private to each process; set REDIS_URL to share one cache between all processes.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'glucoseapi',
     }
 }
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+
+GLUCOSE_CACHE_ALIAS = 'default'
+GLUCOSE_CACHE_TIMEOUT = 300
 
 
 # Password validation
@@ -126,4 +190,21 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
-}
\ No newline at end of file
+    'DEFAULT_RENDERER_CLASSES': [
+        'glucose.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'glucose.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Requests slower than this many seconds are logged with their SQL to the glucose.slow_requests
+# logger by glucose.middleware.PerformanceMiddleware. None, or an empty variable, disables the log.
+slow_request_seconds = os.environ.get('GLUCOSE_SLOW_REQUEST_SECONDS', '1.0')
+GLUCOSE_SLOW_REQUEST_SECONDS = float(slow_request_seconds) if slow_request_seconds else None
+
+# Smallest response body compressed by glucose.middleware.CompressionMiddleware, in bytes.
+GLUCOSE_COMPRESS_MIN_BYTES = int(os.environ.get('GLUCOSE_COMPRESS_MIN_BYTES', '1024'))
@@ -16,12 +16,23 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from glucose import views
+from glucose import async_views, views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/levels/', views.get_levels_by_user_id, name='get_levels_by_user_id'),
     path('api/v1/levels/<int:id>', views.get_level_by_id, name='get_level_by_id'),
-    path('api/v1/levels/create', views.create_levels, name='create_levels')
+    path('api/v1/levels/create', views.create_levels, name='create_levels'),
+    path('api/v1/levels/ingest', views.ingest_levels, name='ingest_levels'),
+    path('api/v1/levels/jobs/<int:id>', views.get_ingestion_job, name='get_ingestion_job'),
+    path('api/v1/levels/export', views.export_levels, name='export_levels'),
+    path('api/v1/levels/stats', views.get_level_stats, name='get_level_stats'),
+    path('api/v1/levels/trend', views.get_level_trend, name='get_level_trend'),
+    path('api/v1/levels/agp', views.get_level_agp, name='get_level_agp'),
+    path('api/v1/cache/stats', views.get_cache_stats, name='get_cache_stats'),
+    path('api/v1/metrics', views.get_metrics, name='get_metrics'),
+    path('api/v1/async/levels/', async_views.get_levels_by_user_id, name='async_get_levels_by_user_id'),
+    path('api/v1/async/levels/<int:id>', async_views.get_level_by_id, name='async_get_level_by_id'),
+    path('api/v1/async/levels/create', async_views.create_levels, name='async_create_levels'),
 
 ]
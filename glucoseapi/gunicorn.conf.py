@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for serving glucoseapi, read by gunicorn from the working directory:
+
+    gunicorn                              # WSGI: threaded sync workers
+    GLUCOSE_SERVER=asgi gunicorn          # ASGI: async endpoints under /api/v1/async/ on uvicorn workers
+
+WSGI is the default because Django 4.2 reads streamed responses with a synchronous iterator, such
+as the Arrow and Parquet exports, completely into memory under ASGI before sending them.
+
+Requires gunicorn, and uvicorn for the ASGI setup, which are deployment dependencies and not part
+of requirements.txt. All settings can be overridden on the command line.
+"""
+import multiprocessing
+import os
+
+server = os.environ.get('GLUCOSE_SERVER', 'wsgi')
+
+bind = os.environ.get('GLUCOSE_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GLUCOSE_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+if server == 'asgi':
+    wsgi_app = 'glucoseapi.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'glucoseapi.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GLUCOSE_THREADS', 4))
+
+# Uploads can take a while on large payloads.
+timeout = 120
+keepalive = 5
+accesslog = '-'